@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Benchmark the training step of `Rank` and `Rate` models.
+
+Compares the number of training steps per second of three paths:
+    dense: The legacy path, which converts every sparse embedding
+        gradient into a dense `(n_stimuli, n_dim)` tensor.
+    sparse: The default path, which applies sparse embedding
+        gradients directly.
+    sparse+xla: The default path compiled with XLA (i.e.,
+        `jit_compile=True`).
+
+Random observations are used since only the cost of a training step
+is of interest.
+
+"""
+
+import os
+os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"  # noqa
+import time
+
+import numpy as np
+import tensorflow as tf
+
+import psiz
+
+# Uncomment and edit the following to control GPU visibility.
+os.environ["CUDA_DEVICE_ORDER"] = "PCI_BUS_ID"
+os.environ["CUDA_VISIBLE_DEVICES"] = "0"
+
+
+class DenseRank(psiz.keras.models.Rank):
+    """Rank model that densifies all sparse gradients."""
+
+    def _prepare_gradients(self, gradients, trainable_variables):
+        """Convert all sparse gradients to dense tensors."""
+        return [tf.convert_to_tensor(g) for g in gradients]
+
+
+class DenseRate(psiz.keras.models.Rate):
+    """Rate model that densifies all sparse gradients."""
+
+    def _prepare_gradients(self, gradients, trainable_variables):
+        """Convert all sparse gradients to dense tensors."""
+        return [tf.convert_to_tensor(g) for g in gradients]
+
+
+def main():
+    """Run script."""
+    # Settings.
+    n_stimuli = 50000
+    n_dim = 10
+    n_trial = 20 * 512
+    batch_size = 512
+    epochs = 3
+
+    rng = np.random.default_rng(seed=252)
+
+    ds_rank = rank_dataset(rng, n_stimuli, n_trial, batch_size)
+    ds_rate = rate_dataset(rng, n_stimuli, n_trial, batch_size)
+    n_step = int(np.ceil(n_trial / batch_size))
+
+    rank_loss = {
+        'loss': tf.keras.losses.CategoricalCrossentropy(),
+    }
+    rate_loss = {
+        'loss': tf.keras.losses.MeanSquaredError(),
+    }
+
+    print('n_stimuli: {0} | n_dim: {1} | batch_size: {2}'.format(
+        n_stimuli, n_dim, batch_size
+    ))
+    for model_name, model_class, ds, loss_kwargs in (
+        ('Rank', psiz.keras.models.Rank, ds_rank, rank_loss),
+        ('Rate', psiz.keras.models.Rate, ds_rate, rate_loss),
+    ):
+        dense_class = {'Rank': DenseRank, 'Rate': DenseRate}[model_name]
+        for path_name, cls, jit_compile in (
+            ('dense', dense_class, False),
+            ('sparse', model_class, False),
+            ('sparse+xla', model_class, True),
+        ):
+            model = build_model(cls, n_stimuli, n_dim)
+            model.compile(
+                optimizer=tf.keras.optimizers.Adam(learning_rate=.001),
+                jit_compile=jit_compile, **loss_kwargs
+            )
+            steps_per_s = time_fit(model, ds, epochs, n_step)
+            print('    {0} | {1:10s} | {2:8.1f} steps/s'.format(
+                model_name, path_name, steps_per_s
+            ))
+
+
+def time_fit(model, ds, epochs, n_step):
+    """Return the number of training steps per second.
+
+    The first epoch is excluded from timing since it includes
+    tracing and compilation.
+
+    """
+    model.fit(ds, epochs=1, verbose=0)
+    start_s = time.perf_counter()
+    model.fit(ds, epochs=epochs, verbose=0)
+    elapsed_s = time.perf_counter() - start_s
+    return (epochs * n_step) / elapsed_s
+
+
+def rank_dataset(rng, n_stimuli, n_trial, batch_size):
+    """Return a dataset of random 8-choose-2 rank observations."""
+    n_reference = 8
+    stimulus_set = np.stack(
+        [
+            rng.choice(n_stimuli, n_reference + 1, replace=False)
+            for _ in range(n_trial)
+        ], axis=0
+    ) + 1
+    obs = psiz.trials.RankObservations(
+        stimulus_set, n_select=np.full([n_trial], 2), mask_zero=True
+    )
+    return obs.as_dataset().batch(batch_size, drop_remainder=False)
+
+
+def rate_dataset(rng, n_stimuli, n_trial, batch_size):
+    """Return a dataset of random pairwise rate observations."""
+    stimulus_set = np.stack(
+        [
+            rng.choice(n_stimuli, 2, replace=False)
+            for _ in range(n_trial)
+        ], axis=0
+    ) + 1
+    rating = rng.uniform(size=[n_trial])
+    obs = psiz.trials.RateObservations(
+        stimulus_set, rating, mask_zero=True
+    )
+    return obs.as_dataset().batch(batch_size, drop_remainder=False)
+
+
+def build_model(cls, n_stimuli, n_dim):
+    """Build a model to benchmark."""
+    stimuli = tf.keras.layers.Embedding(
+        n_stimuli + 1, n_dim, mask_zero=True
+    )
+    kernel = psiz.keras.layers.DistanceBased(
+        distance=psiz.keras.layers.Minkowski(
+            rho_initializer=tf.keras.initializers.Constant(2.),
+            w_initializer=tf.keras.initializers.Constant(1.),
+            trainable=False
+        ),
+        similarity=psiz.keras.layers.ExponentialSimilarity(
+            trainable=False,
+            beta_initializer=tf.keras.initializers.Constant(10.),
+            tau_initializer=tf.keras.initializers.Constant(1.),
+            gamma_initializer=tf.keras.initializers.Constant(0.),
+        )
+    )
+    return cls(stimuli=stimuli, kernel=kernel)
+
+
+if __name__ == "__main__":
+    main()
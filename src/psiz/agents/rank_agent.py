@@ -40,6 +40,11 @@ class RankAgent(Agent):  # pylint: disable=too-few-public-methods
     Methods:
         simulate: Stochastically simulate similarity judgments.
 
+    Notes:
+        The model is called eagerly, so a `similarity_cache` attached
+        to the model (see `psiz.utils.SimilarityCache`) is used when
+        simulating judgments.
+
     """
 
     def __init__(self, model, groups=None):
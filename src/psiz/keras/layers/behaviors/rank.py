@@ -50,6 +50,18 @@ class RankBehavior(Behavior):
                 an outcome is real or a padded placeholder.
                 shape = (batch_size, 1, n_outcome)
 
+        Returns:
+            outcome_prob: The probability of each outcome.
+                shape = (batch_size, n_sample, n_outcome)
+                If the outcome axis has a (static) size of one, it is
+                assumed that only the observed outcome was provided
+                (e.g., `RankObservations.as_dataset(all_outcomes=False)`).
+                In this case the probability of the observed outcome
+                is computed directly from the single ordered stimulus
+                set and returned along with the probability of all
+                other outcomes.
+                shape = (batch_size, n_sample, 2)
+
         NOTE: This computation takes advantage of log-probability
             space, exploiting the fact that log(prob=1)=1 to make
             vectorization cleaner.
@@ -79,6 +91,14 @@ class RankBehavior(Behavior):
         outcome_prob = tf.math.exp(outcome_logprob)
         outcome_prob = is_outcome * outcome_prob
 
+        if outcome_prob.shape[2] == 1:
+            # Only the observed outcome is available, so the remaining
+            # outcomes are collapsed into a single complementary outcome.
+            # The categorical cross-entropy of the observed outcome is
+            # identical to the one obtained using all outcomes.
+            other_prob = tf.maximum(1. - outcome_prob, 0.)
+            return tf.concat([outcome_prob, other_prob], axis=2)
+
         # Clean up numerical errors in probabilities.
         total_outcome_prob = tf.reduce_sum(outcome_prob, axis=2, keepdims=True)
         outcome_prob = outcome_prob / total_outcome_prob
@@ -27,6 +27,9 @@ import warnings
 
 import tensorflow as tf
 from tensorflow.python.eager import backprop
+from tensorflow.python.ops import resource_variable_ops
+
+import psiz.keras.constraints
 
 
 class PsychologicalEmbedding(tf.keras.Model):
@@ -45,12 +48,20 @@ class PsychologicalEmbedding(tf.keras.Model):
             This attribute is only advantageous if using probabilistic
             layers.
 
+    Notes:
+        Calling `fit` traces `train_step` into a single graph
+        function. Training can additionally be compiled with XLA by
+        passing `jit_compile=True` to `compile`. In both cases,
+        sparse gradients of embedding layers are applied without
+        densifying the full embedding matrix (see
+        `_prepare_gradients`).
+
     """
 
     def __init__(
             self, stimuli=None, kernel=None, behavior=None, n_sample=1,
             use_group_stimuli=False, use_group_kernel=False,
-            use_group_behavior=False, **kwargs):
+            use_group_behavior=False, sparse_update=False, **kwargs):
         """Initialize.
 
         Args:
@@ -68,6 +79,14 @@ class PsychologicalEmbedding(tf.keras.Model):
                 information should be piped to `kernel` layer.
             use_group_behavior (optional): Boolean indicating if group
                 information should be piped to `behavior` layer.
+            sparse_update (optional): Boolean indicating if sparse
+                gradients of variables with a row-wise constraint
+                should be applied as sparse updates. If `True`, the
+                optimizer only updates the rows touched by a batch
+                and the constraint is only applied to those rows. If
+                `False`, the gradient is densified and the constraint
+                is applied to the entire variable. See
+                `_prepare_gradients` for the supported constraints.
             kwargs:  Additional key-word arguments.
 
         Raises:
@@ -90,6 +109,7 @@ class PsychologicalEmbedding(tf.keras.Model):
 
         self._kl_weight = 0.
         self._n_sample = n_sample
+        self._sparse_update = sparse_update
 
     @property
     def n_stimuli(self):
@@ -130,6 +150,10 @@ class PsychologicalEmbedding(tf.keras.Model):
     def n_sample(self, n_sample):
         self._n_sample = n_sample
 
+    @property
+    def sparse_update(self):
+        return self._sparse_update
+
     def train_step(self, data):
         """Logic for one training step.
 
@@ -208,44 +232,115 @@ class PsychologicalEmbedding(tf.keras.Model):
         """
         x, y, sample_weight = tf.keras.utils.unpack_x_y_sample_weight(data)
 
-        # NOTE: During computation of gradients, IndexedSlices are
-        # created which generates a TensorFlow warning. I cannot
-        # find an implementation that avoids IndexedSlices. The
-        # following catch environment silences the offending
-        # warning.
-        with warnings.catch_warnings():
-            warnings.filterwarnings(
-                'ignore', category=UserWarning, module=r'.*indexed_slices'
+        with backprop.GradientTape() as tape:
+            # Average over samples.
+            y_pred = tf.reduce_mean(self(x, training=True), axis=1)
+            loss = self.compiled_loss(
+                y, y_pred, sample_weight, regularization_losses=self.losses
             )
-            with backprop.GradientTape() as tape:
-                # Average over samples.
-                y_pred = tf.reduce_mean(self(x, training=True), axis=1)
-                loss = self.compiled_loss(
-                    y, y_pred, sample_weight, regularization_losses=self.losses
-                )
 
-            # Custom training steps:
-            trainable_variables = self.trainable_variables
-            gradients = tape.gradient(loss, trainable_variables)
+        # Custom training steps:
+        trainable_variables = self.trainable_variables
+        gradients = tape.gradient(loss, trainable_variables)
+        gradients = self._prepare_gradients(gradients, trainable_variables)
+        self._apply_gradients(gradients, trainable_variables)
+
+        self.compiled_metrics.update_state(y, y_pred, sample_weight)
+        return {m.name: m.result() for m in self.metrics}
+
+    def _prepare_gradients(self, gradients, trainable_variables):
+        """Prepare gradients for the optimizer.
+
+        Embedding-like layers (e.g., `tf.keras.layers.Embedding`)
+        yield gradients as `tf.IndexedSlices`, which the optimizer
+        applies as a sparse update that only touches the gathered
+        rows. Sparse gradients are left untouched unless the
+        corresponding variable has a constraint. Constrained
+        variables keep a sparse gradient if `sparse_update=True` and
+        the constraint operates independently on each row, i.e.,
+        element-wise constraints (`tf.keras.constraints.NonNeg`,
+        `GreaterEqualThan`, `GreaterThan`, `LessEqualThan`,
+        `LessThan`, `MinMax`) and constraints with a non-zero `axis`
+        attribute (e.g., `NonNegNorm(axis=1)`). All other sparse
+        gradients of constrained variables are densified.
+
+        Args:
+            gradients: A list of gradients.
+            trainable_variables: A list of the corresponding
+                variables.
+
+        Returns:
+            gradients: A list of gradients.
+
+        Notes:
+            When this method is traced by `tf.function` (the default
+            when calling `fit`) the Python logic only executes once,
+            at trace time.
+
+        """
+        gradients = list(gradients)
+        for idx, var in enumerate(trainable_variables):
+            if not isinstance(gradients[idx], tf.IndexedSlices):
+                continue
+            if var.constraint is None:
+                continue
+            if self._sparse_update and _is_rowwise_constrained(var):
+                continue
             # NOTE: There is an open issue for using constraints with
             # embedding-like layers (e.g., tf.keras.layers.Embedding)
             # see:
             # https://github.com/tensorflow/tensorflow/issues/33755.
-            # There are also issues when using Eager Execution. A
-            # work-around is to convert the problematic gradients, which
-            # are returned as tf.IndexedSlices, into dense tensors.
-            for idx in range(len(gradients)):
-                if gradients[idx].__class__.__name__ == 'IndexedSlices':
-                    gradients[idx] = tf.convert_to_tensor(
-                        gradients[idx]
-                    )
-
-        self.optimizer.apply_gradients(zip(
-            gradients, trainable_variables)
-        )
+            # The optimizer refuses to apply a sparse update to a
+            # constrained variable. A work-around is to convert the
+            # problematic gradients into dense tensors. Converting
+            # IndexedSlices generates a TensorFlow warning, which the
+            # following catch environment silences.
+            with warnings.catch_warnings():
+                warnings.filterwarnings(
+                    'ignore', category=UserWarning,
+                    module=r'.*indexed_slices'
+                )
+                gradients[idx] = tf.convert_to_tensor(gradients[idx])
+        return gradients
 
-        self.compiled_metrics.update_state(y, y_pred, sample_weight)
-        return {m.name: m.result() for m in self.metrics}
+    def _apply_gradients(self, gradients, trainable_variables):
+        """Apply gradients using the optimizer.
+
+        Sparse gradients of constrained variables (see
+        `_prepare_gradients`) are applied as a sparse update, after
+        which the constraint is applied to the touched rows only.
+
+        Args:
+            gradients: A list of gradients.
+            trainable_variables: A list of the corresponding
+                variables.
+
+        """
+        sparse_constrained = [
+            (grad, var) for grad, var in zip(gradients, trainable_variables)
+            if isinstance(grad, tf.IndexedSlices) and
+            var.constraint is not None
+        ]
+
+        # NOTE: The optimizer raises an error when asked to apply a
+        # sparse update to a constrained variable. The constraints are
+        # temporarily detached while the update ops are created and
+        # applied to the touched rows afterwards.
+        constraints = [var.constraint for _, var in sparse_constrained]
+        for _, var in sparse_constrained:
+            var._constraint = None
+        try:
+            self.optimizer.apply_gradients(zip(
+                gradients, trainable_variables)
+            )
+        finally:
+            for (_, var), constraint in zip(sparse_constrained, constraints):
+                var._constraint = constraint
+
+        for grad, var in sparse_constrained:
+            row_idx, _ = tf.unique(grad.indices)
+            rows = var.constraint(tf.gather(var, row_idx))
+            var.scatter_update(tf.IndexedSlices(rows, row_idx))
 
     def test_step(self, data):
         """The logic for one evaluation step.
@@ -322,6 +417,7 @@ class PsychologicalEmbedding(tf.keras.Model):
             'use_group_stimuli': self._use_group['stimuli'],
             'use_group_kernel': self._use_group['kernel'],
             'use_group_behavior': self._use_group['behavior'],
+            'sparse_update': self._sparse_update,
         }
         return config
 
@@ -352,3 +448,40 @@ class PsychologicalEmbedding(tf.keras.Model):
 
         model_config.update(built_layers)
         return cls(**model_config)
+
+
+def _is_rowwise_constrained(var):
+    """Determine if a variable's constraint operates row-wise.
+
+    Args:
+        var: A variable with a constraint.
+
+    Returns:
+        Boolean indicating if the constraint can be applied to each
+        row (i.e., first axis) of the variable independently.
+
+    """
+    # Constraints are only detached from plain resource variables (see
+    # `_apply_gradients`).
+    if not isinstance(var, resource_variable_ops.BaseResourceVariable):
+        return False
+
+    elementwise_constraints = (
+        tf.keras.constraints.NonNeg,
+        psiz.keras.constraints.GreaterEqualThan,
+        psiz.keras.constraints.GreaterThan,
+        psiz.keras.constraints.LessEqualThan,
+        psiz.keras.constraints.LessThan,
+        psiz.keras.constraints.MinMax,
+    )
+    if isinstance(var.constraint, elementwise_constraints):
+        return True
+
+    # Constraints that reduce along an axis (e.g., `NonNegNorm`,
+    # `Center`, `tf.keras.constraints.MaxNorm`) are row-wise if they do
+    # not reduce along the first axis.
+    axis = getattr(var.constraint, 'axis', None)
+    rank = var.shape.rank
+    if isinstance(axis, int) and rank is not None and rank > 1:
+        return (axis % rank) != 0
+    return False
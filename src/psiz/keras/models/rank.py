@@ -36,6 +36,17 @@ class Rank(PsychologicalEmbedding):
 
     Attributes:
         See PsychologicalEmbedding.
+        similarity_cache: An optional `psiz.utils.SimilarityCache`
+            object. If set, query-reference similarities are retrieved
+            from the cache when the model is called eagerly (e.g., by
+            `psiz.agents.RankAgent`). Only models with deterministic
+            `stimuli` and `kernel` layers support a cache, so the
+            posterior samples used by `psiz.trials.ActiveRank` are
+            never cached.
+            The cache is not used during training or when the call is
+            traced by `tf.function` (e.g., `fit` and `predict`). The
+            cache invalidates itself whenever the weights of the
+            `stimuli` or `kernel` layer change.
 
     """
 
@@ -54,6 +65,34 @@ class Rank(PsychologicalEmbedding):
             behavior = psiz.keras.layers.RankBehavior()
         kwargs.update({'behavior': behavior})
         super().__init__(**kwargs)
+        self._similarity_cache = None
+
+    @property
+    def similarity_cache(self):
+        return self._similarity_cache
+
+    @similarity_cache.setter
+    def similarity_cache(self, cache):
+        if cache is not None:
+            if cache.stimuli is not self.stimuli:
+                raise ValueError(
+                    'The `stimuli` layer of the cache must be the `stimuli` '
+                    'layer of the model.'
+                )
+            if cache.kernel is not self.kernel:
+                raise ValueError(
+                    'The `kernel` layer of the cache must be the `kernel` '
+                    'layer of the model.'
+                )
+            if (
+                cache.use_group_stimuli != self._use_group['stimuli'] or
+                cache.use_group_kernel != self._use_group['kernel']
+            ):
+                raise ValueError(
+                    'The group settings of the cache must match the group '
+                    'settings of the model.'
+                )
+        self._similarity_cache = cache
 
     def call(self, inputs):
         """Call.
@@ -79,43 +118,64 @@ class Rank(PsychologicalEmbedding):
         # Define some useful variables before manipulating inputs.
         max_n_reference = tf.shape(stimulus_set)[-2] - 1
 
-        # Repeat `stimulus_set` `n_sample` times in a newly inserted
-        # axis (axis=1).
-        # TensorShape([batch_size, n_sample, n_ref + 1, n_outcome])
-        stimulus_set = psiz.utils.expand_dim_repeat(
-            stimulus_set, self.n_sample, axis=1
-        )
-
-        # Enbed stimuli indices in n-dimensional space:
-        # TensorShape([batch_size, n_sample, n_ref + 1, n_outcome, n_dim])
-        if self._use_group['stimuli']:
-            z = self.stimuli([stimulus_set, groups])
+        # The outcomes of a trial are permutations of the same stimuli,
+        # so the query-reference similarities only need to be computed
+        # for the unpermuted stimulus set (i.e., the first outcome).
+        # TensorShape([batch_size, n_ref + 1])
+        stimulus_set_unique = stimulus_set[:, :, 0]
+
+        # Map the reference positions of every outcome onto the reference
+        # positions of the unpermuted stimulus set.
+        # TensorShape([batch_size, n_ref, n_outcome])
+        outcome_idx = self._outcome_positions(stimulus_set)
+
+        # Compute query-reference similarities.
+        # TensorShape([batch_size, sample_size, n_ref])
+        if self._similarity_cache is not None and tf.executing_eagerly():
+            sim_qr = self._cached_similarity(stimulus_set_unique, groups)
         else:
-            z = self.stimuli(stimulus_set)
-
-        # Split query and reference embeddings:
-        # z_q: TensorShape([batch_size, sample_size, 1, n_outcome, n_dim]
-        # z_r: TensorShape([batch_size, sample_size, n_ref, n_outcome, n_dim]
-        z_q, z_r = tf.split(z, [1, max_n_reference], -3)
-        # The tf.split op does not infer split dimension shape. We know that
-        # z_q will always have shape=1, but we don't know `max_n_reference`
-        # ahead of time.
-        z_q.set_shape([None, None, 1, None, None])
-
-        # Pass through similarity kernel.
+            # Repeat `stimulus_set_unique` `n_sample` times in a newly
+            # inserted axis (axis=1).
+            # TensorShape([batch_size, n_sample, n_ref + 1])
+            stimulus_set_unique = psiz.utils.expand_dim_repeat(
+                stimulus_set_unique, self.n_sample, axis=1
+            )
+
+            # Enbed stimuli indices in n-dimensional space:
+            # TensorShape([batch_size, n_sample, n_ref + 1, n_dim])
+            if self._use_group['stimuli']:
+                z = self.stimuli([stimulus_set_unique, groups])
+            else:
+                z = self.stimuli(stimulus_set_unique)
+
+            # Split query and reference embeddings:
+            # z_q: TensorShape([batch_size, sample_size, 1, n_dim]
+            # z_r: TensorShape([batch_size, sample_size, n_ref, n_dim]
+            z_q, z_r = tf.split(z, [1, max_n_reference], -2)
+            # The tf.split op does not infer split dimension shape. We know
+            # that z_q will always have shape=1, but we don't know
+            # `max_n_reference` ahead of time.
+            z_q.set_shape([None, None, 1, None])
+
+            # Pass through similarity kernel.
+            if self._use_group['kernel']:
+                sim_qr = self.kernel([z_q, z_r, groups])
+            else:
+                sim_qr = self.kernel([z_q, z_r])
+
+        # Gather similarities into outcome order.
         # TensorShape([batch_size, sample_size, n_ref, n_outcome])
-        if self._use_group['kernel']:
-            sim_qr = self.kernel([z_q, z_r, groups])
-        else:
-            sim_qr = self.kernel([z_q, z_r])
+        sim_qr = tf.gather(sim_qr, outcome_idx, axis=2, batch_dims=1)
 
         # Zero out similarities involving placeholder IDs by creating
         # a mask based on reference indices. We drop the query indices
         # because they have effectively been "consumed" by the similarity
         # operation.
+        # TensorShape([batch_size, 1, n_ref, n_outcome])
         is_present = tf.cast(
-            tf.math.not_equal(stimulus_set[:, :, 1:], 0), K.floatx()
+            tf.math.not_equal(stimulus_set[:, 1:], 0), K.floatx()
         )
+        is_present = tf.expand_dims(is_present, axis=1)
         sim_qr = sim_qr * is_present
 
         # Prepare for efficient probability computation by adding
@@ -136,3 +196,59 @@ class Rank(PsychologicalEmbedding):
             probs = self.behavior([sim_qr, is_select, is_outcome])
 
         return probs
+
+    def _cached_similarity(self, stimulus_set, groups):
+        """Return query-reference similarities using the cache.
+
+        Args:
+            stimulus_set: A tensor of stimulus indices.
+                shape=(batch_size, n_max_reference + 1)
+            groups: A tensor of group membership indices.
+                shape=(batch_size, k)
+
+        Returns:
+            sim_qr: The query-reference similarities.
+                shape=(batch_size, n_sample, n_max_reference)
+
+        """
+        batch_size = tf.shape(stimulus_set)[0]
+        max_n_reference = tf.shape(stimulus_set)[1] - 1
+        idx_0 = tf.repeat(stimulus_set[:, 0], max_n_reference)
+        idx_1 = tf.reshape(stimulus_set[:, 1:], [-1])
+        groups = tf.repeat(groups, max_n_reference, axis=0)
+
+        # TensorShape([batch_size * n_ref, n_sample])
+        sim_qr = self._similarity_cache(
+            idx_0, idx_1, groups=groups, n_sample=self.n_sample
+        )
+        sim_qr = tf.reshape(
+            sim_qr, [batch_size, max_n_reference, self.n_sample]
+        )
+        return tf.transpose(sim_qr, perm=[0, 2, 1])
+
+    @staticmethod
+    def _outcome_positions(stimulus_set):
+        """Locate the references of each outcome in the first outcome.
+
+        Args:
+            stimulus_set: A tensor of stimulus indices expanded for
+                all outcomes.
+                shape=(batch_size, n_max_reference + 1, n_outcome)
+
+        Returns:
+            outcome_idx: For each outcome, the position of each
+                reference in the first (unpermuted) outcome. Positions
+                of placeholder references are arbitrary since they are
+                masked by the caller.
+                shape=(batch_size, n_max_reference, n_outcome)
+
+        """
+        # TensorShape([batch_size, n_ref, n_outcome])
+        ref = stimulus_set[:, 1:]
+        # TensorShape([batch_size, 1, 1, n_ref])
+        ref_unique = ref[:, tf.newaxis, tf.newaxis, :, 0]
+        is_match = tf.math.equal(tf.expand_dims(ref, axis=-1), ref_unique)
+        # Select the first match.
+        return tf.math.argmax(
+            tf.cast(is_match, tf.int32), axis=-1, output_type=tf.int32
+        )
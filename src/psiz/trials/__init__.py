@@ -18,14 +18,18 @@
 
 import psiz.trials.information_gain
 from psiz.trials.stack import stack
+from psiz.trials.stack import StackBuilder
+from psiz.trials.subset_view import SubsetView
 from psiz.trials.load_trials import load_trials
 from psiz.trials.sample_qr_sets import sample_qr_sets
+from psiz.trials.sample_qr_sets_batch import sample_qr_sets_batch
 from psiz.trials.similarity.docket_generator import DocketGenerator
 from psiz.trials.similarity.rank.active_rank import ActiveRank
 from psiz.trials.similarity.rank.random_rank import RandomRank
 from psiz.trials.similarity.rank.rank_trials import RankTrials
 from psiz.trials.similarity.rank.rank_docket import RankDocket
 from psiz.trials.similarity.rank.rank_observations import RankObservations
+from psiz.trials.similarity.rank.rank_observation_store import RankObservationStore
 from psiz.trials.similarity.rate.random_rate import RandomRate
 from psiz.trials.similarity.rate.rate_trials import RateTrials
 from psiz.trials.similarity.rate.rate_docket import RateDocket
@@ -41,9 +45,11 @@ from psiz.trials.experimental.outcomes.sparse_categorical import SparseCategoric
 from psiz.trials.experimental.unravel_timestep import unravel_timestep
 
 __all__ = [
-    'stack', 'load_trials', 'sample_qr_sets', 'DocketGenerator', 'ActiveRank',
-    'RandomRank', 'RankTrials', 'RankDocket', 'RankObservations', 'RandomRate',
-    'RateTrials', 'RateDocket', 'RateObservations', 'TrialComponent',
-    'TrialDataset', 'Content', 'RankSimilarity', 'RateSimilarity', 'Outcome',
-    'Continuous', 'SparseCategorical', 'unravel_timestep'
+    'stack', 'StackBuilder', 'SubsetView', 'load_trials', 'sample_qr_sets',
+    'sample_qr_sets_batch', 'DocketGenerator', 'ActiveRank', 'RandomRank',
+    'RankTrials', 'RankDocket', 'RankObservations', 'RankObservationStore',
+    'RandomRate', 'RateTrials', 'RateDocket', 'RateObservations',
+    'TrialComponent', 'TrialDataset', 'Content', 'RankSimilarity',
+    'RateSimilarity', 'Outcome', 'Continuous', 'SparseCategorical',
+    'unravel_timestep'
 ]
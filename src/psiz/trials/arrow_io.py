@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Module of Arrow and Parquet input/output functionality.
+
+Trial-level arrays are stored as columns of an Arrow table. 1D arrays
+are stored as primitive columns and 2D arrays (e.g., `stimulus_set`)
+as fixed-size list columns. Object-level settings (e.g., `mask_zero`)
+are stored as schema metadata.
+
+Functions:
+    table_from_arrays: Create an Arrow table from trial-level arrays.
+    arrays_from_table: Convert an Arrow table to trial-level arrays.
+    trial_filters: Create Parquet filters for selecting trials.
+    write_parquet: Write an Arrow table to a Parquet file.
+    read_parquet: Read (a filtered subset of) a Parquet file.
+
+Notes:
+    Requires the optional dependency `pyarrow`, which can be installed
+    using `pip install psiz[arrow]`.
+
+"""
+
+import numpy as np
+
+
+def _import_pyarrow():
+    """Return the `pyarrow` and `pyarrow.parquet` modules.
+
+    Raises:
+        ImportError: If `pyarrow` is not installed.
+
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Arrow and Parquet support requires the optional dependency "
+            "`pyarrow`. Install it using `pip install psiz[arrow]`."
+        ) from e
+    return pyarrow, pyarrow.parquet
+
+
+def table_from_arrays(arrays, metadata=None):
+    """Create an Arrow table from trial-level arrays.
+
+    Args:
+        arrays: A dictionary of 1D or 2D arrays whose first axis
+            corresponds to trials.
+        metadata (optional): A dictionary of strings that is stored
+            as schema metadata.
+
+    Returns:
+        table: A pyarrow.Table.
+
+    """
+    pa, _ = _import_pyarrow()
+
+    columns = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        if array.ndim == 2:
+            columns[name] = pa.FixedSizeListArray.from_arrays(
+                pa.array(array.reshape(-1)), array.shape[1]
+            )
+        else:
+            columns[name] = pa.array(array)
+    return pa.table(columns, metadata=metadata)
+
+
+def arrays_from_table(table):
+    """Convert an Arrow table to trial-level arrays.
+
+    Conversion is zero-copy whenever the memory layout of a column
+    permits it (e.g., numeric columns of a single chunk). Zero-copy
+    arrays are read-only.
+
+    Args:
+        table: A pyarrow.Table created by `table_from_arrays`.
+
+    Returns:
+        arrays: A dictionary of 1D and 2D arrays.
+        metadata: A dictionary of the string-valued schema metadata.
+
+    """
+    pa, _ = _import_pyarrow()
+
+    arrays = {}
+    for name in table.column_names:
+        column = table.column(name)
+        if pa.types.is_list(column.type) or (
+            pa.types.is_fixed_size_list(column.type)
+        ):
+            # NOTE: A fixed-size list column may be read back from
+            # Parquet as a variable-size list column.
+            column = column.combine_chunks()
+            values = column.flatten().to_numpy(zero_copy_only=False)
+            arrays[name] = values.reshape([len(column), -1])
+        else:
+            arrays[name] = column.to_numpy()
+
+    metadata = {}
+    if table.schema.metadata is not None:
+        metadata = {
+            key.decode(): value.decode()
+            for key, value in table.schema.metadata.items()
+        }
+    return arrays, metadata
+
+
+def trial_filters(agent_id=None, session_id=None, groups=None):
+    """Create Parquet filters for selecting trials.
+
+    Args:
+        agent_id (optional): An array-like of agent IDs to select.
+        session_id (optional): An array-like of session IDs to select.
+        groups (optional): A dictionary mapping a column of `groups`
+            to an array-like of group IDs to select. For example,
+            `{0: [1, 2]}` selects trials whose first `groups` column
+            is either 1 or 2.
+
+    Returns:
+        filters: A list of conjunctive filters (see
+            `pyarrow.parquet.read_table`) or `None` if no filter was
+            requested.
+
+    """
+    filters = []
+    if agent_id is not None:
+        filters.append(('agent_id', 'in', np.ravel(agent_id).tolist()))
+    if session_id is not None:
+        filters.append(('session_id', 'in', np.ravel(session_id).tolist()))
+    if groups is not None:
+        for i_col, group_id in groups.items():
+            filters.append((
+                'groups_{0}'.format(i_col), 'in',
+                np.ravel(group_id).tolist()
+            ))
+    if len(filters) == 0:
+        return None
+    return filters
+
+
+def write_parquet(filepath, table, compression='snappy', row_group_size=None):
+    """Write an Arrow table to a Parquet file.
+
+    Args:
+        filepath: String specifying the path to save the data.
+        table: A pyarrow.Table.
+        compression (optional): The Parquet compression codec.
+        row_group_size (optional): The maximum number of trials per
+            row group. Smaller row groups allow filters to skip more
+            data, at the cost of a larger file.
+
+    """
+    _, pq = _import_pyarrow()
+    pq.write_table(
+        table, filepath, compression=compression,
+        row_group_size=row_group_size
+    )
+
+
+def read_parquet(filepath, filters=None):
+    """Read (a filtered subset of) a Parquet file.
+
+    Filters are pushed down to the Parquet reader, so row groups whose
+    statistics exclude the filters are not read.
+
+    Args:
+        filepath: The location of the Parquet file.
+        filters (optional): Filters, see `trial_filters`.
+
+    Returns:
+        table: A pyarrow.Table.
+
+    Raises:
+        ValueError: If no trials satisfy the filters.
+
+    """
+    _, pq = _import_pyarrow()
+    table = pq.read_table(filepath, filters=filters)
+    if table.num_rows == 0:
+        raise ValueError('No trials satisfy the requested filters.')
+    return table
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Module of core `trials` functionality.
+
+Functions:
+    compact_int: Cast an integer array to its narrowest dtype.
+
+"""
+
+import numpy as np
+
+
+def compact_int(array):
+    """Cast an integer array to the narrowest dtype holding its values.
+
+    Args:
+        array: An integer array.
+
+    Returns:
+        array: The array cast to the narrowest (unsigned if possible)
+            integer dtype that represents all of its values. The array
+            is not copied if it already has this dtype.
+
+    """
+    array = np.asarray(array)
+    if array.size == 0:
+        return array.astype(np.uint8)
+    min_value = int(array.min())
+    max_value = int(array.max())
+    if min_value < 0:
+        # Represent the maximum as a negative value to obtain a signed
+        # dtype of the same width.
+        max_value = -max_value - 1
+    dtype = np.result_type(
+        np.min_scalar_type(min_value), np.min_scalar_type(max_value)
+    )
+    return array.astype(dtype, copy=False)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Module of core `trials` functionality.
+
+Functions:
+    concatenate_padded: Concatenate arrays that differ in shape.
+
+"""
+
+import numpy as np
+
+
+def concatenate_padded(array_list, fill_value=0):
+    """Concatenate arrays along the first axis.
+
+    All other axes are padded (at the end) with `fill_value` to match
+    the largest array. The shape of the output is determined up front
+    so that the output is allocated once and each array is copied
+    exactly once.
+
+    Args:
+        array_list: A list of arrays with the same number of
+            dimensions.
+        fill_value (optional): The value used for padding.
+
+    Returns:
+        concatenated: An array with the result dtype of `array_list`.
+            shape=(sum(n_i), max(d_1), ..., max(d_k))
+
+    Raises:
+        ValueError: If the arrays differ in their number of dimensions.
+
+    """
+    ndim = array_list[0].ndim
+    for array in array_list[1:]:
+        if array.ndim != ndim:
+            raise ValueError(
+                'All arrays must have the same number of dimensions.'
+            )
+
+    shape = [sum(array.shape[0] for array in array_list)]
+    for axis in range(1, ndim):
+        shape.append(max(array.shape[axis] for array in array_list))
+
+    concatenated = np.full(
+        shape, fill_value, dtype=np.result_type(*array_list)
+    )
+    start = 0
+    for array in array_list:
+        stop = start + array.shape[0]
+        loc = (slice(start, stop),) + tuple(
+            slice(0, n) for n in array.shape[1:]
+        )
+        concatenated[loc] = array
+        start = stop
+    return concatenated
@@ -27,8 +27,10 @@ from itertools import permutations
 import numpy as np
 import tensorflow as tf
 
+from psiz.trials.concatenate_padded import concatenate_padded
 from psiz.trials.experimental.contents.content import Content
 from psiz.trials.experimental.unravel_timestep import unravel_timestep
+from psiz.trials.hdf5_io import read_hdf5_dataset
 
 
 class RankSimilarity(Content):
@@ -127,52 +129,14 @@ class RankSimilarity(Content):
             A new object.
 
         """
-        # Determine maximum number of references and maximum number of
-        # timesteps.
-        max_n_reference = 0
-        max_timestep = 0
-        for i_component in component_list:
-            if i_component.max_n_reference > max_n_reference:
-                max_n_reference = i_component.max_n_reference
-            if i_component.max_timestep > max_timestep:
-                max_timestep = i_component.max_timestep
-
-        # Start by padding first entry in list.
-        timestep_pad = max_timestep - component_list[0].max_timestep
-        n_pad = max_n_reference - component_list[0].max_n_reference
-        pad_width = ((0, 0), (0, timestep_pad), (0, n_pad))
-        stimulus_set = np.pad(
-            component_list[0].stimulus_set,
-            pad_width, mode='constant', constant_values=0
+        # Pad timesteps and references.
+        stimulus_set = concatenate_padded(
+            [i_component.stimulus_set for i_component in component_list]
         )
-        pad_width = ((0, 0), (0, timestep_pad))
-        n_select = np.pad(
-            component_list[0].n_select,
-            pad_width, mode='constant', constant_values=0
+        n_select = concatenate_padded(
+            [i_component.n_select for i_component in component_list]
         )
 
-        # Loop over remaining list.
-        for i_component in component_list[1:]:
-
-            timestep_pad = max_timestep - i_component.max_timestep
-            n_pad = max_n_reference - i_component.max_n_reference
-            pad_width = ((0, 0), (0, timestep_pad), (0, n_pad))
-            curr_stimulus_set = np.pad(
-                i_component.stimulus_set,
-                pad_width, mode='constant', constant_values=0
-            )
-
-            pad_width = ((0, 0), (0, timestep_pad))
-            curr_n_select = np.pad(
-                i_component.n_select,
-                pad_width, mode='constant', constant_values=0
-            )
-
-            stimulus_set = np.concatenate(
-                (stimulus_set, curr_stimulus_set), axis=0
-            )
-            n_select = np.concatenate((n_select, curr_n_select), axis=0)
-
         return RankSimilarity(stimulus_set, n_select=n_select)
 
     def subset(self, idx):
@@ -485,19 +449,78 @@ class RankSimilarity(Content):
         grp.create_dataset("class_name", data="RankSimilarity")
         grp.create_dataset("stimulus_set", data=self.stimulus_set)
         grp.create_dataset("n_select", data=self.n_select)
+        grp.create_dataset("max_outcome", data=self.max_outcome)
         return None
 
     @classmethod
-    def load(cls, grp):
+    def load(cls, grp, index=None):
         """Retrieve relevant datasets from group.
 
         Args:
             grp: H5 group from which to load data.
+            index (optional): The indices of the sequences to load. By
+                default, all sequences are loaded.
 
         """
-        stimulus_set = grp['stimulus_set'][()]
-        n_select = grp['n_select'][()]
-        return cls(stimulus_set, n_select=n_select)
+        stimulus_set = read_hdf5_dataset(grp, 'stimulus_set', index=index)
+        n_select = read_hdf5_dataset(grp, 'n_select', index=index)
+        content = cls(stimulus_set, n_select=n_select)
+        if index is not None:
+            # Keep the timesteps and references of the file, so that a
+            # subset agrees with the other (untrimmed) data of a file.
+            content._pad(stimulus_set.shape[1], stimulus_set.shape[2] - 1)
+        return content
+
+    @classmethod
+    def load_element_shape(cls, grp):
+        """Return the shape of an exported sequence stored in a group.
+
+        Args:
+            grp: H5 group from which to load metadata.
+
+        Returns:
+            A dictionary of tf.TensorShape objects.
+
+        """
+        (max_timestep, n_column) = grp['stimulus_set'].shape[1:]
+        if 'max_outcome' in grp:
+            max_outcome = int(grp['max_outcome'][()])
+        else:
+            # Files saved by earlier versions do not store the number
+            # of outcomes, so it is bounded using the maximum number of
+            # references and selections.
+            max_n_select = int(np.max(grp['n_select'][()]))
+            max_outcome = cls._possible_outcomes(
+                n_column - 1, max_n_select
+            ).shape[0]
+        return {
+            'stimulus_set': tf.TensorShape(
+                [max_timestep, n_column, max_outcome]
+            ),
+            'is_select': tf.TensorShape([max_timestep, n_column, 1]),
+        }
+
+    def _pad(self, max_timestep, max_n_reference):
+        """Pad timesteps and references with placeholders.
+
+        Args:
+            max_timestep: The padded number of timesteps.
+            max_n_reference: The padded number of references.
+
+        """
+        pad_timestep = max_timestep - self.max_timestep
+        pad_reference = max_n_reference - self.max_n_reference
+        self.stimulus_set = np.pad(
+            self.stimulus_set,
+            [(0, 0), (0, pad_timestep), (0, pad_reference)],
+            constant_values=self.mask_value
+        )
+        self.n_select = np.pad(self.n_select, [(0, 0), (0, pad_timestep)])
+        self.n_reference = np.pad(
+            self.n_reference, [(0, 0), (0, pad_timestep)]
+        )
+        self.max_timestep = max_timestep
+        self.max_n_reference = max_n_reference
 
     @staticmethod
     def _possible_outcomes(n_reference, n_select):
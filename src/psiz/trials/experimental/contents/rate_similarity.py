@@ -25,8 +25,10 @@ Classes:
 import numpy as np
 import tensorflow as tf
 
+from psiz.trials.concatenate_padded import concatenate_padded
 from psiz.trials.experimental.contents.content import Content
 from psiz.trials.experimental.unravel_timestep import unravel_timestep
+from psiz.trials.hdf5_io import read_hdf5_dataset
 
 
 class RateSimilarity(Content):
@@ -83,34 +85,11 @@ class RateSimilarity(Content):
             A new object.
 
         """
-        # Determine maximum number of timesteps.
-        max_timestep = 0
-        for i_component in component_list:
-            if i_component.max_timestep > max_timestep:
-                max_timestep = i_component.max_timestep
-
-        # Start by padding first entry in list.
-        timestep_pad = max_timestep - component_list[0].max_timestep
-        pad_width = ((0, 0), (0, timestep_pad), (0, 0))
-        stimulus_set = np.pad(
-            component_list[0].stimulus_set,
-            pad_width, mode='constant', constant_values=0
+        # Pad timesteps.
+        stimulus_set = concatenate_padded(
+            [i_component.stimulus_set for i_component in component_list]
         )
 
-        # Loop over remaining list.
-        for i_component in component_list[1:]:
-
-            timestep_pad = max_timestep - i_component.max_timestep
-            pad_width = ((0, 0), (0, timestep_pad), (0, 0))
-            curr_stimulus_set = np.pad(
-                i_component.stimulus_set,
-                pad_width, mode='constant', constant_values=0
-            )
-
-            stimulus_set = np.concatenate(
-                (stimulus_set, curr_stimulus_set), axis=0
-            )
-
         return RateSimilarity(stimulus_set)
 
     def subset(self, idx):
@@ -222,12 +201,48 @@ class RateSimilarity(Content):
         return None
 
     @classmethod
-    def load(cls, grp):
+    def load(cls, grp, index=None):
         """Retrieve relevant datasets from group.
 
         Args:
             grp: H5 group from which to load data.
+            index (optional): The indices of the sequences to load. By
+                default, all sequences are loaded.
+
+        """
+        stimulus_set = read_hdf5_dataset(grp, "stimulus_set", index=index)
+        content = cls(stimulus_set)
+        if index is not None:
+            # Keep the timesteps of the file, so that a subset agrees
+            # with the other (untrimmed) data of a file.
+            content._pad(stimulus_set.shape[1])
+        return content
+
+    @classmethod
+    def load_element_shape(cls, grp):
+        """Return the shape of an exported sequence stored in a group.
+
+        Args:
+            grp: H5 group from which to load metadata.
+
+        Returns:
+            A dictionary of tf.TensorShape objects.
+
+        """
+        return {
+            'stimulus_set': tf.TensorShape(grp['stimulus_set'].shape[1:])
+        }
+
+    def _pad(self, max_timestep):
+        """Pad timesteps with placeholders.
+
+        Args:
+            max_timestep: The padded number of timesteps.
 
         """
-        stimulus_set = grp["stimulus_set"][()]
-        return cls(stimulus_set)
+        self.stimulus_set = np.pad(
+            self.stimulus_set,
+            [(0, 0), (0, max_timestep - self.max_timestep), (0, 0)],
+            constant_values=self.mask_value
+        )
+        self.max_timestep = max_timestep
@@ -24,8 +24,10 @@ import numpy as np
 import tensorflow as tf
 from tensorflow.keras import backend as K
 
+from psiz.trials.concatenate_padded import concatenate_padded
 from psiz.trials.experimental.outcomes.outcome import Outcome
 from psiz.trials.experimental.unravel_timestep import unravel_timestep
+from psiz.trials.hdf5_io import read_hdf5_dataset
 
 
 class Continuous(Outcome):
@@ -74,33 +76,11 @@ class Continuous(Outcome):
                     'identical to stack `Continous` output.'
                 )
 
-        # Determine maximum number of timesteps.
-        max_timestep = 0
-        for i_component in component_list:
-            if i_component.max_timestep > max_timestep:
-                max_timestep = i_component.max_timestep
-
-        # Start by padding first entry in list.
-        timestep_pad = max_timestep - component_list[0].max_timestep
-        pad_width = ((0, 0), (0, timestep_pad), (0, 0))
-        value = np.pad(
-            component_list[0].value,
-            pad_width, mode='constant', constant_values=0
+        # Pad timesteps.
+        value = concatenate_padded(
+            [i_component.value for i_component in component_list]
         )
 
-        # Loop over remaining list.
-        for i_component in component_list[1:]:
-            timestep_pad = max_timestep - i_component.max_timestep
-            pad_width = ((0, 0), (0, timestep_pad), (0, 0))
-            curr_value = np.pad(
-                i_component.value,
-                pad_width, mode='constant', constant_values=0
-            )
-
-            value = np.concatenate(
-                (value, curr_value), axis=0
-            )
-
         return Continuous(value)
 
     def subset(self, idx):
@@ -168,12 +148,27 @@ class Continuous(Outcome):
         return None
 
     @classmethod
-    def load(cls, grp):
+    def load(cls, grp, index=None):
         """Retrieve relevant datasets from group.
 
         Args:
             grp: H5 group from which to load data.
+            index (optional): The indices of the sequences to load. By
+                default, all sequences are loaded.
 
         """
-        value = grp["value"][()]
+        value = read_hdf5_dataset(grp, "value", index=index)
         return cls(value)
+
+    @classmethod
+    def load_element_shape(cls, grp):
+        """Return the shape of an exported sequence stored in a group.
+
+        Args:
+            grp: H5 group from which to load metadata.
+
+        Returns:
+            A tf.TensorShape object.
+
+        """
+        return tf.TensorShape(grp["value"].shape[1:])
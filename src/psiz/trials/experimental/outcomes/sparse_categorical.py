@@ -24,8 +24,10 @@ import numpy as np
 import tensorflow as tf
 from tensorflow.keras import backend as K
 
+from psiz.trials.concatenate_padded import concatenate_padded
 from psiz.trials.experimental.outcomes.outcome import Outcome
 from psiz.trials.experimental.unravel_timestep import unravel_timestep
+from psiz.trials.hdf5_io import read_hdf5_dataset
 
 
 class SparseCategorical(Outcome):
@@ -62,36 +64,12 @@ class SparseCategorical(Outcome):
             A new object.
 
         """
-        # Determine maximum number of timesteps.
-        max_timestep = 0
-        max_depth = 0
-        for i_component in component_list:
-            if i_component.max_timestep > max_timestep:
-                max_timestep = i_component.max_timestep
-            if i_component.depth > max_depth:
-                max_depth = i_component.depth
-
-        # Start by padding first entry in list.
-        timestep_pad = max_timestep - component_list[0].max_timestep
-        pad_width = ((0, 0), (0, timestep_pad))
-        index = np.pad(
-            component_list[0].index,
-            pad_width, mode='constant', constant_values=0
-        )
-
-        # Loop over remaining list.
-        for i_component in component_list[1:]:
-
-            timestep_pad = max_timestep - i_component.max_timestep
-            pad_width = ((0, 0), (0, timestep_pad))
-            curr_index = np.pad(
-                i_component.index,
-                pad_width, mode='constant', constant_values=0
-            )
+        max_depth = max(i_component.depth for i_component in component_list)
 
-            index = np.concatenate(
-                (index, curr_index), axis=0
-            )
+        # Pad timesteps.
+        index = concatenate_padded(
+            [i_component.index for i_component in component_list]
+        )
 
         return SparseCategorical(index, depth=max_depth)
 
@@ -180,13 +158,29 @@ class SparseCategorical(Outcome):
         return None
 
     @classmethod
-    def load(cls, grp):
+    def load(cls, grp, index=None):
         """Retrieve relevant datasets from group.
 
         Args:
             grp: H5 group from which to load data.
+            index (optional): The indices of the sequences to load. By
+                default, all sequences are loaded.
 
         """
-        index = grp["index"][()]
         depth = grp["depth"][()]
+        index = read_hdf5_dataset(grp, "index", index=index)
         return cls(index, depth=depth)
+
+    @classmethod
+    def load_element_shape(cls, grp):
+        """Return the shape of an exported sequence stored in a group.
+
+        Args:
+            grp: H5 group from which to load metadata.
+
+        Returns:
+            A tf.TensorShape object.
+
+        """
+        max_timestep = grp["index"].shape[1]
+        return tf.TensorShape([max_timestep, int(grp["depth"][()])])
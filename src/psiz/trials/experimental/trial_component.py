@@ -84,10 +84,30 @@ class TrialComponent(metaclass=ABCMeta):
         """
 
     @abstractmethod
-    def load(self, grp):
+    def load(self, grp, index=None):
         """Retrieve relevant datasets from group.
 
         Args:
             grp: H5 group from which to load data.
+            index (optional): The indices of the sequences to load. By
+                default, all sequences are loaded.
 
         """
+
+    @classmethod
+    def load_element_shape(cls, grp):
+        """Return the shape of an exported sequence stored in a group.
+
+        The shape is determined using the metadata of the group
+        without loading the data.
+
+        Args:
+            grp: H5 group from which to load metadata.
+
+        Returns:
+            A (nested) structure matching the output of `export` (with
+            `timestep=True`), where each tensor is replaced by the
+            tf.TensorShape of a single sequence.
+
+        """
+        raise NotImplementedError
@@ -20,17 +20,22 @@ Classes:
 
 """
 
+import copy
 import h5py
 from importlib.metadata import version
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras import backend as K
 
+from psiz.trials.concatenate_padded import concatenate_padded
 from psiz.trials.experimental.contents.rank_similarity import RankSimilarity
 from psiz.trials.experimental.contents.rate_similarity import RateSimilarity
 from psiz.trials.experimental.outcomes.continuous import Continuous
 from psiz.trials.experimental.outcomes.sparse_categorical import SparseCategorical
 from psiz.trials.experimental.unravel_timestep import unravel_timestep
+from psiz.trials.hdf5_io import read_hdf5_dataset
+from psiz.trials.stream_blocks import stream_blocks
+from psiz.trials.subset_view import SubsetView
 
 
 class TrialDataset(object):
@@ -95,41 +100,50 @@ class TrialDataset(object):
 
         """
         if export_format == 'tf':
-            # Assemble model input.
-            x = self.content.export(
-                export_format=export_format, timestep=timestep
+            ds = tf.data.Dataset.from_tensor_slices(
+                self._export_tensors(input_only=input_only, timestep=timestep)
             )
-            groups = self.groups
-            if timestep is False:
-                groups = unravel_timestep(groups)
-            x.update({
-                'groups': tf.constant(groups, dtype=tf.int32)
-            })
-
-            if not input_only:
-                # Assemble model output
-                if self.outcome is not None:
-                    y = self.outcome.export(
-                        export_format=export_format, timestep=timestep
-                    )
-                else:
-                    raise ValueError("No outcome has been specified.")
-
-                # Assemble weights.
-                w = self.weight
-                if timestep is False:
-                    w = unravel_timestep(w)
-                w = tf.constant(w, dtype=K.floatx())
-
-                ds = tf.data.Dataset.from_tensor_slices((x, y, w))
-            else:
-                ds = tf.data.Dataset.from_tensor_slices((x))
         else:
             raise ValueError(
                 "Unrecognized `export_format` '{0}'.".format(export_format)
             )
         return ds
 
+    def _export_tensors(self, input_only=False, timestep=True):
+        """Return the data of `export` as tensors.
+
+        See `export` for details.
+
+        Returns:
+            x or (x, y, w): The model inputs and (if `input_only` is
+                `False`) the model outputs and weights.
+
+        """
+        # Assemble model input.
+        x = self.content.export(export_format='tf', timestep=timestep)
+        groups = self.groups
+        if timestep is False:
+            groups = unravel_timestep(groups)
+        x.update({
+            'groups': tf.constant(groups, dtype=tf.int32)
+        })
+
+        if input_only:
+            return x
+
+        # Assemble model output
+        if self.outcome is not None:
+            y = self.outcome.export(export_format='tf', timestep=timestep)
+        else:
+            raise ValueError("No outcome has been specified.")
+
+        # Assemble weights.
+        w = self.weight
+        if timestep is False:
+            w = unravel_timestep(w)
+        w = tf.constant(w, dtype=K.floatx())
+        return x, y, w
+
     @property
     def is_actual(self):
         """Return 2D Boolean array indicating trials with actual content.
@@ -142,24 +156,88 @@ class TrialDataset(object):
         return self.content.is_actual
 
     @classmethod
-    def load(cls, filepath):
+    def load(cls, filepath, index=None):
         """Load trials.
 
         Args:
             filepath: The location of the hdf5 file to load.
+            index (optional): The indices of the sequences to load. By
+                default, all sequences are loaded.
 
         """
         f = h5py.File(filepath, "r")
-        content = cls._load_h5_group(f['content'])
-        groups = f["groups"][()]
-        outcome = cls._load_h5_group(f['outcome'])
-        weight = f["weight"][()]
+        content = cls._load_h5_group(f['content'], index=index)
+        groups = read_hdf5_dataset(f, "groups", index=index)
+        outcome = cls._load_h5_group(f['outcome'], index=index)
+        weight = read_hdf5_dataset(f, "weight", index=index)
 
         trials = TrialDataset(
             content, groups=groups, outcome=outcome, weight=weight,
         )
         return trials
 
+    @classmethod
+    def stream_dataset(
+            cls, filepath, input_only=False, timestep=True, block_size=None,
+            shuffle_buffer_size=None, seed=None):
+        """Return a dataset that streams trials from a file.
+
+        Blocks of sequences are read from an HDF5 file (created with
+        `save`) on demand, so the file does not need to fit in memory.
+        Without shuffling, the elements are identical to those of
+        `export`.
+
+        Args:
+            filepath: The location of the hdf5 file.
+            input_only (optional): See `export`.
+            timestep (optional): See `export`.
+            block_size (optional): The number of sequences that are
+                read at once.
+            shuffle_buffer_size (optional): If provided, the order of
+                the blocks is shuffled and elements are shuffled using
+                a buffer of this size.
+            seed (optional): The random seed used for shuffling.
+
+        Returns:
+            ds: A tf.data.Dataset object.
+
+        Raises:
+            ValueError: If `input_only` is `False` and the file does
+                not contain an outcome.
+
+        """
+        # The shape of an element is determined by the whole file, since
+        # the blocks of a file may have a different number of outcomes.
+        f = h5py.File(filepath, "r")
+        n_sequence = f["weight"].shape[0]
+        x_shape = cls._load_h5_group_element_shape(f['content'])
+        x_shape['groups'] = tf.TensorShape(f["groups"].shape[1:])
+        y_shape = cls._load_h5_group_element_shape(f['outcome'])
+        w_shape = tf.TensorShape(f["weight"].shape[1:])
+        f.close()
+        if input_only:
+            element_shape = x_shape
+        elif y_shape is None:
+            raise ValueError("No outcome has been specified.")
+        else:
+            element_shape = (x_shape, y_shape, w_shape)
+        if timestep is False:
+            element_shape = tf.nest.map_structure(
+                lambda shape: shape[1:], element_shape
+            )
+
+        def load_fn(index):
+            trials = cls.load(filepath, index=index)
+            return trials._export_tensors(
+                input_only=input_only, timestep=timestep
+            )
+
+        return stream_blocks(
+            load_fn, n_sequence, block_size=block_size,
+            shuffle_buffer_size=shuffle_buffer_size, seed=seed,
+            element_shape=element_shape
+        )
+
     def save(self, filepath):
         """Save the TrialDataset object as an HDF5 file.
 
@@ -216,27 +294,42 @@ class TrialDataset(object):
         return stacked
 
     def subset(self, idx):
-        """Return subset of trials as a new RankObservations object.
+        """Return subset of sequences as a new TrialDataset object.
+
+        Since the sequences of a subset are already valid, the subset
+        is not re-validated.
 
         Args:
             idx: The indices corresponding to the subset.
 
         Returns:
-            A new RankObservations object.
+            A new TrialDataset object.
 
         """
-        content_sub = self.content.subset(idx)
-
-        outcome_sub = None
+        trials = copy.copy(self)
+        trials.content = self.content.subset(idx)
         if self.outcome is not None:
-            outcome_sub = self.outcome.subset(idx)
+            trials.outcome = self.outcome.subset(idx)
+        trials.n_sequence = trials.content.n_sequence
+        trials.max_timestep = trials.content.max_timestep
+        trials.groups = self.groups[idx, 0:trials.max_timestep]
+        trials.weight = self.weight[idx, 0:trials.max_timestep]
+        return trials
 
-        return TrialDataset(
-            content_sub,
-            groups=self.groups[idx],
-            outcome=outcome_sub,
-            weight=self.weight[idx]
-        )
+    def view(self, idx):
+        """Return a lazy subset of sequences.
+
+        Unlike `subset`, no data is copied until the view is used, see
+        `psiz.trials.SubsetView`.
+
+        Args:
+            idx: The indices corresponding to the subset.
+
+        Returns:
+            A SubsetView object.
+
+        """
+        return SubsetView(self, idx)
 
     def _check_weight(self, weight):
         """Check the validity of `weight`."""
@@ -316,7 +409,8 @@ class TrialDataset(object):
             )
 
     @staticmethod
-    def _load_h5_group(grp):
+    def _h5_group_class(grp):
+        """Return the TrialComponent class stored in a group."""
         # NOTE: Encoding/read rules changed in h5py 3.0, requiring asstr()
         # call. The `setup.cfg` file notes this minimum version requirement.
         class_name = grp["class_name"].asstr()[()]
@@ -330,11 +424,23 @@ class TrialDataset(object):
             return None
         else:
             if class_name in custom_objects:
-                group_class = custom_objects[class_name]
+                return custom_objects[class_name]
             else:
                 raise NotImplementedError
 
-            return group_class.load(grp)
+    @classmethod
+    def _load_h5_group(cls, grp, index=None):
+        group_class = cls._h5_group_class(grp)
+        if group_class is None:
+            return None
+        return group_class.load(grp, index=index)
+
+    @classmethod
+    def _load_h5_group_element_shape(cls, grp):
+        group_class = cls._h5_group_class(grp)
+        if group_class is None:
+            return None
+        return group_class.load_element_shape(grp)
 
     def _stack_groups(self, trials_list, max_timestep):
         """Stack `groups` data."""
@@ -351,50 +457,14 @@ class TrialDataset(object):
                     'must be identical on axis=2.'
                 )
 
-        # Start by padding first entry in list.
-        timestep_pad = max_timestep - trials_list[0].max_timestep
-        pad_width = ((0, 0), (0, timestep_pad), (0, 0))
-        groups = np.pad(
-            trials_list[0].groups,
-            pad_width, mode='constant', constant_values=0
+        # Pad timesteps.
+        return concatenate_padded(
+            [i_trials.groups for i_trials in trials_list]
         )
 
-        # Loop over remaining list.
-        for i_trials in trials_list[1:]:
-            timestep_pad = max_timestep - i_trials.max_timestep
-            pad_width = ((0, 0), (0, timestep_pad), (0, 0))
-            curr_groups = np.pad(
-                i_trials.groups,
-                pad_width, mode='constant', constant_values=0
-            )
-
-            groups = np.concatenate(
-                (groups, curr_groups), axis=0
-            )
-
-        return groups
-
     def _stack_weight(self, trials_list, max_timestep):
         """Stack `weight` data."""
-        # Start by padding first entry in list.
-        timestep_pad = max_timestep - trials_list[0].max_timestep
-        pad_width = ((0, 0), (0, timestep_pad))
-        weight = np.pad(
-            trials_list[0].weight,
-            pad_width, mode='constant', constant_values=0
+        # Pad timesteps.
+        return concatenate_padded(
+            [i_trials.weight for i_trials in trials_list]
         )
-
-        # Loop over remaining list.
-        for i_trials in trials_list[1:]:
-            timestep_pad = max_timestep - i_trials.max_timestep
-            pad_width = ((0, 0), (0, timestep_pad))
-            curr_groups = np.pad(
-                i_trials.weight,
-                pad_width, mode='constant', constant_values=0
-            )
-
-            weight = np.concatenate(
-                (weight, curr_groups), axis=0
-            )
-
-        return weight
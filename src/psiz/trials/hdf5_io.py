@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Module of HDF5 input/output functionality.
+
+Functions:
+    create_hdf5_dataset: Create a (possibly chunked) trial-level
+        HDF5 dataset.
+    read_hdf5_dataset: Read (a subset of) a trial-level HDF5 dataset.
+
+"""
+
+import numpy as np
+
+# Default number of trials per chunk of chunked HDF5 datasets.
+HDF5_CHUNK_SIZE = 65536
+
+
+def create_hdf5_dataset(
+        f, name, data, chunk_size=None, compression=None):
+    """Create a trial-level HDF5 dataset.
+
+    Args:
+        f: An open h5py.File or h5py.Group.
+        name: The name of the dataset.
+        data: An array whose first axis corresponds to trials.
+        chunk_size (optional): The number of trials per chunk. If
+            neither `chunk_size` nor `compression` is provided, the
+            dataset is stored contiguously, which allows it to be
+            memory-mapped when loading.
+        compression (optional): A compression filter supported by
+            h5py (e.g., 'gzip' or 'lzf'). Implies chunked storage.
+
+    """
+    data = np.asarray(data)
+    if chunk_size is None and compression is None:
+        return f.create_dataset(name, data=data)
+    if chunk_size is None:
+        chunk_size = HDF5_CHUNK_SIZE
+    chunk_size = int(np.maximum(1, np.minimum(chunk_size, len(data))))
+    return f.create_dataset(
+        name, data=data, chunks=(chunk_size,) + data.shape[1:],
+        compression=compression
+    )
+
+
+def read_hdf5_dataset(f, name, index=None, mmap_mode=None):
+    """Read a trial-level HDF5 dataset.
+
+    Args:
+        f: An open h5py.File or h5py.Group.
+        name: The name of the dataset.
+        index (optional): The trials to read. Only the chunks
+            containing the requested trials are read from disk.
+        mmap_mode (optional): If provided and the dataset is stored
+            contiguously without compression, the dataset is
+            returned as a `numpy.memmap` opened with this mode
+            (see `numpy.memmap`). Otherwise the dataset is read
+            into memory. Only the read-only mode 'r' and the
+            copy-on-write mode 'c' are supported, since the file is
+            still held open by h5py.
+
+    Returns:
+        data: An array.
+
+    Raises:
+        ValueError: If `mmap_mode` is not None, 'r', or 'c'.
+
+    """
+    if mmap_mode not in (None, 'r', 'c'):
+        raise ValueError(
+            "The argument `mmap_mode` must be None, 'r', or 'c'."
+        )
+    dset = f[name]
+    if mmap_mode is not None:
+        offset = dset.id.get_offset()
+        if (
+            dset.chunks is None and offset is not None and
+            dset.dtype.kind in 'iuf'
+        ):
+            data = np.memmap(
+                dset.file.filename, mode=mmap_mode, dtype=dset.dtype,
+                shape=dset.shape, offset=offset
+            )
+            if index is not None:
+                data = data[index]
+            return data
+
+    if index is None:
+        return dset[()]
+
+    index = np.asarray(index)
+    if index.dtype == bool:
+        index = np.flatnonzero(index)
+    index_unique, inverse = np.unique(index, return_inverse=True)
+
+    # Read one block of rows at a time, skipping blocks that do not
+    # contain requested rows.
+    if dset.chunks is None:
+        block_size = HDF5_CHUNK_SIZE
+    else:
+        block_size = dset.chunks[0]
+    block = index_unique // block_size
+    block_start = np.flatnonzero(np.diff(block, prepend=-1))
+    block_stop = np.append(block_start[1:], len(index_unique))
+    data = np.empty(
+        (len(index_unique),) + dset.shape[1:], dtype=dset.dtype
+    )
+    for start, stop in zip(block_start, block_stop):
+        row_start = block[start] * block_size
+        rows = dset[row_start:row_start + block_size]
+        data[start:stop] = rows[index_unique[start:stop] - row_start]
+    return data[inverse.reshape(-1)]
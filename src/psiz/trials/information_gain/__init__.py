@@ -17,6 +17,11 @@
 
 
 from psiz.trials.information_gain.ig_categorical import ig_categorical
+from psiz.trials.information_gain.ig_categorical_greedy import ig_categorical_greedy
 from psiz.trials.information_gain.ig_model_categorical import ig_model_categorical
+from psiz.trials.information_gain.predict_ensemble import predict_ensemble
 
-__all__ = ['ig_categorical', 'ig_model_categorical']
+__all__ = [
+    'ig_categorical', 'ig_categorical_greedy', 'ig_model_categorical',
+    'predict_ensemble'
+]
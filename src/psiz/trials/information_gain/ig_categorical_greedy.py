@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Information gain.
+
+Functions:
+    ig_categorical_greedy: Greedily select a batch of categorical
+        outcome trials that are jointly informative.
+
+"""
+
+import numpy as np
+
+
+def ig_categorical_greedy(y_pred, n_trial, epsilon=1e-7):
+    """Greedily select trials that are jointly informative.
+
+    Selecting the trials with the highest expected information gain
+    independently tends to select near-duplicate trials, since trials
+    that resolve the same uncertainty all score highly. This function
+    approximates the joint information gain of a batch by greedy
+    selection with posterior-sample reweighting: After selecting a
+    trial, the weight of each posterior sample is multiplied by the
+    likelihood of the most probable outcome of that trial, and the
+    expected information gain of the remaining candidates is
+    recomputed under the reweighted samples. Candidates that are
+    redundant with already selected trials lose most of their
+    information gain.
+
+    The first selected trial is the trial with the highest expected
+    information gain (see `ig_categorical`). Each greedy step costs
+    about as much as scoring all candidates once.
+
+    Args:
+        y_pred: An array of model predictions, e.g., the predictions
+            of all ensemble members concatenated along the sample
+            axis.
+            shape=(n_candidate, n_sample, n_outcome)
+        n_trial: The number of trials to select.
+        epsilon (optional): A small value guarding against the
+            logarithm of zero.
+
+    Returns:
+        indices: An integer array of the selected candidates in order
+            of selection.
+            shape=(min(n_trial, n_candidate),)
+        expected_ig: The expected information gain of each selected
+            candidate conditioned on the previously selected
+            candidates.
+            shape=(min(n_trial, n_candidate),)
+
+    """
+    y_pred = np.asarray(y_pred)
+    (n_candidate, n_sample, _) = y_pred.shape
+    n_trial = min(n_trial, n_candidate)
+
+    # The entropy of each candidate under each posterior sample, which
+    # does not depend on the sample weights.
+    entropy_sample = -np.sum(
+        y_pred * np.log(np.maximum(y_pred, epsilon)), axis=2
+    )  # shape=(n_candidate, n_sample)
+
+    weight = np.full([n_sample], 1. / n_sample)
+    is_eligible = np.ones([n_candidate], dtype=bool)
+    indices = np.empty([n_trial], dtype=int)
+    expected_ig = np.empty([n_trial], dtype=y_pred.dtype)
+    for i_trial in range(n_trial):
+        # Posterior predictive distribution under weighted samples.
+        y_mean = np.einsum('s,cso->co', weight, y_pred)
+        term0 = -np.sum(y_mean * np.log(np.maximum(y_mean, epsilon)), axis=1)
+        term1 = np.dot(entropy_sample, weight)
+        ig = np.where(is_eligible, term0 - term1, -np.inf)
+
+        idx = np.argmax(ig)
+        indices[i_trial] = idx
+        expected_ig[i_trial] = ig[idx]
+        is_eligible[idx] = False
+
+        # Condition the posterior samples on the most probable outcome
+        # of the selected trial.
+        outcome = np.argmax(y_mean[idx])
+        weight = weight * np.maximum(y_pred[idx, :, outcome], epsilon)
+        weight = weight / np.sum(weight)
+
+    return indices, expected_ig
@@ -24,9 +24,10 @@ Functions:
 import tensorflow as tf
 
 from psiz.trials.information_gain import ig_categorical
+from psiz.trials.information_gain.predict_ensemble import predict_ensemble
 
 
-def ig_model_categorical(model_list, inputs):
+def ig_model_categorical(model_list, inputs, n_worker=1, executor=None):
     """Ensemble information gain.
 
     Args:
@@ -36,6 +37,12 @@ def ig_model_categorical(model_list, inputs):
             depends on the model being used, however it is assumed that
             the first dimension of all inputs has `batch_size`
             semantics.
+        n_worker (optional): The number of threads used to evaluate
+            the models of the ensemble (see `predict_ensemble`).
+        executor (optional): A `concurrent.futures.Executor` used to
+            evaluate the models of the ensemble. When computing
+            information gain for many batches, create the executor
+            once and pass it to every call (see `predict_ensemble`).
 
     Returns:
         Information gain for each input in the batch.
@@ -45,9 +52,9 @@ def ig_model_categorical(model_list, inputs):
     all models and then computing expected information gain.
 
     """
-    output_predictions = []
-    for model in model_list:
-        output_predictions.append(model(inputs, training=False))
+    output_predictions = predict_ensemble(
+        model_list, inputs, n_worker=n_worker, executor=executor
+    )
     # Concatenate different ensemble predictions along samples axis.
     output_predictions = tf.concat(output_predictions, 1)
     return ig_categorical(output_predictions)
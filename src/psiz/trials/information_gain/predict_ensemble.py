@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Information gain.
+
+Functions:
+    predict_ensemble: Compute the predictions of an ensemble of models.
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+def predict_ensemble(model_list, inputs, n_worker=1, executor=None):
+    """Return the predictions of every model in an ensemble.
+
+    Models are independent, so they can be evaluated concurrently.
+    Concurrent evaluation uses a pool of threads, since TensorFlow
+    releases the GIL while executing ops.
+
+    Args:
+        model_list: A list of models.
+        inputs: A batch of inputs.
+        n_worker (optional): The number of threads used to evaluate
+            the models. By default, models are evaluated sequentially.
+            Ignored if `executor` is provided.
+        executor (optional): A `concurrent.futures.Executor` used to
+            evaluate the models. Callers that predict many batches
+            should create a single executor and pass it to every call,
+            rather than paying for thread start-up on each batch.
+
+    Returns:
+        A list of model predictions in the same order as `model_list`.
+
+    Notes:
+        Deterministic models produce identical predictions regardless
+        of `n_worker`. Models that draw random samples produce
+        identically distributed predictions, but the random stream
+        used by each model may depend on thread scheduling.
+
+    """
+    if executor is not None:
+        return _submit(executor, model_list, inputs)
+
+    n_worker = min(n_worker, len(model_list))
+    if n_worker <= 1:
+        return [model(inputs, training=False) for model in model_list]
+
+    with ThreadPoolExecutor(max_workers=n_worker) as executor:
+        return _submit(executor, model_list, inputs)
+
+
+def _submit(executor, model_list, inputs):
+    """Return the predictions of every model using `executor`."""
+    future_list = [
+        executor.submit(model, inputs, training=False)
+        for model in model_list
+    ]
+    return [future.result() for future in future_list]
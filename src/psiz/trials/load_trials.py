@@ -29,7 +29,7 @@ from psiz.trials.similarity.rate.rate_observations import RateObservations
 from psiz.trials.experimental.trial_dataset import TrialDataset
 
 
-def load_trials(filepath):
+def load_trials(filepath, **kwargs):
     """Load data saved via the save method.
 
     The loaded data is instantiated as a concrete class of
@@ -37,6 +37,9 @@ def load_trials(filepath):
 
     Args:
         filepath: The location of the hdf5 file to load.
+        kwargs (optional): Additional keyword arguments passed to the
+            `load` method of the concrete class (e.g., `index` and
+            `mmap_mode` for `RankObservations`).
 
     Returns:
         Loaded trials.
@@ -82,5 +85,5 @@ def load_trials(filepath):
         )
         raise NotImplementedError
 
-    trials = trial_class.load(filepath)
+    trials = trial_class.load(filepath, **kwargs)
     return trials
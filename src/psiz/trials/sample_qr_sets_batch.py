@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Module of core `trials` functionality.
+
+Functions:
+    sample_qr_sets_batch: Sample query-reference sets for many queries
+        in one vectorised pass.
+
+"""
+
+import numpy as np
+
+
+def sample_qr_sets_batch(
+        query_idx, n_reference, n_sample, reference_priority, rng=None,
+        max_n_element=2**22):
+    """Sample query-reference sets for many queries at once.
+
+    References are sampled with an exponential race, which is
+    equivalent to the Gumbel-top-k trick: each stimulus draws an
+    exponential arrival time scaled by the inverse of its priority and
+    the `n_reference` earliest arrivals of each row are selected using
+    `argpartition`. This is equivalent to sequentially sampling
+    references without replacement in proportion to their priority.
+    Within a trial, references are unique, but across trials there may
+    be repetitions (i.e., `replace=True` in `sample_qr_sets`).
+
+    Args:
+        query_idx: An integer array indicating the query indices.
+            shape=(n_query,)
+        n_reference: An integer indicating the number of references in
+            each trial.
+        n_sample: An integer array indicating the number of trials to
+            sample for each query.
+            shape=(n_query,)
+        reference_priority: An array of nonnegative values indicating
+            the (unnormalized) probability of selecting each stimulus
+            as a reference for each query. The priority of a query
+            with respect to itself is ignored.
+            shape=(n_query, n_stimuli)
+        rng (optional): A NumPy random number generator that can be
+            used to control stochasticity.
+        max_n_element (optional): The maximum number of elements of an
+            intermediate array. Trials are sampled in chunks to respect
+            this limit.
+
+    Returns:
+        stimulus_set: A set of query-reference samples. The trials of
+            each query occupy consecutive rows, in the same order as
+            `query_idx`.
+            shape=(sum(n_sample), n_reference + 1)
+
+    Raises:
+        ValueError: If a query with a non-zero `n_sample` has fewer
+            than `n_reference` eligible references.
+
+    """
+    query_idx = np.asarray(query_idx)
+    n_sample = np.asarray(n_sample)
+    n_query = len(query_idx)
+    if rng is None:
+        rng = np.random.default_rng()
+
+    # Zero out the query of each row, so that it is not eligible to be
+    # selected as a reference.
+    priority = np.array(reference_priority, dtype=float)
+    priority[np.arange(n_query), query_idx] = 0.
+    n_stimuli = priority.shape[1]
+
+    # NOTE: Single precision is sufficient for sampling and halves the
+    # memory traffic of the race. Rows are scaled by their maximum
+    # before casting so that small priorities do not underflow.
+    priority_max = np.max(priority, axis=1, keepdims=True)
+    priority_max[priority_max == 0.] = 1.
+    priority = (priority / priority_max).astype(np.float32)
+
+    n_eligible = np.sum(np.greater(priority, 0.), axis=1)
+    if np.any(np.less(n_eligible[n_sample > 0], n_reference)):
+        raise ValueError(
+            'Every query must have at least `n_reference` references with '
+            'a non-zero priority.'
+        )
+
+    row_query = np.repeat(np.arange(n_query), n_sample)
+    n_row = len(row_query)
+    stimulus_set = np.empty([n_row, n_reference + 1], dtype=int)
+    stimulus_set[:, 0] = query_idx[row_query]
+
+    n_row_chunk = max(max_n_element // max(n_stimuli, 1), 1)
+    for start in range(0, n_row, n_row_chunk):
+        stop = min(start + n_row_chunk, n_row)
+        keys = rng.standard_exponential(
+            size=[stop - start, n_stimuli], dtype=np.float32
+        )
+        # Ineligible references have an arrival time of `inf`.
+        with np.errstate(divide='ignore'):
+            keys /= priority[row_query[start:stop]]
+        stimulus_set[start:stop, 1:] = np.argpartition(
+            keys, n_reference - 1, axis=1
+        )[:, :n_reference]
+
+    return stimulus_set
@@ -21,14 +21,22 @@ Classes:
 
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+
 import numpy as np
 import tensorflow as tf
 
 from psiz.trials.similarity.docket_generator import DocketGenerator
 from psiz.trials.similarity.rank.rank_docket import RankDocket
 from psiz.trials.information_gain.ig_categorical import ig_categorical
-from psiz.trials.stack import stack
-from psiz.utils import ProgressBarRe, choice_wo_replace
+from psiz.trials.information_gain.ig_categorical_greedy import (
+    ig_categorical_greedy
+)
+from psiz.trials.information_gain.predict_ensemble import predict_ensemble
+from psiz.trials.sample_qr_sets_batch import sample_qr_sets_batch
+from psiz.trials.stack import StackBuilder
+from psiz.utils import ProgressBarRe
 
 
 class ActiveRank(DocketGenerator):
@@ -36,7 +44,9 @@ class ActiveRank(DocketGenerator):
 
     def __init__(
             self, n_stimuli, n_reference=2, n_select=1, max_unique_query=None,
-            n_candidate=1000, batch_size=128):
+            n_candidate=1000, batch_size=128, pool_queries=False,
+            n_worker=1, selection='top', n_survivor=None,
+            proxy_n_sample=8, seed=None):
         """Initialize.
 
         Args:
@@ -57,10 +67,85 @@ class ActiveRank(DocketGenerator):
                 limited by time and RAM. Must be greater than zero.
             batch_size (optional): The batch size to use when
                 iterating over the candidate docket.
+            pool_queries (optional): Boolean indicating if the
+                candidates of all queries should be scored as a single
+                pool. If `True`, the candidates of all queries are
+                sampled in one vectorised call and streamed through the
+                models in batches of a fixed shape, and the top
+                candidates of each query are then selected together.
+                This avoids assembling a docket and dataset for every
+                query, which dominates generation time when there are
+                many queries. Consider increasing `batch_size` when
+                using this option.
+            n_worker (optional): The number of threads used to
+                evaluate the models of an ensemble concurrently (see
+                `psiz.trials.information_gain.predict_ensemble`). The
+                threads are created once per call to `generate` and
+                shared by all batches. By default, models are evaluated
+                sequentially.
+            selection (optional): A string indicating how the trials
+                of a query are selected from its candidates. If 'top',
+                the candidates with the highest expected information
+                gain are selected independently. If 'greedy', trials
+                are selected greedily to approximate the joint
+                information gain of the selected trials, which avoids
+                near-duplicate trials (see
+                `psiz.trials.information_gain.ig_categorical_greedy`).
+                Greedy selection retains the predictions of all
+                candidates of a query and cannot be combined with
+                `pool_queries=True`. NOTE: The two options report
+                expected information gain on different scales. 'top'
+                averages the expected information gain of each model,
+                whereas 'greedy' computes the expected information gain
+                of the samples of all models concatenated (including
+                the disagreement between models) and conditions each
+                trial on the previously selected trials of its query.
+                Values returned by `generate` should therefore not be
+                compared across the two options. When pruning, the
+                proxy scores always use the 'top' scale.
+            n_survivor (optional): The number of candidates per query
+                that survive pruning. If set (and less than
+                `n_candidate`), candidates are scored in two stages:
+                First, all candidates are scored with a cheap proxy,
+                the expected information gain using only
+                `proxy_n_sample` samples from each model. Second, only
+                the `n_survivor` best candidates of each query are
+                scored with the full number of samples. Smaller values
+                are faster but risk pruning the best candidates. The
+                accuracy and duration of the two stages are reported in
+                the `meta` data returned by `generate`. Pruning is
+                skipped if the proxy is not cheaper than full scoring,
+                i.e., if no model draws more than `proxy_n_sample`
+                samples. By default, no pruning is performed.
+            proxy_n_sample (optional): The number of samples drawn by
+                each model when computing the proxy scores. A model
+                never draws more samples for the proxy than its own
+                `n_sample`.
+            seed (optional): An integer seed (or `np.random.SeedSequence`)
+                for the random number generators used to select queries
+                and to sample candidates. Both values of `pool_queries`
+                sample candidates with the same sampler and random
+                stream, so for a given seed they score the same
+                candidates. By default, a fresh seed is drawn from the
+                OS.
+
+        Raises:
+            ValueError: If `selection` is not recognized or if greedy
+                selection is combined with `pool_queries=True`.
 
         """
         DocketGenerator.__init__(self)
 
+        if selection not in ('top', 'greedy'):
+            raise ValueError(
+                "The argument `selection` must be either 'top' or 'greedy'."
+            )
+        if selection == 'greedy' and pool_queries:
+            raise ValueError(
+                "The argument `selection='greedy'` cannot be combined with "
+                "`pool_queries=True`."
+            )
+
         self.n_stimuli = n_stimuli
 
         # Set trial configuration parameters.
@@ -78,6 +163,12 @@ class ActiveRank(DocketGenerator):
         # TODO MAYBE np.minimum(max_candidate, n_candidate)
         self.n_candidate = n_candidate
         self.batch_size = batch_size
+        self.pool_queries = pool_queries
+        self.n_worker = n_worker
+        self.selection = selection
+        self.n_survivor = n_survivor
+        self.proxy_n_sample = proxy_n_sample
+        self.seed = seed
 
     def generate(
             self, n_trial, model_list, q_priority=None, r_priority=None,
@@ -128,6 +219,16 @@ class ActiveRank(DocketGenerator):
                 ig_trial: A numpy.ndarray containing the expected
                 information gain for each trial in the docket.
                 shape = (n_trial,)
+                If candidates are pruned (see `n_survivor`),
+                `data['meta']['pruning']` reports the duration of the
+                proxy and full scoring stages and the fraction of
+                selected trials that are also among the top trials
+                according to the proxy (`top_agreement`, which is NaN
+                if no trials were selected).
+
+        Raises:
+            ValueError: If `n_survivor` is smaller than the number of
+                trials of a query.
 
         """
         # Set default groups.
@@ -169,28 +270,83 @@ class ActiveRank(DocketGenerator):
         # Determine number of unique query stimuli to use in the docket.
         n_unique_query = np.minimum(n_trial, self.max_unique_query)
 
+        # Derive independent random streams for selecting queries and
+        # for sampling candidates.
+        query_seed, candidate_seed = np.random.SeedSequence(
+            self.seed
+        ).spawn(2)
+        rng = np.random.default_rng(candidate_seed)
+
         # Assemble docket in two stages.
         (query_idx_arr, query_idx_count_arr) = self._select_query(
-            n_trial, q_priority, n_unique_query
-        )
-        (docket, expected_ig) = self._select_references(
-            model_list, groups, query_idx_arr, query_idx_count_arr,
-            q_priority, r_priority, verbose
+            n_trial, q_priority, n_unique_query,
+            np.random.default_rng(query_seed)
         )
+        n_survivor = self._n_survivor(model_list)
+        if n_survivor is not None and (
+            n_survivor < np.max(query_idx_count_arr)
+        ):
+            raise ValueError(
+                "The attribute `n_survivor` must be at least as large as "
+                "the number of trials of each query ({0}).".format(
+                    np.max(query_idx_count_arr)
+                )
+            )
+        # Create a single pool of threads that is shared by all batches.
+        executor = None
+        n_worker = min(self.n_worker, len(model_list))
+        if n_worker > 1:
+            executor = ThreadPoolExecutor(max_workers=n_worker)
+        try:
+            if self.pool_queries:
+                (docket, expected_ig, pruning_stats) = (
+                    self._select_references_pooled(
+                        model_list, groups, query_idx_arr,
+                        query_idx_count_arr, r_priority, rng, executor,
+                        verbose
+                    )
+                )
+            else:
+                (docket, expected_ig, pruning_stats) = (
+                    self._select_references(
+                        model_list, groups, query_idx_arr,
+                        query_idx_count_arr, r_priority, rng, executor,
+                        verbose
+                    )
+                )
+        finally:
+            if executor is not None:
+                executor.shutdown()
         data = {
             'docket': {'expected_ig': expected_ig},
             'meta': {}
         }
+        if n_survivor is not None:
+            # The fraction of selected trials that are also among the
+            # top trials according to the proxy scores (NaN if no
+            # trials were selected).
+            top_agreement = np.nan
+            if pruning_stats[3] > 0:
+                top_agreement = float(pruning_stats[2] / pruning_stats[3])
+            data['meta']['pruning'] = {
+                'n_candidate': self.n_candidate,
+                'n_survivor': n_survivor,
+                'proxy_n_sample': self.proxy_n_sample,
+                'proxy_duration_s': float(pruning_stats[0]),
+                'full_duration_s': float(pruning_stats[1]),
+                'top_agreement': top_agreement,
+            }
 
         return docket, data
 
-    def _select_query(self, n_trial, q_priority, n_unique_query):
+    def _select_query(self, n_trial, q_priority, n_unique_query, rng):
         """Select which stimuli should serve as queries and how often.
 
         Args:
             n_trial: Integer indicating the total number of trials.
             q_priority: An array indicating stimulus priorities.
             n_unique_query: Scalar indicating the number of unique queries.
+            rng: A NumPy random number generator.
 
         Returns:
             query_idx_arr: An array of selected query indices.
@@ -206,11 +362,11 @@ class ActiveRank(DocketGenerator):
         # based on `q_priority`.
         query_priority = q_priority / np.sum(q_priority)
         if n_unique_query < self.n_stimuli:
-            query_idx_arr = np.random.choice(
+            query_idx_arr = rng.choice(
                 query_idx_arr, n_unique_query, replace=False, p=query_priority
             )
         else:
-            query_idx_arr = np.random.permutation(query_idx_arr)
+            query_idx_arr = rng.permutation(query_idx_arr)
 
         # Determine how many times each query stimulus should be used.
         query_idx_count_arr = np.zeros((n_unique_query), dtype=np.int32)
@@ -223,7 +379,7 @@ class ActiveRank(DocketGenerator):
 
     def _select_references(
             self, model_list, groups, query_idx_arr, query_idx_count_arr,
-            q_priority, r_priority, verbose):
+            r_priority, rng, executor, verbose):
         """Determine references for all requested query stimuli."""
         n_query = query_idx_arr.shape[0]
 
@@ -233,60 +389,262 @@ class ActiveRank(DocketGenerator):
             )
             progbar.update(0)
 
-        docket = None
-        expected_ig = None
+        docket_builder = StackBuilder()
+        expected_ig = []
+        n_survivor = self._n_survivor(model_list)
+        proxy_n_sample = self._proxy_n_sample(model_list)
+        pruning_stats = np.zeros([4])
         for i_query in range(n_query):
             r_priority_q = r_priority[query_idx_arr[i_query]]
-            docket_q, expected_ig_q = _select_query_references(
-                i_query, model_list, groups, query_idx_arr,
-                query_idx_count_arr,
-                self.n_reference, self.n_select, self.n_candidate,
-                r_priority_q, self.batch_size
+            docket_q, expected_ig_q, pruning_stats_q = (
+                _select_query_references(
+                    i_query, model_list, groups, query_idx_arr,
+                    query_idx_count_arr,
+                    self.n_reference, self.n_select, self.n_candidate,
+                    r_priority_q, self.batch_size, executor,
+                    self.selection, n_survivor, proxy_n_sample, rng=rng
+                )
             )
 
             if verbose > 0:
                 progbar.update(i_query + 1)
 
             # Add to dynamic list.
-            if expected_ig is None:
-                expected_ig = expected_ig_q
-            else:
-                expected_ig = np.hstack((expected_ig, expected_ig_q))
+            expected_ig.append(expected_ig_q)
+            docket_builder.append(docket_q)
+            pruning_stats += pruning_stats_q
 
-            if docket is None:
-                docket = docket_q
-            else:
-                docket = stack((docket, docket_q))
+        docket = docket_builder.build()
+        expected_ig = np.concatenate(expected_ig, axis=0)
+        return docket, expected_ig, pruning_stats
+
+    def _select_references_pooled(
+            self, model_list, groups, query_idx_arr, query_idx_count_arr,
+            r_priority, rng, executor, verbose):
+        """Determine references for all queries using a single pool.
 
-        return docket, expected_ig
+        The candidates of query `i` occupy rows
+        `[i * n_candidate, (i + 1) * n_candidate)` of the pool. Since
+        `sample_qr_sets_batch` consumes `rng` row by row, the pool
+        holds the same candidates that `_select_references` samples
+        one query at a time.
+
+        """
+        n_query = query_idx_arr.shape[0]
+        n_survivor = self._n_survivor(model_list)
+
+        # Sample candidate references of all queries at once.
+        stimulus_set = sample_qr_sets_batch(
+            query_idx_arr, self.n_reference,
+            np.full([n_query], self.n_candidate), r_priority[query_idx_arr],
+            rng=rng
+        ).astype(np.int32)
+
+        pruning_stats = np.zeros([4])
+        if n_survivor is not None:
+            # Score the pool with the cheap proxy and keep the best
+            # candidates of each query, ordered by proxy score.
+            start_s = time()
+            n_sample_list = _set_n_sample(
+                model_list, self._proxy_n_sample(model_list)
+            )
+            try:
+                proxy_ig = self._score_pool(
+                    model_list, stimulus_set, groups, executor, verbose
+                )
+            finally:
+                _set_n_sample(model_list, n_sample_list)
+            pool_idx, _ = _segmented_top(
+                np.reshape(proxy_ig, [n_query, self.n_candidate]),
+                np.full([n_query], n_survivor)
+            )
+            stimulus_set = stimulus_set[pool_idx]
+            pruning_stats[0] = time() - start_s
+
+        start_s = time()
+        expected_ig = self._score_pool(
+            model_list, stimulus_set, groups, executor, verbose
+        )
+        pool_idx, expected_ig = _segmented_top(
+            np.reshape(expected_ig, [n_query, -1]), query_idx_count_arr
+        )
+
+        if n_survivor is not None:
+            # Survivors are ordered by proxy score, so a selected trial
+            # is also among the proxy's top trials if its position
+            # among the survivors of its query is less than the number
+            # of trials of its query.
+            query_pos, survivor_pos = np.divmod(pool_idx, n_survivor)
+            pruning_stats[1] = time() - start_s
+            pruning_stats[2] = np.sum(
+                np.less(survivor_pos, query_idx_count_arr[query_pos])
+            )
+            pruning_stats[3] = len(pool_idx)
+
+        docket = RankDocket(
+            stimulus_set[pool_idx],
+            n_select=np.full([len(pool_idx)], self.n_select)
+        )
+        return docket, expected_ig, pruning_stats
+
+    def _score_pool(
+            self, model_list, stimulus_set, groups, executor, verbose):
+        """Return the expected information gain of a pool of candidates.
+
+        Args:
+            model_list: A list of models.
+            stimulus_set: The candidate trials.
+                shape=(n_pool, n_reference + 1)
+            groups: The group membership targeted by the candidates.
+            executor: A `concurrent.futures.Executor` used to evaluate
+                the models, or `None` to evaluate them sequentially.
+            verbose: The verbosity of printed output.
+
+        Returns:
+            expected_ig: An array of the expected information gain of
+                each candidate.
+                shape=(n_pool,)
+
+        """
+        n_pool = stimulus_set.shape[0]
+
+        # Pad the pool (by repeating the first candidate) so that all
+        # batches have the same shape.
+        n_batch = int(np.ceil(n_pool / self.batch_size))
+        n_pad = n_batch * self.batch_size - n_pool
+        stimulus_set_padded = np.concatenate(
+            [stimulus_set, np.repeat(stimulus_set[0:1], n_pad, axis=0)],
+            axis=0
+        )
+        docket = RankDocket(
+            stimulus_set_padded,
+            n_select=np.full([n_pool + n_pad], self.n_select)
+        )
+        group_matrix = np.repeat(
+            np.expand_dims(groups, axis=0), n_pool + n_pad, axis=0
+        )
+        # NOTE: The lazy dataset defers the expansion of candidates to
+        # all outcomes, so that the pool does not need to be expanded
+        # in memory all at once.
+        ds_docket = docket.as_dataset(group_matrix, lazy=True).batch(
+            self.batch_size, drop_remainder=True
+        )
+
+        if verbose > 0:
+            progbar = ProgressBarRe(
+                n_batch, prefix='Active Trials:', length=50
+            )
+            progbar.update(0)
+
+        expected_ig = []
+        for i_batch, x in enumerate(ds_docket):
+            expected_ig.append(_ensemble_ig(model_list, x, executor))
+            if verbose > 0:
+                progbar.update(i_batch + 1)
+        return tf.concat(expected_ig, 0).numpy()[0:n_pool]
+
+    def _proxy_n_sample(self, model_list):
+        """Return the number of proxy samples of each model."""
+        return [
+            min(model.n_sample, self.proxy_n_sample) for model in model_list
+        ]
+
+    def _n_survivor(self, model_list):
+        """Return the number of survivors per query (`None` if unused).
+
+        Pruning is unused if it is not requested or if the proxy is not
+        cheaper than full scoring for any model.
+
+        """
+        if self.n_survivor is None or self.n_survivor >= self.n_candidate:
+            return None
+        n_sample_list = [model.n_sample for model in model_list]
+        if not np.any(
+            np.less(self._proxy_n_sample(model_list), n_sample_list)
+        ):
+            return None
+        return self.n_survivor
 
 
 def _select_query_references(
         i_query, model_list, groups, query_idx_arr, query_idx_count_arr,
-        n_reference, n_select, n_candidate, r_priority_q, batch_size):
+        n_reference, n_select, n_candidate, r_priority_q, batch_size,
+        executor, selection, n_survivor, proxy_n_sample, rng=None):
     """Determine query references."""
     query_idx = query_idx_arr[i_query]
     n_trial_q = query_idx_count_arr[i_query]
 
-    ref_idx_eligable = np.arange(len(r_priority_q))
-    bidx_eligable = np.greater(r_priority_q, 0)
-    ref_idx_eligable = ref_idx_eligable[bidx_eligable]
-    ref_prob = r_priority_q[bidx_eligable]
-    ref_prob = ref_prob / np.sum(ref_prob)
-
-    # Create a docket full of candidate trials.
-    n_select = np.repeat(n_select, n_candidate)
-    stimulus_set = np.empty(
-        (n_candidate, n_reference + 1), dtype=np.int32
+    # Create a docket full of candidate trials. Candidates are sampled
+    # exactly as in the pooled mode (see `_select_references_pooled`).
+    stimulus_set = sample_qr_sets_batch(
+        np.array([query_idx]), n_reference, np.array([n_candidate]),
+        np.expand_dims(r_priority_q, axis=0), rng=rng
+    ).astype(np.int32)
+    docket = RankDocket(
+        stimulus_set, n_select=np.repeat(n_select, n_candidate)
     )
-    stimulus_set[:, 0] = query_idx
-    stimulus_set[:, 1:] = choice_wo_replace(
-        ref_idx_eligable, (n_candidate, n_reference), ref_prob
-    )
-    docket = RankDocket(stimulus_set, n_select=n_select)
 
+    pruning_stats = np.zeros([4])
+    if n_survivor is not None:
+        # Score candidates with the cheap proxy and keep the best
+        # candidates, ordered by proxy score.
+        start_s = time()
+        n_sample_list = _set_n_sample(model_list, proxy_n_sample)
+        try:
+            proxy_ig = _score_candidates(
+                model_list, docket, groups, batch_size, executor
+            )
+        finally:
+            _set_n_sample(model_list, n_sample_list)
+        docket = docket.subset(np.argsort(-proxy_ig)[0:n_survivor])
+        pruning_stats[0] = time() - start_s
+
+    start_s = time()
+    if selection == 'greedy':
+        y_pred = _predict_candidates(
+            model_list, docket, groups, batch_size, executor
+        )
+        top_indices, expected_ig = ig_categorical_greedy(y_pred, n_trial_q)
+    else:
+        expected_ig = _score_candidates(
+            model_list, docket, groups, batch_size, executor
+        )
+
+        # Grab the top trials as requested.
+        top_indices = np.argsort(-expected_ig)[0:n_trial_q]
+        expected_ig = expected_ig[top_indices]
+    docket = docket.subset(top_indices)
+
+    if n_survivor is not None:
+        # Survivors are ordered by proxy score, so a selected trial is
+        # also among the proxy's top trials if its position is less
+        # than `n_trial_q`.
+        pruning_stats[1] = time() - start_s
+        pruning_stats[2] = np.sum(np.less(top_indices, n_trial_q))
+        pruning_stats[3] = len(top_indices)
+
+    return docket, expected_ig, pruning_stats
+
+
+def _score_candidates(model_list, docket, groups, batch_size, executor):
+    """Return the expected information gain of a docket of candidates.
+
+    Args:
+        model_list: A list of models.
+        docket: A RankDocket of candidate trials.
+        groups: The group membership targeted by the candidates.
+        batch_size: The batch size.
+        executor: A `concurrent.futures.Executor` used to evaluate the
+            models, or `None` to evaluate them sequentially.
+
+    Returns:
+        expected_ig: An array of the expected information gain of each
+            candidate.
+            shape=(n_candidate,)
+
+    """
     group_matrix = np.expand_dims(groups, axis=0)
-    group_matrix = np.repeat(group_matrix, n_candidate, axis=0)
+    group_matrix = np.repeat(group_matrix, docket.n_trial, axis=0)
 
     ds_docket = docket.as_dataset(group_matrix).batch(
         batch_size, drop_remainder=False
@@ -294,29 +652,123 @@ def _select_query_references(
 
     expected_ig = []
     for x in ds_docket:
-        batch_expected_ig = []
-        # Compute average of ensemble of models.
-        for model in model_list:
-            # Compute expected information gain from prediction samples.
-            batch_expected_ig.append(
-                ig_categorical(model(x, training=False))
-            )
-        # TODO Should IG be computed on ensemble samples collectively?
-        # for model in model_list:
-        #     batch_pred.append(model(x, training=False))
-        # batch_pred = tf.stack(batch_pred, axis=TODO)
-        # batch_expected_ig = ig_categorical(batch_pred)
-
-        batch_expected_ig = tf.stack(batch_expected_ig, axis=0)
-        batch_expected_ig = tf.reduce_mean(batch_expected_ig, axis=0)
-        expected_ig.append(batch_expected_ig)
-    expected_ig = tf.concat(expected_ig, 0).numpy()
-
-    # Grab the top trials as requested.
-    top_indices = np.argsort(-expected_ig)
-    docket = docket.subset(
-        top_indices[0:n_trial_q]
+        expected_ig.append(_ensemble_ig(model_list, x, executor))
+    return tf.concat(expected_ig, 0).numpy()
+
+
+def _predict_candidates(model_list, docket, groups, batch_size, executor):
+    """Return the ensemble predictions for a docket of candidates.
+
+    Args:
+        model_list: A list of models.
+        docket: A RankDocket of candidate trials.
+        groups: The group membership targeted by the candidates.
+        batch_size: The batch size.
+        executor: A `concurrent.futures.Executor` used to evaluate the
+            models, or `None` to evaluate them sequentially.
+
+    Returns:
+        y_pred: An array of the predictions of all models
+            concatenated along the sample axis.
+            shape=(n_candidate, n_sample, n_outcome)
+
+    """
+    group_matrix = np.expand_dims(groups, axis=0)
+    group_matrix = np.repeat(group_matrix, docket.n_trial, axis=0)
+
+    ds_docket = docket.as_dataset(group_matrix).batch(
+        batch_size, drop_remainder=False
     )
-    expected_ig = expected_ig[top_indices[0:n_trial_q]]
 
-    return docket, expected_ig
+    y_pred = []
+    for x in ds_docket:
+        # Concatenate ensemble predictions along samples axis.
+        y_pred.append(
+            tf.concat(
+                predict_ensemble(model_list, x, executor=executor), 1
+            ).numpy()
+        )
+    return np.concatenate(y_pred, axis=0)
+
+
+def _segmented_top(scores, counts):
+    """Select the highest scoring candidates of each query.
+
+    Args:
+        scores: An array of candidate scores, where row `i` holds the
+            candidates of query `i`.
+            shape=(n_query, n_candidate)
+        counts: An integer array indicating the number of candidates
+            to select for each query.
+            shape=(n_query,)
+
+    Returns:
+        pool_idx: The flat (row-major) indices of the selected
+            candidates. The candidates of a query are kept together
+            and in descending order of score.
+        selected_scores: The scores of the selected candidates.
+
+    """
+    (n_query, n_candidate) = scores.shape
+    top_indices = np.argsort(-scores, axis=1)
+    is_selected = np.less(
+        np.arange(n_candidate), np.expand_dims(counts, axis=1)
+    )
+    pool_idx = (
+        top_indices
+        + np.expand_dims(np.arange(n_query) * n_candidate, axis=1)
+    )[is_selected]
+    selected_scores = scores[
+        np.nonzero(is_selected)[0], top_indices[is_selected]
+    ]
+    return pool_idx, selected_scores
+
+
+def _set_n_sample(model_list, n_sample):
+    """Set the number of samples drawn by each model.
+
+    Args:
+        model_list: A list of models.
+        n_sample: An integer applied to all models, or a list with one
+            integer per model.
+
+    Returns:
+        n_sample_list: A list of the previous values, which can be used
+            to restore the models.
+
+    """
+    n_sample_list = [model.n_sample for model in model_list]
+    if np.isscalar(n_sample):
+        n_sample = [n_sample] * len(model_list)
+    for model, n_sample_model in zip(model_list, n_sample):
+        model.n_sample = n_sample_model
+    return n_sample_list
+
+
+def _ensemble_ig(model_list, x, executor):
+    """Return the expected information gain averaged over an ensemble.
+
+    Args:
+        model_list: A list of models.
+        x: A batch of candidate trials.
+        executor: A `concurrent.futures.Executor` used to evaluate the
+            models, or `None` to evaluate them sequentially.
+
+    Returns:
+        A tf.Tensor of the expected information gain of each trial.
+            shape=(batch_size,)
+
+    """
+    batch_expected_ig = []
+    # Compute average of ensemble of models.
+    for y_pred in predict_ensemble(model_list, x, executor=executor):
+        # Compute expected information gain from prediction samples.
+        batch_expected_ig.append(ig_categorical(y_pred))
+    # TODO Should IG be computed on ensemble samples collectively?
+    # for model in model_list:
+    #     batch_pred.append(model(x, training=False))
+    # batch_pred = tf.stack(batch_pred, axis=TODO)
+    # batch_expected_ig = ig_categorical(batch_pred)
+
+    batch_expected_ig = tf.stack(batch_expected_ig, axis=0)
+    return tf.reduce_mean(batch_expected_ig, axis=0)
@@ -20,17 +20,23 @@ Classes:
 
 """
 
+from concurrent.futures import ProcessPoolExecutor
 import copy
 import multiprocessing
-import sys
+from multiprocessing import shared_memory
 from time import time
 
 import numpy as np
 
 from psiz.trials import sample_qr_sets
+from psiz.trials import sample_qr_sets_batch
 from psiz.trials.similarity.docket_generator import DocketGenerator
 from psiz.trials.similarity.rank.rank_docket import RankDocket
 
+# The maximum number of elements of the intermediate arrays used when
+# sampling a block of queries.
+_MAX_N_ELEMENT = 2**22
+
 
 class RandomRank(DocketGenerator):
     """Trial generator that samples query-reference trials.
@@ -49,7 +55,7 @@ class RandomRank(DocketGenerator):
     def __init__(
             self, indices, n_reference=2, n_select=1, w=None,
             replace=True, n_highest=None, n_worker=1, mask_zero=False,
-            verbose=0):
+            seed=None, verbose=0):
         """Initialize.
 
         Args:
@@ -90,6 +96,11 @@ class RandomRank(DocketGenerator):
             mask_zero (optional): A Boolean indicating if zero should
                 be interpretted as a mask value in `stimulus_set`. By
                 default, `mask_zero=False`.
+            seed (optional): An integer seed (or `np.random.SeedSequence`)
+                for the random number generators. Each query is sampled
+                using its own random stream, so generated dockets are
+                identical for a given seed regardless of `n_worker`. By
+                default, a fresh seed is drawn from the OS.
             verbose (optional): The verbosity of output.
 
         """
@@ -130,6 +141,7 @@ class RandomRank(DocketGenerator):
         self.n_highest = n_highest
         self.n_worker = int(np.maximum(n_worker, 1))
         self.mask_zero = mask_zero
+        self.seed = seed
         self.verbose = verbose
 
     def generate(self, n_trial, per_query=False):
@@ -160,12 +172,16 @@ class RandomRank(DocketGenerator):
         query_idx_list = query_idx_list[bidx]
         w_diag = w_diag[bidx]
 
-        if len(bidx) == 0:
+        if len(query_idx_list) == 0:
             raise ValueError(
                 'No queries are eligable. You must have some non-zero values'
                 'on the diagonal of `w`.'
             )
 
+        # Derive independent random streams for drawing query counts and
+        # for sampling references.
+        count_seed, block_seed = np.random.SeedSequence(self.seed).spawn(2)
+
         if per_query:
             # Generate `n_trial` for each query.
             n_trial_per_query_list = np.full(
@@ -174,16 +190,25 @@ class RandomRank(DocketGenerator):
         else:
             # Draw query index counts.
             w_diag = w_diag / np.sum(w_diag)
-            rng = np.random.default_rng()
+            rng = np.random.default_rng(count_seed)
             n_trial_per_query_list = rng.multinomial(n_trial, w_diag)
 
-        stimulus_set = self._uniprocess_generate(
-            query_idx_list, n_trial_per_query_list
-        )
-        # TODO fix segfault issue with multiprocessing
-        # stimulus_set = self._multiprocess_generate(
-        #     query_idx_list, n_trial_per_query_list
-        # )
+        # Partition queries into blocks that are sampled together and
+        # give every block an independent random stream. Blocks do not
+        # depend on the number of workers, so neither do the results.
+        block_boundaries = self._block_boundaries(n_trial_per_query_list)
+        block_seed_list = block_seed.spawn(len(block_boundaries) - 1)
+
+        if self.n_worker > 1:
+            stimulus_set = self._multiprocess_generate(
+                query_idx_list, n_trial_per_query_list, block_boundaries,
+                block_seed_list
+            )
+        else:
+            stimulus_set = self._uniprocess_generate(
+                query_idx_list, n_trial_per_query_list, block_boundaries,
+                block_seed_list
+            )
         n_trial_total = stimulus_set.shape[0]
         n_select = np.full([n_trial_total], self.n_select)
 
@@ -194,29 +219,61 @@ class RandomRank(DocketGenerator):
             stimulus_set, n_select=n_select, mask_zero=self.mask_zero
         )
 
-    def _uniprocess_generate(self, query_idx_list, n_trial_per_query_list):
+    def _block_boundaries(self, n_trial_per_query_list):
+        """Partition queries into blocks of consecutive queries.
+
+        When sampling with replacement, a block contains as many
+        queries as fit in `_MAX_N_ELEMENT` elements of the batched
+        sampler. Since each block also copies one row of `w` per query,
+        the number of queries of a block is capped in the same way.
+        When sampling without replacement, each query forms its own
+        block since uniqueness is enforced per query.
+
+        Args:
+            n_trial_per_query_list: An array indicating the number of
+                trials requested for each query.
+                shape=(n_query,)
+
+        Returns:
+            block_boundaries: An array indicating the first query of
+                each block followed by `n_query`.
+                shape=(n_block + 1,)
+
+        """
+        n_query = len(n_trial_per_query_list)
+        if not self.replace:
+            return np.arange(n_query + 1)
+
+        n_trial_block = max(_MAX_N_ELEMENT // self.n_idx, 1)
+        offsets = np.cumsum(n_trial_per_query_list)
+        block_boundaries = np.searchsorted(
+            offsets, np.arange(n_trial_block, offsets[-1], n_trial_block),
+            side='right'
+        )
+        return np.unique(
+            np.concatenate([
+                block_boundaries, np.arange(0, n_query, n_trial_block),
+                [n_query]
+            ])
+        ).astype(int)
+
+    def _uniprocess_generate(
+            self, query_idx_list, n_trial_per_query_list, block_boundaries,
+            block_seed_list):
         """Uniprocessing strategy."""
         start_s = time()
 
-        stimulus_set = []
-        for query_idx, n_trial_per_query in zip(
-            query_idx_list, n_trial_per_query_list
-        ):
-            w_q = self.w[query_idx]
-            # Set query index to zero to prohibit sampling query as reference.
-            w_q[query_idx] = 0.
-            # Mask references (if any) below the specified limit.
-            if self.n_highest is not None:
-                ref_priority = _mask_lowest(w_q, self.n_highest)
-            else:
-                ref_priority = copy.copy(w_q)
-            stimulus_set_q = sample_qr_sets(
-                query_idx, self.n_reference, n_trial_per_query, ref_priority,
-                replace=self.replace
-            )
-            stimulus_set.append(stimulus_set_q)
-
-        stimulus_set = np.concatenate(stimulus_set, axis=0)
+        n_col = self.n_reference + 1
+        n_trial_max = int(np.sum(n_trial_per_query_list))
+        stimulus_set = np.empty([n_trial_max, n_col], dtype=np.int64)
+        n_obtained_list = _sample_blocks(
+            stimulus_set, query_idx_list, self.w, query_idx_list,
+            n_trial_per_query_list, block_boundaries, block_seed_list,
+            self.n_reference, self.n_highest, self.replace
+        )
+        stimulus_set = _remove_unfilled(
+            stimulus_set, n_trial_per_query_list, n_obtained_list
+        )
 
         if self.verbose > 0:
             duration_s = time() - start_s
@@ -228,55 +285,80 @@ class RandomRank(DocketGenerator):
 
         return stimulus_set
 
-    def _multiprocess_generate(self, query_idx_list, n_trial_per_query_list):
-        """Multiprocessing setup and teardown."""
-        # Create a Queue for exception handling.
-        shared_exception = multiprocessing.Queue()
+    def _multiprocess_generate(
+            self, query_idx_list, n_trial_per_query_list, block_boundaries,
+            block_seed_list):
+        """Multiprocessing strategy.
 
-        # Partition the requested queries into sub-groups for consumption by
-        # the worker pool.
-        n_query = len(query_idx_list)
-        worker_boundaries = np.linspace(
-            0, n_query, self.n_worker + 1, dtype=int
-        )
+        Blocks of queries are partitioned into contiguous chunks with a
+        similar number of trials. Each chunk is consumed by a worker of
+        a process pool, which writes its trials directly into an output
+        buffer in shared memory. Workers are started using the "spawn"
+        method since forking a process that has initialized TensorFlow
+        is not safe.
+
+        """
         start_s = time()
 
-        with multiprocessing.Manager() as manager:
-            stimulus_set_shared = manager.list([])
-
-            process_list = []
-            for idx in range(self.n_worker):
-                query_idx_list_sub = query_idx_list[
-                    worker_boundaries[idx]:worker_boundaries[idx + 1]
-                ]
-                n_trial_per_query_list_sub = n_trial_per_query_list[
-                    worker_boundaries[idx]:worker_boundaries[idx + 1]
-                ]
-                process_list.append(
-                    multiprocessing.Process(
-                        target=_worker_generate,
-                        args=(
-                            query_idx_list_sub, stimulus_set_shared, self.w,
-                            self.n_reference, self.n_highest,
-                            n_trial_per_query_list_sub, self.replace,
-                            shared_exception
+        n_col = self.n_reference + 1
+        n_trial_max = int(np.sum(n_trial_per_query_list))
+        dtype = np.dtype(np.int64)
+        offsets = np.concatenate(
+            [[0], np.cumsum(n_trial_per_query_list)]
+        ).astype(int)
+
+        # Partition blocks into chunks with a similar number of trials.
+        n_block = len(block_boundaries) - 1
+        n_chunk = min(self.n_worker, n_block)
+        chunk_boundaries = np.searchsorted(
+            offsets[block_boundaries],
+            np.linspace(0, n_trial_max, n_chunk + 1)[1:-1]
+        )
+        chunk_boundaries = np.unique(
+            np.concatenate([[0], chunk_boundaries, [n_block]])
+        )
+
+        shm = shared_memory.SharedMemory(
+            create=True, size=max(n_trial_max * n_col * dtype.itemsize, 1)
+        )
+        try:
+            future_list = []
+            with ProcessPoolExecutor(
+                max_workers=n_chunk,
+                mp_context=multiprocessing.get_context('spawn')
+            ) as executor:
+                for start, stop in zip(
+                    chunk_boundaries[:-1], chunk_boundaries[1:]
+                ):
+                    query_start = block_boundaries[start]
+                    query_stop = block_boundaries[stop]
+                    locs = slice(query_start, query_stop)
+                    future_list.append(
+                        executor.submit(
+                            _worker_generate, shm.name, n_trial_max, n_col,
+                            dtype, offsets[query_start],
+                            query_idx_list[locs],
+                            self.w[query_idx_list[locs]],
+                            n_trial_per_query_list[locs],
+                            block_boundaries[start:stop + 1] - query_start,
+                            block_seed_list[start:stop], self.n_reference,
+                            self.n_highest, self.replace
                         )
                     )
+                # NOTE: `result` re-raises any exception of a worker.
+                n_obtained_list = np.concatenate(
+                    [future.result() for future in future_list]
                 )
 
-            for p in process_list:
-                p.start()
-
-            for p in process_list:
-                p.join()
-
-            #  Check for raised exceptions.
-            e_list = [shared_exception.get() for _ in process_list]
-            for e in e_list:
-                if e is not None:
-                    raise e
-
-            stimulus_set = np.concatenate(stimulus_set_shared, axis=0)
+            stimulus_set = np.ndarray(
+                [n_trial_max, n_col], dtype=dtype, buffer=shm.buf
+            )
+            stimulus_set = _remove_unfilled(
+                stimulus_set, n_trial_per_query_list, n_obtained_list
+            )
+        finally:
+            shm.close()
+            shm.unlink()
 
         if self.verbose > 0:
             duration_s = time() - start_s
@@ -289,70 +371,171 @@ class RandomRank(DocketGenerator):
         return stimulus_set
 
 
-def _worker_generate(
-        query_idx_list, stimulus_set, w, n_reference,
-        n_highest, n_trial_per_query_list, replace, shared_exception):
-    """Launch worker sub-process.
+def _sample_blocks(
+        stimulus_set, query_idx_list, w, w_row_idx, n_trial_per_query_list,
+        block_boundaries, block_seed_list, n_reference, n_highest, replace):
+    """Sample trials for blocks of queries.
 
-    Assemble complete stimulus set for a list of pre-selected query
-    indices (`query_idx_list`).
+    The trials of each query are written into consecutive rows of
+    `stimulus_set`, where each query owns `n_trial_per_query_list[i]`
+    rows. Rows are left unfilled when fewer unique trials than
+    requested are possible. When sampling with replacement, all trials
+    of a block are drawn in one vectorised call.
 
     Args:
-        query_idx_list:
-        stimulus_set:
-        w:
-        n_reference:
-        n_highest:
-        n_trial_per_query_list:
-        replace:
-        shared_exception:
+        stimulus_set: The output array.
+            shape=(sum(n_trial_per_query_list), n_reference + 1)
+        query_idx_list: An array of query indices.
+            shape=(n_query,)
+        w: The weight matrix `w` (or a subset of its rows).
+        w_row_idx: An array indicating the row of `w` corresponding to
+            each query.
+            shape=(n_query,)
+        n_trial_per_query_list: An array indicating the number of
+            trials requested for each query.
+            shape=(n_query,)
+        block_boundaries: An array indicating the first query of each
+            block followed by `n_query`.
+            shape=(n_block + 1,)
+        block_seed_list: A list of `np.random.SeedSequence` objects,
+            one for each block.
+        n_reference: The number of references of each trial.
+        n_highest: The number of highest probability references that
+            are eligible for selection. If `None`, all references are
+            eligible.
+        replace: Boolean indicating if sampling is with replacement.
+
+    Returns:
+        n_obtained_list: An array indicating the number of trials
+            obtained for each query.
+            shape=(n_query,)
 
     """
-    try:
-        stimulus_set_batch = []
-        for query_idx, n_trial_per_query in zip(
-            query_idx_list, n_trial_per_query_list
-        ):
-            w_q = w[query_idx]
-            # Set query index to zero to prohibit sampling query as reference.
-            w_q[query_idx] = 0.
-            # Mask references (if any) below the specified limit.
-            if n_highest is not None:
-                ref_priority = _mask_lowest(w_q, n_highest)
-            else:
-                ref_priority = copy.copy(w_q)
-            stimulus_set_q = sample_qr_sets(
-                query_idx, n_reference, n_trial_per_query, ref_priority,
-                replace=replace
+    n_obtained_list = np.zeros([len(query_idx_list)], dtype=int)
+    offsets = np.concatenate([[0], np.cumsum(n_trial_per_query_list)])
+    for i_block, block_seed in enumerate(block_seed_list):
+        start = block_boundaries[i_block]
+        stop = block_boundaries[i_block + 1]
+        query_idx_block = query_idx_list[start:stop]
+        w_block = np.array(w[w_row_idx[start:stop]], dtype=float)
+        # Set query index to zero to prohibit sampling query as reference.
+        w_block[np.arange(stop - start), query_idx_block] = 0.
+        # Mask references (if any) below the specified limit.
+        if n_highest is not None:
+            w_block = _mask_lowest(w_block, n_highest)
+
+        rng = np.random.default_rng(block_seed)
+        if replace:
+            stimulus_set[offsets[start]:offsets[stop]] = sample_qr_sets_batch(
+                query_idx_block, n_reference,
+                n_trial_per_query_list[start:stop], w_block, rng=rng
             )
-            stimulus_set_batch.append(stimulus_set_q)
+            n_obtained_list[start:stop] = n_trial_per_query_list[start:stop]
+        else:
+            for i_query in range(start, stop):
+                stimulus_set_q = sample_qr_sets(
+                    query_idx_list[i_query], n_reference,
+                    n_trial_per_query_list[i_query], w_block[i_query - start],
+                    replace=replace, rng=rng
+                )
+                n_obtained = stimulus_set_q.shape[0]
+                row = offsets[i_query]
+                stimulus_set[row:row + n_obtained] = stimulus_set_q
+                n_obtained_list[i_query] = n_obtained
+    return n_obtained_list
 
-        stimulus_set.extend(stimulus_set_batch)
 
-        shared_exception.put(None)
+def _remove_unfilled(stimulus_set, n_trial_per_query_list, n_obtained_list):
+    """Return a copy of the filled rows of `stimulus_set`.
+
+    Args:
+        stimulus_set: The output array of `_sample_blocks`.
+        n_trial_per_query_list: An array indicating the number of
+            trials requested for each query.
+        n_obtained_list: An array indicating the number of trials
+            obtained for each query.
 
-    except Exception as e:
-        tb = sys.exc_info()[2]
-        shared_exception.put(e.with_traceback(tb))
+    Returns:
+        stimulus_set: A new array containing only the filled rows.
+
+    """
+    if np.array_equal(n_trial_per_query_list, n_obtained_list):
+        return np.array(stimulus_set)
+    # Determine the position of each row within its query.
+    row_query = np.repeat(
+        np.arange(len(n_trial_per_query_list)), n_trial_per_query_list
+    )
+    offsets = np.cumsum(n_trial_per_query_list) - n_trial_per_query_list
+    row_position = np.arange(len(row_query)) - offsets[row_query]
+    bidx = np.less(row_position, n_obtained_list[row_query])
+    return stimulus_set[bidx]
+
+
+def _worker_generate(
+        shm_name, n_row, n_col, dtype, row_offset, query_idx_list, w_query,
+        n_trial_per_query_list, block_boundaries, block_seed_list,
+        n_reference, n_highest, replace):
+    """Launch worker sub-process.
+
+    Assemble complete stimulus set for a list of pre-selected query
+    indices (`query_idx_list`) and write it into a shared output
+    buffer.
+
+    Args:
+        shm_name: The name of the shared memory block of the output
+            buffer.
+        n_row: The number of rows of the output buffer.
+        n_col: The number of columns of the output buffer.
+        dtype: The dtype of the output buffer.
+        row_offset: The first row of the output buffer owned by this
+            worker.
+        query_idx_list: See `_sample_blocks`.
+        w_query: The rows of `w` corresponding to `query_idx_list`.
+        n_trial_per_query_list: See `_sample_blocks`.
+        block_boundaries: See `_sample_blocks`.
+        block_seed_list: See `_sample_blocks`.
+        n_reference: See `_sample_blocks`.
+        n_highest: See `_sample_blocks`.
+        replace: See `_sample_blocks`.
+
+    Returns:
+        n_obtained_list: See `_sample_blocks`.
+
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        stimulus_set = np.ndarray([n_row, n_col], dtype=dtype, buffer=shm.buf)
+        n_trial = int(np.sum(n_trial_per_query_list))
+        n_obtained_list = _sample_blocks(
+            stimulus_set[row_offset:row_offset + n_trial], query_idx_list,
+            w_query, np.arange(len(query_idx_list)), n_trial_per_query_list,
+            block_boundaries, block_seed_list, n_reference, n_highest, replace
+        )
+        # Release the view of the shared buffer before closing it.
+        del stimulus_set
+    finally:
+        shm.close()
+    return n_obtained_list
 
 
 def _mask_lowest(arr, n_unmasked, mask_value=0):
     """Mask lowest value entries.
 
     Args:
-        arr: A 1D array of values.
+        arr: An array of values. Entries are masked along the last
+            axis.
         n_unmasked: The number of entries to leave unmasked.
         mask_value (optional): The mask value.
 
     Returns:
-        arr_masked: A 1D array with mask applied.
+        arr_masked: An array with mask applied.
 
     """
     # Sort highest to lowest.
-    nn_idx = np.argsort(-arr)
+    nn_idx = np.argsort(-arr, axis=-1)
     # Select lowest values.
-    nn_idx = nn_idx[n_unmasked:]
+    nn_idx = nn_idx[..., n_unmasked:]
     # Mask lowest values.
     arr_masked = copy.copy(arr)
-    arr_masked[nn_idx] = mask_value
+    np.put_along_axis(arr_masked, nn_idx, mask_value, axis=-1)
     return arr_masked
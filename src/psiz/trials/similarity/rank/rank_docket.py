@@ -25,9 +25,13 @@ Classes:
 
 import h5py
 import numpy as np
-import pandas as pd
 import tensorflow as tf
 
+from psiz.trials.arrow_io import arrays_from_table
+from psiz.trials.arrow_io import read_parquet
+from psiz.trials.arrow_io import table_from_arrays
+from psiz.trials.arrow_io import write_parquet
+from psiz.trials.concatenate_padded import concatenate_padded
 from psiz.trials.similarity.rank.rank_trials import RankTrials
 
 
@@ -81,13 +85,14 @@ class RankDocket(RankTrials):
 
     Methods:
         save: Save the Docket object to disk.
+        to_parquet: Save the Docket object as a Parquet file.
         subset: Return a subset of unjudged trials given an index.
 
     """
 
     def __init__(
             self, stimulus_set, n_select=None, is_ranked=None,
-            mask_zero=False):
+            mask_zero=False, _config_data=None):
         """Initialize.
 
         Args:
@@ -96,6 +101,9 @@ class RankDocket(RankTrials):
             n_select (optional): See SimilarityTrials.
             is_ranked (optional): See SimilarityTrials.
             mask_zero (optional): See SimilarityTrials.
+            _config_data (optional): Private argument used by `subset`
+                and `stack` to carry over configuration data instead
+                of re-deriving it.
 
         """
         RankTrials.__init__(
@@ -104,9 +112,12 @@ class RankDocket(RankTrials):
         )
 
         # Determine unique display configurations.
-        self._set_configuration_data(
-            self.n_reference, self.n_select, self.is_ranked
-        )
+        if _config_data is None:
+            self._set_configuration_data(
+                self.n_reference, self.n_select, self.is_ranked
+            )
+        else:
+            self._set_configuration_list(*_config_data)
 
     def subset(self, index):
         """Return subset of trials as a new RankDocket object.
@@ -120,72 +131,10 @@ class RankDocket(RankTrials):
         """
         return RankDocket(
             self.stimulus_set[index, :], n_select=self.n_select[index],
-            is_ranked=self.is_ranked[index], mask_zero=self.mask_zero
+            is_ranked=self.is_ranked[index], mask_zero=self.mask_zero,
+            _config_data=self._subset_configuration_data(index)
         )
 
-    def _set_configuration_data(self, n_reference, n_select, is_ranked):
-        """Generate a unique ID for each trial configuration.
-
-        Helper function that generates a unique ID for each of the
-        unique trial configurations in the provided data set.
-
-        Args:
-            n_reference: An integer array indicating the number of
-                references in each trial.
-                shape = (n_trial,)
-            n_select: An integer array indicating the number of
-                references selected in each trial.
-                shape = (n_trial,)
-            is_ranked:  Boolean array indicating which trials had
-                selected references that were ordered.
-                shape = (n_trial,)
-
-        Notes:
-            Sets three attributes of object.
-            config_idx: A unique index for each type of trial
-                configuration.
-            config_list: A DataFrame containing all the unique
-                trial configurations.
-            outcome_idx_list: A list of the possible outcomes for each
-                trial configuration.
-
-        """
-        n_trial = len(n_reference)
-
-        # Determine unique display configurations.
-        n_outcome_placeholder = np.zeros(n_select.shape[0], dtype=np.int32)
-        d = {
-            'n_reference': n_reference, 'n_select': n_select,
-            'is_ranked': is_ranked, 'n_outcome': n_outcome_placeholder
-        }
-        df_config = pd.DataFrame(d)
-        df_config = df_config.drop_duplicates()
-        n_config = len(df_config)
-        n_out_idx = df_config.columns.get_loc("n_outcome")
-
-        # Assign display configuration ID for every observation.
-        config_idx = np.empty(n_trial, dtype=np.int32)
-        outcome_idx_list = []
-        for i_config in range(n_config):
-            # Determine number of possible outcomes for configuration.
-            outcome_idx = self._possible_rank_outcomes(
-                df_config.iloc[i_config]
-            )
-            outcome_idx_list.append(outcome_idx)
-            n_outcome = outcome_idx.shape[0]
-            df_config.iloc[i_config, n_out_idx] = n_outcome
-            # Find trials matching configuration.
-            a = (n_reference == df_config['n_reference'].iloc[i_config])
-            b = (n_select == df_config['n_select'].iloc[i_config])
-            c = (is_ranked == df_config['is_ranked'].iloc[i_config])
-            f = np.array((a, b, c))
-            display_type_locs = np.all(f, axis=0)
-            config_idx[display_type_locs] = i_config
-
-        self.config_idx = config_idx
-        self.config_list = df_config
-        self.outcome_idx_list = outcome_idx_list
-
     def save(self, filepath):
         """Save the RankDocket object as an HDF5 file.
 
@@ -201,12 +150,53 @@ class RankDocket(RankTrials):
         f.create_dataset("mask_zero", data=self.mask_zero)
         f.close()
 
-    def as_dataset(self, groups=None):
+    def to_arrow(self):
+        """Return the docket as an Arrow table.
+
+        Returns:
+            table: A pyarrow.Table.
+
+        """
+        arrays = {
+            'stimulus_set': self.stimulus_set,
+            'n_select': self.n_select,
+            'is_ranked': self.is_ranked,
+        }
+        metadata = {
+            'class_name': 'RankDocket',
+            'mask_zero': str(bool(self.mask_zero)),
+        }
+        return table_from_arrays(arrays, metadata=metadata)
+
+    def to_parquet(self, filepath, compression='snappy', row_group_size=None):
+        """Save the RankDocket object as a Parquet file.
+
+        Args:
+            filepath: String specifying the path to save the data.
+            compression (optional): The Parquet compression codec.
+            row_group_size (optional): The maximum number of trials
+                per row group.
+
+        """
+        write_parquet(
+            filepath, self.to_arrow(), compression=compression,
+            row_group_size=row_group_size
+        )
+
+    def as_dataset(self, groups=None, lazy=False):
         """Return TensorFlow dataset.
 
         Args:
             groups: ND array indicating group membership information for
                 each trial.
+            lazy (optional): Boolean indicating if the expansion of
+                each trial to all possible outcomes should be deferred
+                to the input pipeline. If `True`, the dataset only
+                stores the compact stimulus set and configuration
+                index of each trial, and the expansion is performed
+                on-the-fly using a `tf.gather` against the outcome
+                tables of each configuration. The elements of the
+                dataset are identical in both cases.
 
         Returns:
             x: A TensorFlow dataset.
@@ -217,15 +207,37 @@ class RankDocket(RankTrials):
         else:
             groups = self._check_groups(groups)
 
+        is_select = tf.constant(
+            np.expand_dims(self.is_select(compress=False), axis=2),
+            dtype=tf.bool
+        )
+        groups = tf.constant(groups, dtype=tf.int32)
+
+        if lazy:
+            expand_outcomes = self._expand_outcomes_fn()
+            ds = tf.data.Dataset.from_tensor_slices((
+                tf.constant(
+                    self.stimulus_set.astype(np.int32, copy=False)
+                ),
+                tf.constant(self.config_idx, dtype=tf.int32),
+                is_select,
+                groups
+            ))
+            return ds.map(
+                lambda stimulus_set, config_idx, is_select, groups: {
+                    'stimulus_set': expand_outcomes(stimulus_set, config_idx),
+                    'is_select': is_select,
+                    'groups': groups
+                },
+                num_parallel_calls=tf.data.AUTOTUNE
+            )
+
         # Return tensorflow dataset.
         stimulus_set = self.all_outcomes()
         x = {
             'stimulus_set': tf.constant(stimulus_set, dtype=tf.int32),
-            'is_select': tf.constant(
-                np.expand_dims(self.is_select(compress=False), axis=2),
-                dtype=tf.bool
-            ),
-            'groups': tf.constant(groups, dtype=tf.int32)
+            'is_select': is_select,
+            'groups': groups
         }
         return tf.data.Dataset.from_tensor_slices((x))
 
@@ -253,6 +265,43 @@ class RankDocket(RankTrials):
         )
         return trials
 
+    @classmethod
+    def from_arrow(cls, table):
+        """Create a docket from an Arrow table.
+
+        Args:
+            table: A pyarrow.Table created by `to_arrow`.
+
+        Returns:
+            trials: A RankDocket object.
+
+        Raises:
+            ValueError: If `table` does not contain a RankDocket.
+
+        """
+        arrays, metadata = arrays_from_table(table)
+        if metadata.get('class_name') != 'RankDocket':
+            raise ValueError('The Arrow table does not contain a RankDocket.')
+        return RankDocket(
+            arrays['stimulus_set'], n_select=arrays['n_select'],
+            is_ranked=arrays['is_ranked'],
+            mask_zero=metadata['mask_zero'] == 'True'
+        )
+
+    @classmethod
+    def from_parquet(cls, filepath):
+        """Load a docket from a Parquet file.
+
+        Args:
+            filepath: The location of the Parquet file created with
+                `to_parquet`.
+
+        Returns:
+            trials: A RankDocket object.
+
+        """
+        return cls.from_arrow(read_parquet(filepath))
+
     @classmethod
     def stack(cls, trials_list):
         """Return a RankTrials object containing all trials.
@@ -267,34 +316,22 @@ class RankDocket(RankTrials):
             A new RankTrials object.
 
         """
-        _, max_n_present, mask_zero = cls._stack_precheck(
-            trials_list
-        )
+        _, _, mask_zero = cls._stack_precheck(trials_list)
 
-        # Grab relevant information from first entry in list.
-        n_pad = max_n_present - trials_list[0].max_n_present
-        pad_width = ((0, 0), (0, n_pad))
-        stimulus_set = np.pad(
-            trials_list[0].stimulus_set, pad_width, mode='constant',
-            constant_values=cls._mask_value
+        stimulus_set = concatenate_padded(
+            [i_trials.stimulus_set for i_trials in trials_list],
+            fill_value=cls._mask_value
+        )
+        n_select = np.concatenate(
+            [i_trials.n_select for i_trials in trials_list], axis=0
+        )
+        is_ranked = np.concatenate(
+            [i_trials.is_ranked for i_trials in trials_list], axis=0
         )
-
-        n_select = trials_list[0].n_select
-        is_ranked = trials_list[0].is_ranked
-
-        for i_trials in trials_list[1:]:
-            n_pad = max_n_present - i_trials.max_n_present
-            pad_width = ((0, 0), (0, n_pad))
-            curr_stimulus_set = np.pad(
-                i_trials.stimulus_set, pad_width, mode='constant',
-                constant_values=cls._mask_value
-            )
-            stimulus_set = np.vstack((stimulus_set, curr_stimulus_set))
-            n_select = np.hstack((n_select, i_trials.n_select))
-            is_ranked = np.hstack((is_ranked, i_trials.is_ranked))
 
         trials_stacked = RankDocket(
             stimulus_set, n_select=n_select, is_ranked=is_ranked,
-            mask_zero=mask_zero
+            mask_zero=mask_zero,
+            _config_data=cls._stack_configuration_data(trials_list)
         )
         return trials_stacked
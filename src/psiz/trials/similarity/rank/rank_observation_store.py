@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Rank trials module.
+
+Classes:
+    RankObservationStore: An append-only store of 'Rank' observations.
+
+"""
+
+import numpy as np
+import pandas as pd
+
+from psiz.trials.similarity.rank.rank_observations import RankObservations
+
+
+class RankObservationStore(object):
+    """An append-only store of judged 'Rank' trials.
+
+    Intended for online data collection, where small batches of
+    observations are repeatedly added to a large history. Unlike
+    `psiz.trials.stack`, appending a batch does not reallocate or
+    re-validate the existing trials. Trials are kept in growable
+    buffers whose capacity is doubled when full (amortised constant
+    time per trial) and configuration data is updated incrementally
+    using only the configurations of the appended batch.
+
+    Attributes:
+        n_trial: The number of stored trials.
+        n_config: The number of unique trial configurations.
+        mask_zero: Boolean indicating if zero values in `stimulus_set`
+            are interpretted as a mask value.
+
+    Methods:
+        append: Append observations to the store.
+        snapshot: Return the stored trials as a RankObservations
+            object.
+
+    """
+
+    def __init__(self, mask_zero=False, capacity=1024):
+        """Initialize.
+
+        Args:
+            mask_zero (optional): A Boolean indicating if zero values
+                in `stimulus_set` should be interpretted as a mask
+                value. Only observations with the same setting can be
+                appended.
+            capacity (optional): The number of trials for which memory
+                is initially allocated.
+
+        """
+        if capacity < 1:
+            raise ValueError('Argument `capacity` must be at least 1.')
+        self.mask_zero = mask_zero
+        self.n_trial = 0
+        self._capacity = int(capacity)
+        self._data = None
+        self._max_n_present = 0
+
+        # Configuration data.
+        self._config_dict = {}
+        self._config_list_parts = []
+        self._outcome_idx_list = []
+        self._config_list = None
+
+    @property
+    def n_config(self):
+        """The number of unique trial configurations."""
+        return len(self._outcome_idx_list)
+
+    def append(self, obs):
+        """Append observations to the store.
+
+        Args:
+            obs: A RankObservations object.
+
+        Raises:
+            ValueError: If `obs` is not compatible with the store.
+
+        """
+        if obs.mask_zero != self.mask_zero:
+            raise ValueError(
+                'The appended observations must have the same `mask_zero` '
+                'setting as the store.'
+            )
+        if self._data is not None:
+            n_col = self._data['groups'].shape[1]
+            if obs.groups.shape[1] != n_col:
+                raise ValueError(
+                    'The appended observations must have {0} group '
+                    'column(s).'.format(n_col)
+                )
+            n_column = self._data['stimulus_set'].shape[1]
+            if obs.stimulus_set.shape[1] != n_column and not self.mask_zero:
+                raise ValueError(
+                    'Observations with a different number of stimuli in '
+                    'each trial can only be appended if `mask_zero=True`.'
+                )
+
+        n_trial = self.n_trial + obs.n_trial
+        self._reserve(n_trial, obs)
+
+        loc = slice(self.n_trial, n_trial)
+        n_column = obs.stimulus_set.shape[1]
+        self._data['stimulus_set'][loc, 0:n_column] = obs.stimulus_set
+        for name in (
+            'n_present', 'n_reference', 'n_select', 'is_ranked', 'groups',
+            'agent_id', 'session_id', 'weight', 'rt_ms'
+        ):
+            self._data[name][loc] = getattr(obs, name)
+        self._data['config_idx'][loc] = self._append_configurations(obs)
+        self._max_n_present = max(self._max_n_present, obs.max_n_present)
+        self.n_trial = n_trial
+
+    def _reserve(self, n_trial, obs):
+        """Grow buffers to hold `n_trial` trials and `obs` columns."""
+        n_column = obs.stimulus_set.shape[1]
+        if self._data is None:
+            self._capacity = max(self._capacity, n_trial)
+            self._data = {
+                'stimulus_set': np.full(
+                    [self._capacity, n_column], RankObservations._mask_value,
+                    dtype=np.int32
+                ),
+                'n_present': np.zeros([self._capacity], dtype=np.int32),
+                'n_reference': np.zeros([self._capacity], dtype=np.int32),
+                'n_select': np.zeros([self._capacity], dtype=np.int32),
+                'is_ranked': np.zeros([self._capacity], dtype=bool),
+                'groups': np.zeros(
+                    [self._capacity, obs.groups.shape[1]], dtype=np.int32
+                ),
+                'agent_id': np.zeros([self._capacity], dtype=np.int32),
+                'session_id': np.zeros([self._capacity], dtype=np.int32),
+                'weight': np.zeros([self._capacity], dtype=float),
+                'rt_ms': np.zeros([self._capacity], dtype=float),
+                'config_idx': np.zeros([self._capacity], dtype=np.int32),
+            }
+            return
+
+        n_column = max(n_column, self._data['stimulus_set'].shape[1])
+        if (
+            n_trial <= self._capacity and
+            n_column == self._data['stimulus_set'].shape[1]
+        ):
+            return
+
+        while self._capacity < n_trial:
+            self._capacity *= 2
+        for name, buffer in self._data.items():
+            if name == 'stimulus_set':
+                new_buffer = np.full(
+                    [self._capacity, n_column], RankObservations._mask_value,
+                    dtype=buffer.dtype
+                )
+                new_buffer[0:self.n_trial, 0:buffer.shape[1]] = (
+                    buffer[0:self.n_trial]
+                )
+            else:
+                new_buffer = np.zeros(
+                    (self._capacity,) + buffer.shape[1:], dtype=buffer.dtype
+                )
+                new_buffer[0:self.n_trial] = buffer[0:self.n_trial]
+            self._data[name] = new_buffer
+
+    def _append_configurations(self, obs):
+        """Register the configurations of `obs`.
+
+        Args:
+            obs: A RankObservations object.
+
+        Returns:
+            config_idx: The store-level configuration index of each
+                trial in `obs`.
+                shape=(obs.n_trial,)
+
+        """
+        key_columns = [
+            col for col in obs.config_list.columns if col != 'n_outcome'
+        ]
+        keys = obs.config_list[key_columns].to_numpy(dtype=np.int64)
+
+        config_map = np.empty([len(keys)], dtype=np.int32)
+        is_new = np.zeros([len(keys)], dtype=bool)
+        for i_config, key in enumerate(map(tuple, keys.tolist())):
+            idx = self._config_dict.get(key)
+            if idx is None:
+                idx = len(self._outcome_idx_list)
+                self._config_dict[key] = idx
+                self._outcome_idx_list.append(obs.outcome_idx_list[i_config])
+                is_new[i_config] = True
+            config_map[i_config] = idx
+
+        if np.any(is_new):
+            config_list = obs.config_list.iloc[np.flatnonzero(is_new)].copy()
+            config_list.index = config_list.index + self.n_trial
+            self._config_list_parts.append(config_list)
+            self._config_list = None
+
+        return config_map[obs.config_idx]
+
+    def snapshot(self):
+        """Return the stored trials as a RankObservations object.
+
+        The returned object shares memory with the store (no trials
+        are copied), is not re-validated, and its configuration data
+        is carried over from the store instead of being re-derived.
+        Later appends do not change a snapshot. The arrays of a
+        snapshot are read-only.
+
+        Returns:
+            obs: A RankObservations object.
+
+        Raises:
+            ValueError: If the store is empty.
+
+        """
+        if self.n_trial == 0:
+            raise ValueError('The store does not contain any trials.')
+
+        if self._config_list is None:
+            self._config_list = pd.concat(self._config_list_parts)
+            self._config_list_parts = [self._config_list]
+
+        view = {}
+        for name, buffer in self._data.items():
+            view[name] = buffer[0:self.n_trial]
+            view[name].flags.writeable = False
+
+        config_idx = view.pop('config_idx')
+        return RankObservations._from_valid_arrays(
+            view, self.mask_zero, self._max_n_present, (
+                config_idx, self._config_list.copy(),
+                list(self._outcome_idx_list)
+            )
+        )
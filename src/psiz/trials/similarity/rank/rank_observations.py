@@ -24,14 +24,25 @@ Classes:
 """
 
 import copy
+from math import perm
 
 import h5py
 import numpy as np
-import pandas as pd
 import tensorflow as tf
 from tensorflow.keras import backend as K
 
+from psiz.trials.arrow_io import arrays_from_table
+from psiz.trials.arrow_io import read_parquet
+from psiz.trials.arrow_io import table_from_arrays
+from psiz.trials.arrow_io import trial_filters
+from psiz.trials.arrow_io import write_parquet
+from psiz.trials.compact_dtype import compact_int
+from psiz.trials.concatenate_padded import concatenate_padded
+from psiz.trials.hdf5_io import create_hdf5_dataset
+from psiz.trials.hdf5_io import read_hdf5_dataset
 from psiz.trials.similarity.rank.rank_trials import RankTrials
+from psiz.trials.stream_blocks import stream_blocks
+from psiz.trials.subset_view import SubsetView
 
 
 class RankObservations(RankTrials):
@@ -106,15 +117,23 @@ class RankObservations(RankTrials):
 
     Methods:
         subset: Return a subset of judged trials given an index.
+        view: Return a lazy subset of judged trials given an index.
         set_groups: Override the group ID of all trials.
         set_weight: Override the weight of all trials.
         save: Save the observations data structure to disk.
+        to_parquet: Save the observations as a Parquet file.
 
     """
 
+    # Trial-level arrays that are subset by indexing their first axis.
+    _row_attributes = (
+        'n_present', 'n_reference', 'n_select', 'is_ranked', 'groups',
+        'agent_id', 'session_id', 'weight', 'rt_ms'
+    )
+
     def __init__(self, stimulus_set, n_select=None, is_ranked=None,
                  mask_zero=False, groups=None, agent_id=None, session_id=None,
-                 weight=None, rt_ms=None):
+                 weight=None, rt_ms=None, _config_data=None):
         """Initialize.
 
         Extends initialization of SimilarityTrials.
@@ -149,6 +168,9 @@ class RankObservations(RankTrials):
             rt_ms(optional): An array indicating the response time (in
                 milliseconds) of the agent for each trial.
                 shape = (n_trial,1)
+            _config_data (optional): Private argument used by `subset`
+                and `stack` to carry over configuration data instead
+                of re-deriving it.
 
         """
         RankTrials.__init__(
@@ -188,9 +210,13 @@ class RankObservations(RankTrials):
         self.rt_ms = rt_ms
 
         # Determine unique display configurations.
-        self._set_configuration_data(
-            self.n_reference, self.n_select, self.is_ranked, self.groups
-        )
+        if _config_data is None:
+            self._set_configuration_data(
+                self.n_reference, self.n_select, self.is_ranked,
+                groups=self.groups
+            )
+        else:
+            self._set_configuration_list(*_config_data)
 
     def _check_agent_id(self, agent_id):
         """Check the argument agent_id."""
@@ -251,6 +277,10 @@ class RankObservations(RankTrials):
     def subset(self, index):
         """Return subset of trials as a new RankObservations object.
 
+        Since the trials of a subset are already valid, the subset is
+        not re-validated and its configuration data is carried over
+        from this object.
+
         Args:
             index: The indices corresponding to the subset.
 
@@ -258,82 +288,67 @@ class RankObservations(RankTrials):
             A new RankObservations object.
 
         """
-        return RankObservations(
-            self.stimulus_set[index, :], n_select=self.n_select[index],
-            is_ranked=self.is_ranked[index], mask_zero=self.mask_zero,
-            groups=self.groups[index], agent_id=self.agent_id[index],
-            session_id=self.session_id[index], weight=self.weight[index],
-            rt_ms=self.rt_ms[index]
+        trials = copy.copy(self)
+        for name in ('stimulus_set',) + self._row_attributes:
+            setattr(trials, name, getattr(self, name)[index])
+        trials.n_trial = trials.n_present.shape[0]
+        trials.max_n_present = np.amax(trials.n_present)
+        trials.max_n_reference = np.amax(trials.n_reference)
+        trials.stimulus_set = (
+            trials.stimulus_set[:, 0:trials.max_n_reference + 1]
+        )
+        trials._set_configuration_list(
+            *self._subset_configuration_data(index)
         )
+        return trials
 
-    def _set_configuration_data(
-            self, n_reference, n_select, is_ranked, groups):
-        """Generate a unique ID for each trial configuration.
+    @classmethod
+    def _from_valid_arrays(cls, data, mask_zero, max_n_present, config_data):
+        """Return observations assembled from valid trial-level arrays.
 
-        Helper function that generates a unique ID for each of the
-        unique trial configurations in the provided data set.
+        Unlike the constructor, the arrays are neither validated nor
+        copied and the configuration data is carried over instead of
+        being re-derived.
 
         Args:
-            n_reference: An integer array indicating the number of
-                references in each trial.
-                shape = (n_trial,)
-            n_select: An integer array indicating the number of
-                references selected in each trial.
-                shape = (n_trial,)
-            is_ranked:  Boolean array indicating which trials had
-                selected references that were ordered.
-                shape = (n_trial,)
-            groups:
-                shape = (n_trial,)
+            data: A dictionary of trial-level arrays with the keys
+                'stimulus_set', 'n_present', 'n_reference', 'n_select',
+                'is_ranked', 'groups', 'agent_id', 'session_id',
+                'weight' and 'rt_ms'.
+            mask_zero: See SimilarityTrials.
+            max_n_present: The maximum of `data['n_present']`.
+            config_data: A tuple of configuration data that can be
+                passed to `_set_configuration_list`.
 
-        Notes:
-            Sets three attributes of object.
-            config_idx: A unique index for each type of trial
-                configuration.
-            config_list: A DataFrame containing all the unique
-                trial configurations.
-            outcome_idx_list: A list of the possible outcomes for each
-                trial configuration.
+        Returns:
+            A new RankObservations object.
 
         """
-        n_trial = len(n_reference)
+        trials = cls.__new__(cls)
+        trials.mask_zero = mask_zero
+        for name, value in data.items():
+            setattr(trials, name, value)
+        trials.n_trial = data['n_present'].shape[0]
+        trials.max_n_present = max_n_present
+        trials.max_n_reference = max_n_present - 1
+        trials.stimulus_set = trials.stimulus_set[:, 0:max_n_present]
+        trials._set_configuration_list(*config_data)
+        return trials
 
-        # Determine unique display configurations by create a dictionary on
-        # which to determine distinct configurations.
-        d = {
-            'n_reference': n_reference, 'n_select': n_select,
-            'is_ranked': is_ranked
-        }
-        d_groups = self._split_groups_columns(groups)
-        d.update(d_groups)
-        df_config = pd.DataFrame(d)
-        df_config = df_config.drop_duplicates()
-        n_config = len(df_config)
-
-        # Loop over distinct configurations in order to determine
-        # configuration index for all trials.
-        n_outcome = np.zeros(n_config, dtype=np.int32)
-
-        # Assign display configuration index for every observation.
-        config_idx = np.zeros(n_trial, dtype=np.int32)
-        outcome_idx_list = []
-        for i_config in range(n_config):
-            # Determine number of possible outcomes for configuration.
-            outcome_idx = self._possible_rank_outcomes(
-                df_config.iloc[i_config]
-            )
-            outcome_idx_list.append(outcome_idx)
-            n_outcome[i_config] = outcome_idx.shape[0]
+    def view(self, index):
+        """Return a lazy subset of trials.
 
-            bidx = self._find_trials_matching_config(df_config.iloc[i_config])
-            config_idx[bidx] = i_config
+        Unlike `subset`, no trial data is copied until the view is
+        used, see `psiz.trials.SubsetView`.
 
-        # Add n_outcome to `df_config`.
-        df_config['n_outcome'] = n_outcome
+        Args:
+            index: The indices corresponding to the subset.
+
+        Returns:
+            A SubsetView object.
 
-        self.config_idx = config_idx
-        self.config_list = df_config
-        self.outcome_idx_list = outcome_idx_list
+        """
+        return SubsetView(self, index)
 
     def set_groups(self, groups):
         """Override the existing groups.
@@ -348,7 +363,7 @@ class RankObservations(RankTrials):
 
         # Re-derive unique display configurations.
         self._set_configuration_data(
-            self.n_reference, self.n_select, self.is_ranked, groups
+            self.n_reference, self.n_select, self.is_ranked, groups=groups
         )
 
     def set_weight(self, weight):
@@ -365,29 +380,133 @@ class RankObservations(RankTrials):
             weight = self._check_weight(weight)
         self.weight = copy.copy(weight)
 
-    def save(self, filepath):
+    def compact(self):
+        """Store trial data using the narrowest dtypes.
+
+        Extends `RankTrials.compact`. The integer arrays `groups`,
+        `agent_id` and `session_id` are also narrowed and the float
+        arrays `weight` and `rt_ms` are stored as `float32`.
+
+        Returns:
+            self
+
+        """
+        RankTrials.compact(self)
+        self.groups = compact_int(self.groups)
+        self.agent_id = compact_int(self.agent_id)
+        self.session_id = compact_int(self.session_id)
+        self.weight = self.weight.astype(np.float32, copy=False)
+        self.rt_ms = self.rt_ms.astype(np.float32, copy=False)
+        return self
+
+    def save(self, filepath, chunk_size=None, compression=None):
         """Save the RankObservations object as an HDF5 file.
 
         Args:
             filepath: String specifying the path to save the data.
+            chunk_size (optional): The number of trials per HDF5
+                chunk. By default, datasets are stored contiguously
+                unless `compression` is provided.
+            compression (optional): A compression filter supported by
+                h5py (e.g., 'gzip' or 'lzf'). Compressed datasets are
+                always chunked.
+
+        Notes:
+            Contiguous (uncompressed and unchunked) files can be
+            memory-mapped when loaded, see `load`. Chunked files
+            support efficient partial loading of trials.
 
         """
         f = h5py.File(filepath, "w")
         f.create_dataset("class_name", data="RankObservations")
-        f.create_dataset("stimulus_set", data=self.stimulus_set)
-        f.create_dataset("n_select", data=self.n_select)
-        f.create_dataset("is_ranked", data=self.is_ranked)
         f.create_dataset("mask_zero", data=self.mask_zero)
-        f.create_dataset("groups", data=self.groups)
-        f.create_dataset("agent_id", data=self.agent_id)
-        f.create_dataset("session_id", data=self.session_id)
-        f.create_dataset("weight", data=self.weight)
-        f.create_dataset("rt_ms", data=self.rt_ms)
+        # Store the maximum number of outcomes so that the element shape
+        # of a streamed dataset is known without reading all trials.
+        f.create_dataset(
+            "max_n_outcome",
+            data=int(np.max(self.config_list['n_outcome'].values))
+        )
+        for name in (
+            "stimulus_set", "n_select", "is_ranked", "groups", "agent_id",
+            "session_id", "weight", "rt_ms"
+        ):
+            create_hdf5_dataset(
+                f, name, getattr(self, name), chunk_size=chunk_size,
+                compression=compression
+            )
         f.close()
 
-    def as_dataset(self):
+    def to_arrow(self):
+        """Return the observations as an Arrow table.
+
+        Each trial-level attribute is stored as a column. The columns
+        of `groups` are stored separately (i.e., 'groups_0', ...) so
+        that they can be used to filter trials, see `from_parquet`.
+
+        Returns:
+            table: A pyarrow.Table.
+
+        """
+        arrays = {
+            'stimulus_set': self.stimulus_set,
+            'n_select': self.n_select,
+            'is_ranked': self.is_ranked,
+        }
+        arrays.update(self._split_groups_columns(self.groups))
+        arrays.update({
+            'agent_id': self.agent_id,
+            'session_id': self.session_id,
+            'weight': self.weight,
+            'rt_ms': self.rt_ms,
+        })
+        metadata = {
+            'class_name': 'RankObservations',
+            'mask_zero': str(bool(self.mask_zero)),
+        }
+        return table_from_arrays(arrays, metadata=metadata)
+
+    def to_parquet(self, filepath, compression='snappy', row_group_size=None):
+        """Save the RankObservations object as a Parquet file.
+
+        Args:
+            filepath: String specifying the path to save the data.
+            compression (optional): The Parquet compression codec.
+            row_group_size (optional): The maximum number of trials
+                per row group. Smaller row groups allow filters to skip
+                more data when loading, see `from_parquet`.
+
+        """
+        write_parquet(
+            filepath, self.to_arrow(), compression=compression,
+            row_group_size=row_group_size
+        )
+
+    def as_dataset(self, all_outcomes=True, lazy=False):
         """Format necessary data as Tensorflow.data.Dataset object.
 
+        Args:
+            all_outcomes (optional): Boolean indicating if the stimulus
+                set of each trial should be expanded to all possible
+                outcomes. If `False`, only the observed outcome is
+                included, which makes the size of the dataset (and the
+                cost of a forward pass) independent of the number of
+                possible outcomes. In this case, the targets `y` have
+                two columns: the observed outcome and all other
+                outcomes (see `psiz.keras.layers.RankBehavior`). This
+                is sufficient for training and evaluation, but not for
+                predicting the probability of every outcome.
+            lazy (optional): Boolean indicating if the expansion of
+                each trial to all possible outcomes should be deferred
+                to the input pipeline. If `True`, the dataset only
+                stores the compact stimulus set and configuration
+                index of each trial, and the expansion (as well as the
+                one-hot targets) are computed on-the-fly using a
+                `tf.gather` against the outcome tables of each
+                configuration. This avoids multiplying the memory of
+                the dataset by the maximum number of outcomes. The
+                elements of the dataset are identical in both cases.
+                Ignored if `all_outcomes=False`.
+
         Returns:
             ds_obs: The data necessary for inference, formatted as a
             tf.data.Dataset object.
@@ -403,48 +522,126 @@ class RankObservations(RankTrials):
         # NOTE: The dimensions of inputs are expanded to have an additional
         # singleton third dimension to indicate that there is only one outcome
         # that we are interested for each trial.
-        stimulus_set = self.all_outcomes()
+        if all_outcomes and lazy:
+            return self._as_lazy_dataset()
+
+        # Create dataset.
+        ds_obs = tf.data.Dataset.from_tensor_slices(
+            self._as_arrays(all_outcomes=all_outcomes)
+        )
+        return ds_obs
+
+    def _as_arrays(self, all_outcomes=True):
+        """Return the data of `as_dataset` as NumPy arrays.
+
+        See `as_dataset` for details.
+
+        Returns:
+            x: A dictionary of model inputs.
+            y: The one-hot targets.
+            w: The observation weights.
+
+        """
+        if all_outcomes:
+            stimulus_set = self.all_outcomes()
+            n_outcome = stimulus_set.shape[2]
+        else:
+            stimulus_set = np.expand_dims(
+                self.stimulus_set.astype(np.int32, copy=False), axis=2
+            )
+            n_outcome = 2
         x = {
             'stimulus_set': stimulus_set,
             'is_select': np.expand_dims(
                 self.is_select(compress=False), axis=2
             ),
-            'groups': self.groups
+            'groups': self.groups.astype(np.int32, copy=False)
         }
         # NOTE: The outputs `y` indicate a one-hot encoding of the outcome
         # that occurred.
-        y = np.zeros([self.n_trial, stimulus_set.shape[2]])
+        y = np.zeros([self.n_trial, n_outcome], dtype=K.floatx())
         y[:, 0] = 1
 
-        y = tf.constant(y, dtype=K.floatx())
-
         # Observation weight.
-        w = tf.constant(self.weight, dtype=K.floatx())
+        w = np.asarray(self.weight, dtype=K.floatx())
+        return x, y, w
 
-        # Create dataset.
-        ds_obs = tf.data.Dataset.from_tensor_slices((x, y, w))
-        return ds_obs
+    def _as_lazy_dataset(self):
+        """Return dataset that expands outcomes on-the-fly.
+
+        See `as_dataset` for details.
+
+        """
+        expand_outcomes = self._expand_outcomes_fn()
+        n_outcome = int(np.max(self.config_list['n_outcome'].values))
+
+        # NOTE: Arrays keep their (possibly compact) dtype in the
+        # dataset and are only widened element-wise.
+        ds_obs = tf.data.Dataset.from_tensor_slices((
+            tf.constant(self.stimulus_set),
+            tf.constant(self.config_idx, dtype=tf.int32),
+            tf.constant(
+                np.expand_dims(self.is_select(compress=False), axis=2)
+            ),
+            tf.constant(self.groups),
+            tf.constant(self.weight)
+        ))
+
+        def expand(stimulus_set, config_idx, is_select, groups, w):
+            x = {
+                'stimulus_set': tf.cast(
+                    expand_outcomes(stimulus_set, config_idx), tf.int32
+                ),
+                'is_select': is_select,
+                'groups': tf.cast(groups, tf.int32)
+            }
+            w = tf.cast(w, K.floatx())
+            # NOTE: The outputs `y` indicate a one-hot encoding of the
+            # outcome that occurred.
+            y = tf.one_hot(0, n_outcome, dtype=K.floatx())
+            return x, y, w
+
+        return ds_obs.map(expand, num_parallel_calls=tf.data.AUTOTUNE)
 
     @classmethod
-    def load(cls, filepath):
+    def load(cls, filepath, index=None, mmap_mode=None, compact=False):
         """Load trials.
 
         Args:
             filepath: The location of the hdf5 file to load.
+            index (optional): The indices of the trials to load. Only
+                the HDF5 chunks containing the requested trials are
+                read. By default, all trials are loaded.
+            mmap_mode (optional): If provided, contiguously stored
+                datasets (see `save`) are memory-mapped using this mode
+                instead of being read into memory, see `numpy.memmap`.
+                Use 'r' for read-only or 'c' for copy-on-write access
+                (writable modes are not supported). Memory-mapped
+                rows are only read from disk when accessed (e.g., by
+                `subset`).
+            compact (optional): Boolean indicating if the loaded
+                trials should use compact dtypes, see `compact`.
 
         """
         f = h5py.File(filepath, "r")
-        stimulus_set = f["stimulus_set"][()]
-        n_select = f["n_select"][()]
-        is_ranked = f["is_ranked"][()]
+
+        def read(name):
+            return read_hdf5_dataset(
+                f, name, index=index, mmap_mode=mmap_mode
+            )
+
+        stimulus_set = read("stimulus_set")
+        n_select = read("n_select")
+        is_ranked = read("is_ranked")
+        n_trial = len(n_select)
         try:
             mask_zero = f["mask_zero"][()]
         except KeyError:
             mask_zero = False
         try:
-            groups = f["groups"][()]
+            groups = read("groups")
         except KeyError:
-            groups = f["group_id"][()]
+            groups = read("group_id")
             # Patch for old saving assumptions.
             # pylint: disable=no-member
             if groups.ndim == 1:
@@ -452,21 +649,21 @@ class RankObservations(RankTrials):
 
         # For backwards compatability.
         if "weight" in f:
-            weight = f["weight"][()]
+            weight = read("weight")
         else:
-            weight = np.ones((len(n_select)))
+            weight = np.ones((n_trial))
         if "rt_ms" in f:
-            rt_ms = f["rt_ms"][()]
+            rt_ms = read("rt_ms")
         else:
-            rt_ms = -np.ones((len(n_select)))
+            rt_ms = -np.ones((n_trial))
         if "agent_id" in f:
-            agent_id = f["agent_id"][()]
+            agent_id = read("agent_id")
         else:
-            agent_id = np.zeros((len(n_select)))
+            agent_id = np.zeros((n_trial))
         if "session_id" in f:
-            session_id = f["session_id"][()]
+            session_id = read("session_id")
         else:
-            session_id = np.zeros((len(n_select)))
+            session_id = np.zeros((n_trial))
         f.close()
 
         trials = RankObservations(
@@ -474,8 +671,136 @@ class RankObservations(RankTrials):
             mask_zero=mask_zero, groups=groups, agent_id=agent_id,
             session_id=session_id, weight=weight, rt_ms=rt_ms
         )
+        if compact:
+            trials.compact()
         return trials
 
+    @classmethod
+    def from_arrow(cls, table):
+        """Create observations from an Arrow table.
+
+        Columns are converted to NumPy without copying whenever
+        possible.
+
+        Args:
+            table: A pyarrow.Table created by `to_arrow`.
+
+        Returns:
+            trials: A RankObservations object.
+
+        Raises:
+            ValueError: If `table` does not contain RankObservations.
+
+        """
+        arrays, metadata = arrays_from_table(table)
+        if metadata.get('class_name') != 'RankObservations':
+            raise ValueError(
+                'The Arrow table does not contain RankObservations.'
+            )
+        return RankObservations(
+            arrays['stimulus_set'], n_select=arrays['n_select'],
+            is_ranked=arrays['is_ranked'],
+            mask_zero=metadata['mask_zero'] == 'True',
+            groups=cls._merge_groups_columns(arrays),
+            agent_id=arrays['agent_id'], session_id=arrays['session_id'],
+            weight=arrays['weight'], rt_ms=arrays['rt_ms']
+        )
+
+    @classmethod
+    def from_parquet(
+            cls, filepath, agent_id=None, session_id=None, groups=None):
+        """Load observations from a Parquet file.
+
+        Trials can be selected by agent, session and group. The
+        selection is pushed down to the Parquet reader, so row groups
+        that do not contain selected trials are skipped.
+
+        Args:
+            filepath: The location of the Parquet file created with
+                `to_parquet`.
+            agent_id (optional): An array-like of agent IDs to load.
+            session_id (optional): An array-like of session IDs to
+                load.
+            groups (optional): A dictionary mapping a column of
+                `groups` to an array-like of group IDs to load. For
+                example, `{0: [1, 2]}` loads trials whose first
+                `groups` column is either 1 or 2.
+
+        Returns:
+            trials: A RankObservations object.
+
+        """
+        filters = trial_filters(
+            agent_id=agent_id, session_id=session_id, groups=groups
+        )
+        return cls.from_arrow(read_parquet(filepath, filters=filters))
+
+    @classmethod
+    def stream_dataset(
+            cls, filepath, all_outcomes=True, block_size=None,
+            shuffle_buffer_size=None, seed=None):
+        """Return a dataset that streams observations from a file.
+
+        Blocks of trials are read from an HDF5 file (created with
+        `save`) on demand, so the file does not need to fit in memory.
+        Use chunked storage (see `save`) with a chunk size that divides
+        `block_size` for efficient reads. Without shuffling, the
+        elements are identical to those of `as_dataset`.
+
+        Args:
+            filepath: The location of the hdf5 file.
+            all_outcomes (optional): See `as_dataset`.
+            block_size (optional): The number of trials that are read
+                at once.
+            shuffle_buffer_size (optional): If provided, the order of
+                the blocks is shuffled and trials are shuffled using a
+                buffer of this size.
+            seed (optional): The random seed used for shuffling.
+
+        Returns:
+            ds_obs: A tf.data.Dataset object.
+
+        """
+        f = h5py.File(filepath, "r")
+        n_trial, n_column = f["stimulus_set"].shape
+        groups_shape = f["groups"].shape[1:]
+        try:
+            max_n_outcome = int(f["max_n_outcome"][()])
+        except KeyError:
+            # Files saved by earlier versions do not store the number
+            # of outcomes, so it is bounded using the maximum number of
+            # references and selections.
+            max_n_outcome = perm(
+                n_column - 1, int(np.max(f["n_select"][()]))
+            )
+        f.close()
+
+        if all_outcomes:
+            n_outcome = max_n_outcome
+            stimulus_set_shape = [n_column, max_n_outcome]
+        else:
+            n_outcome = 2
+            stimulus_set_shape = [n_column, 1]
+        element_shape = (
+            {
+                'stimulus_set': tf.TensorShape(stimulus_set_shape),
+                'is_select': tf.TensorShape([n_column, 1]),
+                'groups': tf.TensorShape(groups_shape),
+            },
+            tf.TensorShape([n_outcome]),
+            tf.TensorShape([])
+        )
+
+        def load_fn(index):
+            obs = cls.load(filepath, index=index)
+            return obs._as_arrays(all_outcomes=all_outcomes)
+
+        return stream_blocks(
+            load_fn, n_trial, block_size=block_size,
+            shuffle_buffer_size=shuffle_buffer_size, seed=seed,
+            element_shape=element_shape
+        )
+
     @classmethod
     def stack(cls, trials_list):
         """Return a RankTrials object containing all trials.
@@ -490,44 +815,38 @@ class RankObservations(RankTrials):
             A new RankTrials object.
 
         """
-        _, max_n_present, mask_zero = cls._stack_precheck(
-            trials_list
-        )
+        _, _, mask_zero = cls._stack_precheck(trials_list)
 
-        # Grab relevant information from first entry in list.
-        n_pad = max_n_present - trials_list[0].max_n_present
-        pad_width = ((0, 0), (0, n_pad))
-        stimulus_set = np.pad(
-            trials_list[0].stimulus_set,
-            pad_width, mode='constant', constant_values=cls._mask_value
+        stimulus_set = concatenate_padded(
+            [i_trials.stimulus_set for i_trials in trials_list],
+            fill_value=cls._mask_value
+        )
+        n_select = np.concatenate(
+            [i_trials.n_select for i_trials in trials_list], axis=0
+        )
+        is_ranked = np.concatenate(
+            [i_trials.is_ranked for i_trials in trials_list], axis=0
+        )
+        groups = np.concatenate(
+            [i_trials.groups for i_trials in trials_list], axis=0
+        )
+        agent_id = np.concatenate(
+            [i_trials.agent_id for i_trials in trials_list], axis=0
+        )
+        session_id = np.concatenate(
+            [i_trials.session_id for i_trials in trials_list], axis=0
+        )
+        weight = np.concatenate(
+            [i_trials.weight for i_trials in trials_list], axis=0
+        )
+        rt_ms = np.concatenate(
+            [i_trials.rt_ms for i_trials in trials_list], axis=0
         )
-        n_select = trials_list[0].n_select
-        is_ranked = trials_list[0].is_ranked
-        groups = trials_list[0].groups
-        agent_id = trials_list[0].agent_id
-        session_id = trials_list[0].session_id
-        weight = trials_list[0].weight
-        rt_ms = trials_list[0].rt_ms
-
-        for i_trials in trials_list[1:]:
-            n_pad = max_n_present - i_trials.max_n_present
-            pad_width = ((0, 0), (0, n_pad))
-            curr_stimulus_set = np.pad(
-                i_trials.stimulus_set,
-                pad_width, mode='constant', constant_values=cls._mask_value
-            )
-            stimulus_set = np.vstack((stimulus_set, curr_stimulus_set))
-            n_select = np.hstack((n_select, i_trials.n_select))
-            is_ranked = np.hstack((is_ranked, i_trials.is_ranked))
-            groups = np.vstack((groups, i_trials.groups))
-            agent_id = np.hstack((agent_id, i_trials.agent_id))
-            session_id = np.hstack((session_id, i_trials.session_id))
-            weight = np.hstack((weight, i_trials.weight))
-            rt_ms = np.hstack((rt_ms, i_trials.rt_ms))
 
         trials_stacked = RankObservations(
             stimulus_set, n_select=n_select, is_ranked=is_ranked,
             groups=groups, agent_id=agent_id, session_id=session_id,
-            weight=weight, rt_ms=rt_ms, mask_zero=mask_zero
+            weight=weight, rt_ms=rt_ms, mask_zero=mask_zero,
+            _config_data=cls._stack_configuration_data(trials_list)
         )
         return trials_stacked
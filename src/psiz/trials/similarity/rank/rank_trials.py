@@ -27,7 +27,10 @@ from abc import ABCMeta
 from itertools import permutations
 
 import numpy as np
+import pandas as pd
+import tensorflow as tf
 
+from psiz.trials.compact_dtype import compact_int
 from psiz.trials.similarity.similarity_trials import SimilarityTrials
 
 
@@ -149,6 +152,173 @@ class RankTrials(SimilarityTrials, metaclass=ABCMeta):
                 "trial(s).").format(n_bad))
         return is_ranked
 
+    def _set_configuration_data(
+            self, n_reference, n_select, is_ranked, groups=None):
+        """Generate a unique ID for each trial configuration.
+
+        Helper function that generates a unique ID for each of the
+        unique trial configurations in the provided data set.
+        Configurations are ordered by their first occurrence.
+
+        Args:
+            n_reference: An integer array indicating the number of
+                references in each trial.
+                shape = (n_trial,)
+            n_select: An integer array indicating the number of
+                references selected in each trial.
+                shape = (n_trial,)
+            is_ranked:  Boolean array indicating which trials had
+                selected references that were ordered.
+                shape = (n_trial,)
+            groups (optional): An integer 2D array indicating the
+                group membership of each trial. If provided, groups
+                also determine unique configurations.
+                shape = (n_trial, n_col)
+
+        Notes:
+            Sets three attributes of object.
+            config_idx: A unique index for each type of trial
+                configuration.
+            config_list: A DataFrame containing all the unique
+                trial configurations.
+            outcome_idx_list: A list of the possible outcomes for each
+                trial configuration.
+
+        """
+        d = {
+            'n_reference': n_reference, 'n_select': n_select,
+            'is_ranked': is_ranked
+        }
+        if groups is not None:
+            d.update(self._split_groups_columns(groups))
+
+        keys = np.stack(
+            [np.asarray(value, dtype=np.int64) for value in d.values()],
+            axis=1
+        )
+        first_idx, config_idx = _unique_first_occurrence(keys)
+        df_config = pd.DataFrame(
+            {key: value[first_idx] for key, value in d.items()},
+            index=first_idx
+        )
+        self._set_configuration_list(config_idx, df_config)
+
+    def _set_configuration_list(
+            self, config_idx, config_list, outcome_idx_list=None):
+        """Set configuration attributes.
+
+        Args:
+            config_idx: An integer array indicating the configuration
+                of each trial.
+                shape = (n_trial,)
+            config_list: A DataFrame containing all the unique trial
+                configurations.
+            outcome_idx_list (optional): A list of the possible
+                outcomes for each trial configuration. If not provided,
+                the possible outcomes (and the column 'n_outcome' of
+                `config_list`) are derived from `config_list`.
+
+        """
+        if outcome_idx_list is None:
+            # Configurations that only differ in groups share outcomes.
+            outcome_dict = {}
+            outcome_idx_list = []
+            for i_config in range(len(config_list)):
+                row = config_list.iloc[i_config]
+                key = (int(row['n_reference']), int(row['n_select']))
+                if key not in outcome_dict:
+                    outcome_dict[key] = self._possible_rank_outcomes(row)
+                outcome_idx_list.append(outcome_dict[key])
+            config_list['n_outcome'] = np.array(
+                [outcome_idx.shape[0] for outcome_idx in outcome_idx_list],
+                dtype=np.int32
+            )
+
+        self.config_idx = config_idx.astype(np.int32, copy=False)
+        self.config_list = config_list
+        self.outcome_idx_list = outcome_idx_list
+
+    def _subset_configuration_data(self, index):
+        """Return the configuration data of a subset of trials.
+
+        Args:
+            index: The indices corresponding to the subset.
+
+        Returns:
+            A tuple of configuration data that can be passed to
+            `_set_configuration_list`.
+
+        """
+        first_idx, config_idx = _unique_first_occurrence(
+            self.config_idx[index]
+        )
+        kept = self.config_idx[index][first_idx]
+        config_list = self.config_list.iloc[kept].copy()
+        config_list.index = first_idx
+        outcome_idx_list = [self.outcome_idx_list[i] for i in kept]
+        return (config_idx, config_list, outcome_idx_list)
+
+    @classmethod
+    def _stack_configuration_data(cls, trials_list):
+        """Return the configuration data of stacked trials.
+
+        Args:
+            trials_list: A tuple of RankTrials objects to be stacked.
+
+        Returns:
+            A tuple of configuration data that can be passed to
+            `_set_configuration_list`.
+
+        """
+        config_list = pd.concat(
+            [i_trials.config_list for i_trials in trials_list]
+        )
+        key_columns = [
+            col for col in config_list.columns if col != 'n_outcome'
+        ]
+        keys = config_list[key_columns].to_numpy(dtype=np.int64)
+        first_row, row_config_idx = _unique_first_occurrence(keys)
+
+        config_offset = 0
+        trial_offset = 0
+        config_idx = []
+        first_trial_idx = []
+        outcome_idx_list = []
+        for i_trials in trials_list:
+            config_idx.append(
+                row_config_idx[config_offset + i_trials.config_idx]
+            )
+            first_trial_idx.append(
+                i_trials.config_list.index.to_numpy() + trial_offset
+            )
+            outcome_idx_list.extend(i_trials.outcome_idx_list)
+            config_offset += len(i_trials.config_list)
+            trial_offset += i_trials.n_trial
+        config_idx = np.concatenate(config_idx)
+        first_trial_idx = np.concatenate(first_trial_idx)
+
+        config_list = config_list.iloc[first_row].copy()
+        config_list.index = first_trial_idx[first_row]
+        outcome_idx_list = [outcome_idx_list[i] for i in first_row]
+        return (config_idx, config_list, outcome_idx_list)
+
+    def compact(self):
+        """Store trial data using the narrowest dtypes.
+
+        Integer arrays are cast to the narrowest integer dtype that
+        holds their values (e.g., `uint16` for `stimulus_set` if there
+        are fewer than 65536 stimuli). Arrays are widened again when
+        exported (e.g., by `as_dataset`). Saved files use the compact
+        dtypes as well.
+
+        Returns:
+            self
+
+        """
+        self.stimulus_set = compact_int(self.stimulus_set)
+        self.n_select = compact_int(self.n_select)
+        return self
+
     def is_select(self, compress=False):
         """Indicate if a stimulus was selected.
 
@@ -191,59 +361,116 @@ class RankTrials(SimilarityTrials, metaclass=ABCMeta):
         return is_select
 
     def all_outcomes(self):
-        """Inflate stimulus set for all possible outcomes."""
-        outcome_idx_list = self.outcome_idx_list
-        n_outcome_list = self.config_list['n_outcome'].values
-        max_n_outcome = np.max(n_outcome_list)
-        n_config = self.config_list.shape[0]
-
-        # Can use mask value regardless of whether `mask_zero=True` since if
-        # not True, all cells will be updated.
-        stimulus_set_expand = np.full(
-            [self.n_trial, self.max_n_reference + 1, max_n_outcome],
-            self._mask_value, dtype=np.int32
+        """Inflate stimulus set for all possible outcomes.
+
+        Returns:
+            stimulus_set_expand: An integer array containing the
+                stimulus set of every possible outcome of each trial.
+                Outcomes that do not exist for a trial's configuration
+                are filled with the mask value.
+                shape=(n_trial, max_n_reference + 1, max_n_outcome)
+
+        """
+        gather_table = self._outcome_gather_table()
+
+        # Append a column of mask values that is targeted by placeholder
+        # outcomes.
+        stimulus_set = np.hstack([
+            self.stimulus_set,
+            np.full([self.n_trial, 1], self._mask_value, dtype=np.int32)
+        ])
+        stimulus_set_expand = np.take_along_axis(
+            np.expand_dims(stimulus_set, axis=2),
+            gather_table[self.config_idx], axis=1
+        )
+        return stimulus_set_expand.astype(np.int32, copy=False)
+
+    def _outcome_gather_table(self):
+        """Return the outcome gather table of each configuration.
+
+        The table is cached and only rebuilt if the configuration data
+        changes.
+
+        Returns:
+            gather_table: An integer array of relative indices into a
+                stimulus set (with an appended column of mask values)
+                for every configuration. Column `i` of a
+                configuration's table assembles the stimulus set of
+                the i-th possible outcome. The query stimulus stays in
+                the same spot regardless of outcome, the references
+                are permuted according to `outcome_idx_list`, and
+                placeholder columns are left in place. Outcomes that
+                do not exist for a configuration point at the appended
+                mask column.
+                shape=(n_config, max_n_reference + 1, max_n_outcome)
+
+        """
+        cache = getattr(self, '_gather_table_cache', None)
+        if (
+            cache is not None and cache[0] is self.outcome_idx_list and
+            cache[1].shape[1] == self.max_n_reference + 1
+        ):
+            return cache[1]
+
+        n_config = len(self.outcome_idx_list)
+        max_n_outcome = np.max(
+            [outcome_idx.shape[0] for outcome_idx in self.outcome_idx_list]
+        )
+        n_column = self.max_n_reference + 1
+        gather_table = np.full(
+            [n_config, n_column, max_n_outcome], n_column, dtype=np.intp
         )
-        for i_config in range(n_config):
-            # Identify relevant trials.
-            trial_locs = self.config_idx == i_config
-            n_trial_config = np.sum(trial_locs)
-
-            outcome_idx = outcome_idx_list[i_config]
-            n_outcome = outcome_idx.shape[0]
-
-            # Assemble relative indices (not absolute stimuli indices) for
-            # possible outcomes. The query stimulus stays in the same spot
-            # regardless of outcome, so we append a column of zeros to the
-            # possible orderings of the references. The indices into the
-            # reference positions are incremented by one to take into account
-            # the query.
-            stimulus_set_rel_idx = np.hstack(
-                [np.zeros([n_outcome, 1], dtype=int), outcome_idx + 1]
+        for i_config, outcome_idx in enumerate(self.outcome_idx_list):
+            n_outcome, n_reference = outcome_idx.shape
+            gather_table[i_config, 0, 0:n_outcome] = 0
+            gather_table[i_config, 1:n_reference + 1, 0:n_outcome] = (
+                np.transpose(outcome_idx) + 1
             )
-            # Grab absolute stimuli indices associated with current trial
-            # configuration.
-            curr_stimulus_set_copy = self.stimulus_set[trial_locs, :]
-            # Initialize array taking into account max outcome configuration.
-            curr_stimulus_set_expand = np.full(
-                [n_trial_config, self.max_n_reference + 1, max_n_outcome],
-                self._mask_value, dtype=int
+            gather_table[i_config, n_reference + 1:, 0:n_outcome] = (
+                np.arange(n_reference + 1, n_column)[:, np.newaxis]
             )
-            for i_outcome in range(n_outcome):
-                curr_stimulus_set_idx = stimulus_set_rel_idx[i_outcome, :]
-                # Append placeholder indices.
-                curr_idx = np.hstack([
-                    curr_stimulus_set_idx,
-                    np.arange(
-                        np.max(curr_stimulus_set_idx) + 1,
-                        self.max_n_reference + 1
-                    )
-                ])
-                # Convert relative indices to absolute indices.
-                curr_stimulus_set_expand[:, :, i_outcome] = (
-                    curr_stimulus_set_copy[:, curr_idx]
-                )
-            stimulus_set_expand[trial_locs] = curr_stimulus_set_expand
-        return stimulus_set_expand
+
+        self._gather_table_cache = (self.outcome_idx_list, gather_table)
+        return gather_table
+
+    def _expand_outcomes_fn(self):
+        """Return a TensorFlow function that expands stimulus sets.
+
+        The returned function performs the same expansion as
+        `all_outcomes`, but inside a TensorFlow graph (e.g., a
+        tf.data pipeline). It accepts inputs with any number of
+        leading (batch) dimensions.
+
+        Returns:
+            expand_outcomes: A function with signature
+                `expand_outcomes(stimulus_set, config_idx)` that
+                maps a stimulus set with
+                shape=(..., max_n_reference + 1)
+                and configuration indices with
+                shape=(...)
+                to expanded stimulus sets with
+                shape=(..., max_n_reference + 1, max_n_outcome).
+
+        """
+        gather_table = tf.constant(
+            self._outcome_gather_table(), dtype=tf.int32
+        )
+        mask_value = self._mask_value
+
+        def expand_outcomes(stimulus_set, config_idx):
+            # Append a column of mask values that is targeted by
+            # placeholder outcomes.
+            pad_shape = tf.concat([tf.shape(stimulus_set)[:-1], [1]], 0)
+            stimulus_set = tf.concat([
+                stimulus_set,
+                tf.fill(pad_shape, tf.cast(mask_value, stimulus_set.dtype))
+            ], axis=-1)
+            idx = tf.gather(gather_table, config_idx)
+            return tf.gather(
+                stimulus_set, idx, batch_dims=len(stimulus_set.shape) - 1
+            )
+
+        return expand_outcomes
 
     @staticmethod
     def _possible_rank_outcomes(trial_configuration):
@@ -285,3 +512,24 @@ class RankTrials(SimilarityTrials, metaclass=ABCMeta):
             outcomes[i_outcome, n_select:] = dummy_idx
 
         return outcomes
+
+
+def _unique_first_occurrence(keys):
+    """Return unique rows in order of first occurrence.
+
+    Args:
+        keys: A 1D or 2D array. If 2D, each row is a key.
+
+    Returns:
+        first_idx: The index of the first occurrence of each unique
+            key, in increasing order.
+        inverse: The index of the unique key of every row of `keys`.
+
+    """
+    _, first_idx, inverse = np.unique(
+        keys, axis=0, return_index=True, return_inverse=True
+    )
+    order = np.argsort(first_idx)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return first_idx[order], rank[inverse.reshape(-1)]
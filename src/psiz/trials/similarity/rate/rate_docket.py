@@ -28,6 +28,7 @@ import numpy as np
 import pandas as pd
 import tensorflow as tf
 
+from psiz.trials.concatenate_padded import concatenate_padded
 from psiz.trials.similarity.rate.rate_trials import RateTrials
 
 
@@ -179,27 +180,13 @@ class RateDocket(RateTrials):
             A new RateTrials object.
 
         """
-        _, max_n_present, mask_zero = cls._stack_precheck(
-            trials_list
-        )
+        _, _, mask_zero = cls._stack_precheck(trials_list)
 
-        # Grab relevant information from first entry in list.
-        n_pad = max_n_present - trials_list[0].max_n_present
-        pad_width = ((0, 0), (0, n_pad))
-        stimulus_set = np.pad(
-            trials_list[0].stimulus_set, pad_width, mode='constant',
-            constant_values=cls._mask_value
+        stimulus_set = concatenate_padded(
+            [i_trials.stimulus_set for i_trials in trials_list],
+            fill_value=cls._mask_value
         )
 
-        for i_trials in trials_list[1:]:
-            n_pad = max_n_present - i_trials.max_n_present
-            pad_width = ((0, 0), (0, n_pad))
-            curr_stimulus_set = np.pad(
-                i_trials.stimulus_set, pad_width, mode='constant',
-                constant_values=cls._mask_value
-            )
-            stimulus_set = np.vstack((stimulus_set, curr_stimulus_set))
-
         trials_stacked = RateDocket(stimulus_set, mask_zero=mask_zero)
         return trials_stacked
 
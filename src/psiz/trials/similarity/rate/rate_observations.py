@@ -31,7 +31,11 @@ import pandas as pd
 import tensorflow as tf
 from tensorflow.keras import backend as K
 
+from psiz.trials.concatenate_padded import concatenate_padded
+from psiz.trials.hdf5_io import create_hdf5_dataset
+from psiz.trials.hdf5_io import read_hdf5_dataset
 from psiz.trials.similarity.rate.rate_trials import RateTrials
+from psiz.trials.stream_blocks import stream_blocks
 
 
 class RateObservations(RateTrials):
@@ -300,23 +304,30 @@ class RateObservations(RateTrials):
             weight = self._check_weight(weight)
         self.weight = copy.copy(weight)
 
-    def save(self, filepath):
+    def save(self, filepath, chunk_size=None, compression=None):
         """Save the RateObservatiosn object as an HDF5 file.
 
         Args:
             filepath: String specifying the path to save the data.
+            chunk_size (optional): The number of trials per HDF5
+                chunk. By default, datasets are stored contiguously
+                unless `compression` is provided.
+            compression (optional): A compression filter supported by
+                h5py (e.g., 'gzip' or 'lzf'). Compressed datasets are
+                always chunked.
 
         """
         f = h5py.File(filepath, "w")
         f.create_dataset("class_name", data="RateObservations")
-        f.create_dataset("stimulus_set", data=self.stimulus_set)
         f.create_dataset("mask_zero", data=self.mask_zero)
-        f.create_dataset("rating", data=self.rating)
-        f.create_dataset("groups", data=self.groups)
-        f.create_dataset("agent_id", data=self.agent_id)
-        f.create_dataset("session_id", data=self.session_id)
-        f.create_dataset("weight", data=self.weight)
-        f.create_dataset("rt_ms", data=self.rt_ms)
+        for name in (
+            "stimulus_set", "rating", "groups", "agent_id", "session_id",
+            "weight", "rt_ms"
+        ):
+            create_hdf5_dataset(
+                f, name, getattr(self, name), chunk_size=chunk_size,
+                compression=compression
+            )
         f.close()
 
     def as_dataset(self):
@@ -337,18 +348,76 @@ class RateObservations(RateTrials):
         # NOTE: The dimensions of inputs are expanded to have an additional
         # singleton third dimension to indicate that there is only one outcome
         # that we are interested for each trial.
+        ds_obs = tf.data.Dataset.from_tensor_slices(self._as_arrays())
+        return ds_obs
+
+    def _as_arrays(self):
+        """Return the data of `as_dataset` as NumPy arrays.
+
+        Returns:
+            x: A dictionary of model inputs.
+            y: The ratings.
+            w: The observation weights.
+
+        """
         x = {
             'stimulus_set': self.stimulus_set,
             'groups': self.groups
         }
-        y = tf.constant(self.rating, dtype=K.floatx())
+        y = np.asarray(self.rating, dtype=K.floatx())
 
         # Observation weight.
-        w = tf.constant(self.weight, dtype=K.floatx())
+        w = np.asarray(self.weight, dtype=K.floatx())
+        return x, y, w
 
-        # Create dataset.
-        ds_obs = tf.data.Dataset.from_tensor_slices((x, y, w))
-        return ds_obs
+    @classmethod
+    def stream_dataset(
+            cls, filepath, block_size=None, shuffle_buffer_size=None,
+            seed=None):
+        """Return a dataset that streams observations from a file.
+
+        Blocks of trials are read from an HDF5 file (created with
+        `save`) on demand, so the file does not need to fit in memory.
+        Use chunked storage (see `save`) with a chunk size that divides
+        `block_size` for efficient reads. Without shuffling, the
+        elements are identical to those of `as_dataset`.
+
+        Args:
+            filepath: The location of the hdf5 file.
+            block_size (optional): The number of trials that are read
+                at once.
+            shuffle_buffer_size (optional): If provided, the order of
+                the blocks is shuffled and trials are shuffled using a
+                buffer of this size.
+            seed (optional): The random seed used for shuffling.
+
+        Returns:
+            ds_obs: A tf.data.Dataset object.
+
+        """
+        f = h5py.File(filepath, "r")
+        n_trial, n_column = f["stimulus_set"].shape
+        groups_shape = f["groups"].shape[1:]
+        rating_shape = f["rating"].shape[1:]
+        f.close()
+        element_shape = (
+            {
+                'stimulus_set': tf.TensorShape([n_column]),
+                'groups': tf.TensorShape(groups_shape),
+            },
+            tf.TensorShape(rating_shape),
+            tf.TensorShape([])
+        )
+
+        def load_fn(index):
+            obs = cls.load(filepath, index=index)
+            return obs._as_arrays()
+
+        return stream_blocks(
+            load_fn, n_trial, block_size=block_size,
+            shuffle_buffer_size=shuffle_buffer_size, seed=seed,
+            element_shape=element_shape
+        )
 
     @classmethod
     def stack(cls, trials_list):
@@ -365,38 +434,30 @@ class RateObservations(RateTrials):
             A new RateTrials object.
 
         """
-        _, max_n_present, mask_zero = cls._stack_precheck(
-            trials_list
-        )
+        _, _, mask_zero = cls._stack_precheck(trials_list)
 
-        # Grab relevant information from first entry in list.
-        n_pad = max_n_present - trials_list[0].max_n_present
-        pad_width = ((0, 0), (0, n_pad))
-        stimulus_set = np.pad(
-            trials_list[0].stimulus_set, pad_width, mode='constant',
-            constant_values=cls._mask_value
+        stimulus_set = concatenate_padded(
+            [i_trials.stimulus_set for i_trials in trials_list],
+            fill_value=cls._mask_value
+        )
+        rating = np.concatenate(
+            [i_trials.rating for i_trials in trials_list], axis=0
+        )
+        groups = np.concatenate(
+            [i_trials.groups for i_trials in trials_list], axis=0
+        )
+        agent_id = np.concatenate(
+            [i_trials.agent_id for i_trials in trials_list], axis=0
+        )
+        session_id = np.concatenate(
+            [i_trials.session_id for i_trials in trials_list], axis=0
+        )
+        weight = np.concatenate(
+            [i_trials.weight for i_trials in trials_list], axis=0
+        )
+        rt_ms = np.concatenate(
+            [i_trials.rt_ms for i_trials in trials_list], axis=0
         )
-        rating = trials_list[0].rating
-        groups = trials_list[0].groups
-        agent_id = trials_list[0].agent_id
-        session_id = trials_list[0].session_id
-        weight = trials_list[0].weight
-        rt_ms = trials_list[0].rt_ms
-
-        for i_trials in trials_list[1:]:
-            n_pad = max_n_present - i_trials.max_n_present
-            pad_width = ((0, 0), (0, n_pad))
-            curr_stimulus_set = np.pad(
-                i_trials.stimulus_set, pad_width, mode='constant',
-                constant_values=cls._mask_value
-            )
-            stimulus_set = np.vstack((stimulus_set, curr_stimulus_set))
-            rating = np.hstack((rating, i_trials.rating))
-            groups = np.vstack((groups, i_trials.groups))
-            agent_id = np.hstack((agent_id, i_trials.agent_id))
-            session_id = np.hstack((session_id, i_trials.session_id))
-            weight = np.hstack((weight, i_trials.weight))
-            rt_ms = np.hstack((rt_ms, i_trials.rt_ms))
 
         trials_stacked = RateObservations(
             stimulus_set, rating, mask_zero=mask_zero, groups=groups,
@@ -406,24 +467,38 @@ class RateObservations(RateTrials):
         return trials_stacked
 
     @classmethod
-    def load(cls, filepath):
+    def load(cls, filepath, index=None, mmap_mode=None):
         """Load trials.
 
         Args:
             filepath: The location of the hdf5 file to load.
+            index (optional): The indices of the trials to load. Only
+                the HDF5 chunks containing the requested trials are
+                read. By default, all trials are loaded.
+            mmap_mode (optional): If provided, contiguously stored
+                datasets (see `save`) are memory-mapped using this mode
+                instead of being read into memory, see `numpy.memmap`.
+                Use 'r' for read-only or 'c' for copy-on-write access
+                (writable modes are not supported).
 
         """
         f = h5py.File(filepath, "r")
-        stimulus_set = f["stimulus_set"][()]
-        rating = f["rating"][()]
+
+        def read(name):
+            return read_hdf5_dataset(
+                f, name, index=index, mmap_mode=mmap_mode
+            )
+
+        stimulus_set = read("stimulus_set")
+        rating = read("rating")
         try:
             mask_zero = f["mask_zero"][()]
         except KeyError:
             mask_zero = False
         try:
-            groups = f["groups"][()]
+            groups = read("groups")
         except KeyError:
-            groups = f["group_id"][()]
+            groups = read("group_id")
             # Patch for old saving assumptions.
             # pylint: disable=no-member
             if groups.ndim == 1:
@@ -431,19 +506,19 @@ class RateObservations(RateTrials):
 
         # For backwards compatability.
         if "weight" in f:
-            weight = f["weight"][()]
+            weight = read("weight")
         else:
             weight = np.ones((stimulus_set.shape[0]))
         if "rt_ms" in f:
-            rt_ms = f["rt_ms"][()]
+            rt_ms = read("rt_ms")
         else:
             rt_ms = -np.ones((stimulus_set.shape[0]))
         if "agent_id" in f:
-            agent_id = f["agent_id"][()]
+            agent_id = read("agent_id")
         else:
             agent_id = np.zeros((stimulus_set.shape[0]))
         if "session_id" in f:
-            session_id = f["session_id"][()]
+            session_id = read("session_id")
         else:
             session_id = np.zeros((stimulus_set.shape[0]))
         f.close()
@@ -228,6 +228,28 @@ class SimilarityTrials(metaclass=ABCMeta):
             d[dkey] = groups[:, i_col]
         return d
 
+    @classmethod
+    def _merge_groups_columns(cls, d):
+        """Merge separate `groups` columns into a 2D array.
+
+        Inverse of `_split_groups_columns`.
+
+        Args:
+            d: A dictionary containing the keys 'groups_0', ...,
+                'groups_{n_col - 1}'.
+
+        Returns:
+            groups: An integer 2D array.
+                shape=(n_trial, n_col)
+
+        """
+        n_col = 0
+        while 'groups_{0}'.format(n_col) in d:
+            n_col += 1
+        return np.stack(
+            [d['groups_{0}'.format(i_col)] for i_col in range(n_col)], axis=1
+        )
+
     def _find_trials_matching_config(self, row):
         """Find trials matching configuration.
 
@@ -15,6 +15,9 @@
 # ============================================================================
 """Module of core `trials` functionality.
 
+Classes:
+    StackBuilder: Accumulate trial objects that are stacked once.
+
 Functions:
     stack: Combine a list of multiple SimilarityTrial objects into one.
 
@@ -34,3 +37,38 @@ def stack(trials_list):
     """
     trials_stacked = trials_list[0].stack(trials_list)
     return trials_stacked
+
+
+class StackBuilder(object):
+    """Accumulate trial objects and stack them in a single pass.
+
+    Repeatedly calling `stack` on a growing object copies all previous
+    trials on every call. Instead, objects are collected with `append`
+    and stacked once by `build`.
+
+    """
+
+    def __init__(self):
+        """Initialize."""
+        self._trials_list = []
+
+    def append(self, trials):
+        """Add a trial object.
+
+        Args:
+            trials: A trial object. All appended objects should be of
+                the same class.
+
+        """
+        self._trials_list.append(trials)
+
+    def build(self):
+        """Return a new trials object containing all appended trials.
+
+        Raises:
+            ValueError: If no trial objects have been appended.
+
+        """
+        if len(self._trials_list) == 0:
+            raise ValueError('No trial objects have been appended.')
+        return stack(self._trials_list)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Module of core `trials` functionality.
+
+Functions:
+    stream_blocks: Stream blocks of trials as a tf.data.Dataset.
+
+"""
+
+import numpy as np
+import tensorflow as tf
+
+from psiz.trials.hdf5_io import HDF5_CHUNK_SIZE
+
+
+def stream_blocks(
+        load_fn, n_trial, block_size=None, shuffle_buffer_size=None,
+        seed=None, cycle_length=None, element_shape=None):
+    """Return a dataset that streams blocks of trials.
+
+    Blocks of consecutive trials are loaded on demand by a Python
+    generator. Multiple blocks are loaded in parallel using
+    `tf.data.Dataset.interleave` and the result is prefetched, so
+    memory usage is determined by the block size (and shuffle buffer)
+    rather than the total number of trials.
+
+    Only the first block is loaded upfront to determine the structure
+    and dtype of the elements. Since the shape of the data may differ
+    between blocks (e.g., the maximum number of outcomes), the shape
+    of an element can be provided using `element_shape` (e.g., derived
+    from the metadata of a file). Smaller blocks are zero-padded to
+    this shape.
+
+    Args:
+        load_fn: A function `load_fn(index)` that returns a (nested)
+            structure of arrays for the trials indicated by the integer
+            array `index`. The first axis of every array indexes the
+            elements of the dataset.
+        n_trial: The total number of trials.
+        block_size (optional): The number of trials per block.
+        shuffle_buffer_size (optional): If provided, the order of the
+            blocks is shuffled and the elements are shuffled using a
+            buffer of this size.
+        seed (optional): The random seed used for shuffling.
+        cycle_length (optional): The number of blocks that are loaded
+            concurrently. By default, this is determined by
+            TensorFlow.
+        element_shape (optional): A (nested) structure matching the
+            output of `load_fn`, where each array is replaced by the
+            tf.TensorShape of a single element (i.e., excluding the
+            first axis). By default, the shapes of the first block are
+            used, in which case no block may have a larger shape.
+
+    Returns:
+        ds: A tf.data.Dataset.
+
+    Raises:
+        ValueError: If a block is larger than the element shape.
+
+    """
+    if block_size is None:
+        block_size = HDF5_CHUNK_SIZE
+    if block_size < 1:
+        raise ValueError('Argument `block_size` must be at least 1.')
+    n_block = int(np.ceil(n_trial / block_size))
+
+    def block_index(i_block):
+        start = i_block * block_size
+        return np.arange(start, np.minimum(start + block_size, n_trial))
+
+    # Determine structure and dtype of elements using the first block.
+    if n_block == 0:
+        raise ValueError('Cannot stream a dataset with zero trials.')
+    structure = load_fn(block_index(0))
+    flat = [np.asarray(a) for a in tf.nest.flatten(structure)]
+    dtypes = [a.dtype for a in flat]
+    if element_shape is None:
+        shapes = [a.shape[1:] for a in flat]
+    else:
+        shapes = tf.nest.flatten(element_shape)
+    shapes = [tuple(int(d) for d in shape) for shape in shapes]
+    signature = tf.nest.pack_sequence_as(
+        structure, [
+            tf.TensorSpec(shape=(None,) + shape, dtype=dtype)
+            for shape, dtype in zip(shapes, dtypes)
+        ]
+    )
+
+    def generate(i_block):
+        flat = tf.nest.flatten(load_fn(block_index(int(i_block))))
+        flat = [
+            _pad_to_shape(np.asarray(a, dtype=dtype), shape)
+            for a, shape, dtype in zip(flat, shapes, dtypes)
+        ]
+        yield tf.nest.pack_sequence_as(structure, flat)
+
+    ds = tf.data.Dataset.range(n_block)
+    if shuffle_buffer_size is not None:
+        ds = ds.shuffle(n_block, seed=seed)
+    ds = ds.interleave(
+        lambda i_block: tf.data.Dataset.from_generator(
+            generate, output_signature=signature, args=(i_block,)
+        ),
+        cycle_length=cycle_length, num_parallel_calls=tf.data.AUTOTUNE
+    ).unbatch()
+    if shuffle_buffer_size is not None:
+        ds = ds.shuffle(shuffle_buffer_size, seed=seed)
+    return ds.prefetch(tf.data.AUTOTUNE)
+
+
+def _pad_to_shape(a, shape):
+    """Zero-pad all but the first axis of `a` to `shape`."""
+    if np.any(np.greater(a.shape[1:], shape)):
+        raise ValueError(
+            'A block of shape {0} exceeds the element shape {1}. Use the '
+            'argument `element_shape` to provide the maximum '
+            'shape.'.format(a.shape[1:], shape)
+        )
+    pad_width = [(0, 0)] + [
+        (0, target - current) for target, current in zip(shape, a.shape[1:])
+    ]
+    return np.pad(a, pad_width, mode='constant')
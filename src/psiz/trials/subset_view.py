@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Module of core `trials` functionality.
+
+Classes:
+    SubsetView: A lazy subset of a trials object.
+
+"""
+
+import numpy as np
+
+
+class SubsetView(object):
+    """A lazy subset of a trials object.
+
+    A view only stores an index array into its parent. Taking a subset
+    of a view composes the indices without touching any trial data.
+    Trial-level arrays listed in the `_row_attributes` class attribute
+    of the parent (e.g., `groups` and `agent_id` of RankObservations)
+    are returned as read-only arrays indexed from the parent. The
+    subset is materialised (using the `subset` method of the parent)
+    the first time any other attribute or method is accessed, e.g.,
+    when the view is exported with `as_dataset` or mutated with
+    `set_weight`. All later accesses use the materialised object.
+
+    Attributes:
+        parent: The trials object being viewed.
+        index: An integer array of the indices of the viewed trials.
+        n_trial (or n_sequence): The number of viewed trials (or
+            sequences). Available without materialisation.
+
+    Notes:
+        Mutating the parent before the view is materialised changes
+        the materialised trials.
+
+    """
+
+    def __init__(self, parent, index):
+        """Initialize.
+
+        Args:
+            parent: A trials object that implements `subset` (e.g.,
+                RankObservations or TrialDataset).
+            index: An integer or Boolean array indicating the trials
+                (or sequences) of `parent` to view.
+
+        """
+        index = np.asarray(index)
+        if index.dtype == bool:
+            index = np.flatnonzero(index)
+        self.parent = parent
+        self.index = index
+        self._materialized = None
+
+    @property
+    def is_materialized(self):
+        """Boolean indicating if the view has been materialised."""
+        return self._materialized is not None
+
+    def subset(self, index):
+        """Return a view of a subset of the viewed trials.
+
+        Args:
+            index: The indices (relative to the view) of the subset.
+
+        Returns:
+            A new SubsetView object of the same parent.
+
+        """
+        if self.is_materialized:
+            return SubsetView(self._materialized, index)
+        return SubsetView(self.parent, self.index[index])
+
+    def view(self, index):
+        """Alias of `subset`."""
+        return self.subset(index)
+
+    def materialize(self):
+        """Return the viewed trials as a trials object.
+
+        Returns:
+            A trials object of the same class as `parent`.
+
+        """
+        if self._materialized is None:
+            self._materialized = self.parent.subset(self.index)
+        return self._materialized
+
+    def __getattr__(self, name):
+        """Delegate to the materialised trials object."""
+        if name.startswith('__') or name in (
+            'parent', 'index', '_materialized'
+        ):
+            raise AttributeError(name)
+        if (
+            name in ('n_trial', 'n_sequence') and not self.is_materialized
+            and hasattr(self.parent, name)
+        ):
+            # The number of viewed trials (or sequences) does not
+            # require materialisation.
+            return len(self.index)
+        if (
+            not self.is_materialized and
+            name in getattr(type(self.parent), '_row_attributes', ())
+        ):
+            value = getattr(self.parent, name)[self.index]
+            value.flags.writeable = False
+            return value
+        return getattr(self.materialize(), name)
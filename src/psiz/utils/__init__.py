@@ -26,6 +26,8 @@ from psiz.utils.procrustes import procrustes_rotation
 from psiz.utils.progress_bar_re import ProgressBarRe
 from psiz.utils.random_combinations import random_combinations
 from psiz.utils.rotation_matrix import rotation_matrix
+from psiz.utils.similarity_cache import SimilarityCache
+from psiz.utils.similarity_matrix import similarity_matrix
 from psiz.utils.standard_split import standard_split
 from psiz.utils.stratified_group_kfold import StratifiedGroupKFold
 
@@ -34,5 +36,6 @@ __all__ = [
     'generate_group_matrix', 'pairwise_index_dataset',
     'pairwise_similarity', 'procrustes_rotation',
     'ProgressBarRe', 'rotation_matrix', 'random_combinations',
-    'standard_split', 'StratifiedGroupKFold'
+    'SimilarityCache', 'similarity_matrix', 'standard_split',
+    'StratifiedGroupKFold'
 ]
@@ -23,11 +23,26 @@ Functions:
 import numpy as np
 
 
-def choice_wo_replace(a, size, p, rng=None):
+def choice_wo_replace(
+        a, size, p, rng=None, method='auto', max_n_element=2**22):
     """Fast sampling without replacement.
 
     For each sample, draw elements without replacement. Across samples
-    there may be repetitions.
+    there may be repetitions. The elements of a sample are drawn one
+    at a time from `p` renormalized over the remaining elements and
+    are returned in the order they were drawn.
+
+    Two strategies are available, which draw from the same
+    distribution and only differ in their cost. The "dense" strategy
+    uses an exponential race (i.e., the Gumbel-top-k trick): every
+    element draws an arrival time `E / p` with `E ~ Exponential(1)`
+    and the earliest arrivals are selected, which requires memory
+    proportional to `n_sample * n_element`. The "rejection" strategy
+    draws each element of a sample from the cumulative distribution
+    and redraws elements that were already drawn, which requires
+    memory proportional to `n_sample * sample_size`. Rejection is
+    efficient when `sample_size` is small relative to the number of
+    elements with non-negligible probability.
 
     Args:
         a: An array indicating the eligable elements.
@@ -40,33 +55,168 @@ def choice_wo_replace(a, size, p, rng=None):
             already assumed to sum to one. Probability p[i] indicates
             the probability of drawing index a[i].
         rng (optional): A numpy random number generator.
+        method (optional): The sampling strategy: 'dense', 'rejection'
+            or 'auto'. By default ('auto'), the dense strategy is used
+            when its intermediate arrays have at most `max_n_element`
+            elements, otherwise the rejection strategy is used if the
+            probabilities are sufficiently spread out. When neither
+            holds, the dense strategy is applied to chunks of samples.
+        max_n_element (optional): The maximum number of elements of an
+            intermediate array of the dense strategy.
 
     Returns:
         result: A 2D array containing the drawn elements.
             shape=(n_sample, sample_size)
 
-    See: https://medium.com/ibm-watson/
-        incredibly-fast-random-sampling-in-python-baf154bd836a
+    Raises:
+        ValueError: If `method` is not recognized.
 
     """
     n_sample = size[0]
     sample_size = size[1]
 
-    # Replicate probabilities as many times as `n_sample`
-    replicated_probabilities = np.tile(p, (n_sample, 1))
+    if method == 'auto':
+        if n_sample * len(p) <= max_n_element:
+            method = 'dense'
+        elif _is_rejection_efficient(p, sample_size):
+            method = 'rejection'
+        else:
+            method = 'dense'
+
+    if method == 'dense':
+        # Process samples in chunks to bound the size of intermediate
+        # arrays.
+        n_sample_chunk = max(max_n_element // max(len(p), 1), 1)
+        if n_sample <= n_sample_chunk:
+            samples = _dense_sample(n_sample, sample_size, p, rng)
+        else:
+            samples = np.concatenate([
+                _dense_sample(
+                    min(n_sample_chunk, n_sample - start), sample_size, p,
+                    rng
+                ) for start in range(0, n_sample, n_sample_chunk)
+            ], axis=0)
+    elif method == 'rejection':
+        samples = _rejection_sample(n_sample, sample_size, p, rng)
+    else:
+        raise ValueError(
+            'The argument `method` must be one of "auto", "dense" or '
+            '"rejection".'
+        )
+
+    return a[samples]
+
+
+def _dense_sample(n_sample, sample_size, p, rng):
+    """Draw samples using an exponential race over all elements.
 
-    # Get random shifting numbers & scale them correctly.
+    Args:
+        n_sample: The number of samples.
+        sample_size: The number of draws per sample.
+        p: The probability of each element.
+        rng: A numpy random number generator or `None`.
+
+    Returns:
+        samples: An integer array of element positions.
+            shape=(n_sample, sample_size)
+
+    """
+    if sample_size == 0:
+        return np.empty([n_sample, 0], dtype=int)
+    shape = [n_sample, len(p)]
     if rng is not None:
-        random_shifts = rng.random(replicated_probabilities.shape)
+        keys = rng.standard_exponential(shape)
     else:
-        random_shifts = np.random.random(replicated_probabilities.shape)
-    random_shifts /= random_shifts.sum(axis=1)[:, np.newaxis]
+        keys = np.random.standard_exponential(shape)
+    # Elements with zero probability have an arrival time of `inf`.
+    with np.errstate(divide='ignore'):
+        keys /= p
 
-    # Shift by numbers and find largest (by finding the smallest of the
-    # negative).
-    shifted_probabilities = random_shifts - replicated_probabilities
-    samples = np.argpartition(
-        shifted_probabilities, sample_size, axis=1
-    )[:, :sample_size]
+    # Select the earliest arrivals and order them by arrival time,
+    # which is the order of sequential draws.
+    samples = np.argpartition(keys, sample_size - 1, axis=1)[
+        :, :sample_size
+    ]
+    order = np.argsort(np.take_along_axis(keys, samples, axis=1), axis=1)
+    return np.take_along_axis(samples, order, axis=1)
 
-    return a[samples]
+
+def _rejection_sample(n_sample, sample_size, p, rng):
+    """Draw samples sequentially, redrawing repeated elements.
+
+    Each element of a sample is drawn from `p` using the inverse
+    cumulative distribution. Draws that repeat an element already in
+    the sample are redrawn, which is equivalent to drawing from `p`
+    renormalized over the remaining elements.
+
+    Args:
+        n_sample: The number of samples.
+        sample_size: The number of draws per sample.
+        p: The probability of each element.
+        rng: A numpy random number generator or `None`.
+
+    Returns:
+        samples: An integer array of element positions.
+            shape=(n_sample, sample_size)
+
+    Raises:
+        ValueError: If fewer than `sample_size` elements have a
+            non-zero probability.
+
+    """
+    if np.sum(np.greater(p, 0)) < sample_size:
+        raise ValueError(
+            'At least `sample_size` elements must have a non-zero '
+            'probability.'
+        )
+    if rng is not None:
+        random = rng.random
+    else:
+        random = np.random.random
+
+    cdf = np.cumsum(p)
+    cdf = cdf / cdf[-1]
+    n_element = len(cdf)
+
+    samples = np.empty([n_sample, sample_size], dtype=int)
+    for i_draw in range(sample_size):
+        idx_pending = np.arange(n_sample)
+        while len(idx_pending) > 0:
+            draws = np.searchsorted(
+                cdf, random(len(idx_pending)), side='right'
+            )
+            # Guard against round-off in the last cumulative value.
+            draws = np.minimum(draws, n_element - 1)
+            is_repeat = np.any(
+                np.equal(samples[idx_pending, 0:i_draw], draws[:, None]),
+                axis=1
+            )
+            is_accepted = np.logical_not(is_repeat)
+            samples[idx_pending[is_accepted], i_draw] = draws[is_accepted]
+            idx_pending = idx_pending[is_repeat]
+    return samples
+
+
+def _is_rejection_efficient(p, sample_size, max_mass=.5):
+    """Return `True` if rejection sampling needs few redraws.
+
+    The probability of redrawing an element is at most the mass of
+    the `sample_size - 1` most probable elements.
+
+    Args:
+        p: The probability of each element.
+        sample_size: The number of draws per sample.
+        max_mass (optional): The maximum tolerated redraw probability.
+
+    Returns:
+        Boolean.
+
+    """
+    if np.sum(np.greater(p, 0)) < sample_size:
+        return False
+    if sample_size < 2:
+        return True
+    top_mass = np.sum(
+        np.partition(p, len(p) - sample_size + 1)[len(p) - sample_size + 1:]
+    )
+    return top_mass / np.sum(p) <= max_mass
@@ -25,10 +25,15 @@ import tensorflow as tf
 
 from psiz.utils.generate_group_matrix import generate_group_matrix
 
+# Number of consecutive pair ranks that share a random seed when
+# subsampling lazily. Fixed so that the retained pairs do not depend on
+# `batch_size`.
+_SUBSAMPLE_CHUNK_SIZE = 65536
+
 
 def pairwise_index_dataset(
         indices, batch_size=None, elements='upper', groups=None,
-        subsample=None, seed=252):
+        subsample=None, seed=252, lazy=False):
     """Assemble pairwise combinations.
 
     Args:
@@ -47,6 +52,15 @@ def pairwise_index_dataset(
         subsample: A float ]0,1] indicating the proportion of all pairs
             that should be retained. By default all pairs are retained.
         seed: Integer controlling which pairs are subsampled.
+        lazy (optional): Boolean indicating if pairs should be generated
+            lazily. If `True`, the pairs of each batch are computed
+            arithmetically from a `tf.data.Dataset.range` of pair
+            ranks, so memory usage does not scale with the number of
+            pairs. When subsampling, each pair is retained
+            independently with probability `subsample` (rather than
+            drawing a random permutation of all pairs), so pairs are
+            returned in their canonical order and `ds_info['n_pair']`
+            is the expected (not exact) number of pairs.
 
     Returns:
         ds: A Tensorflow Dataset.
@@ -61,6 +75,16 @@ def pairwise_index_dataset(
         raise ValueError('Argument `indices` must be scalar or 1D.')
     n_idx = len(indices)
 
+    if subsample is not None:
+        # Make sure subsample is valid subsample value.
+        if subsample <= 0 or subsample > 1.:
+            raise ValueError('Argument `subsample` must be in ]0,1]')
+
+    if lazy:
+        return _lazy_pairwise_index_dataset(
+            indices, batch_size, elements, groups, subsample, seed
+        )
+
     # Start by determine pairs of indices using relative indices.
     if elements == 'all':
         idx = np.meshgrid(np.arange(n_idx), np.arange(n_idx))
@@ -89,10 +113,6 @@ def pairwise_index_dataset(
 
     n_pair = len(idx_0)
     if subsample is not None:
-        # Make sure subsample is valid subsample value.
-        if subsample <= 0 or subsample > 1.:
-            raise ValueError('Argument `subsample` must be in ]0,1]')
-
         np.random.seed(seed)
         idx_rand = np.random.permutation(n_pair)
         n_pair = int(np.ceil(n_pair * subsample))
@@ -133,3 +153,142 @@ def pairwise_index_dataset(
             batch_size, drop_remainder=False
         )
     return ds, ds_info
+
+
+def _lazy_pairwise_index_dataset(
+        indices, batch_size, elements, groups, subsample, seed):
+    """Assemble pairwise combinations lazily.
+
+    See `pairwise_index_dataset` for a description of the arguments.
+
+    """
+    n_idx = len(indices)
+    n_pair = _n_pair(n_idx, elements)
+
+    ds = tf.data.Dataset.range(n_pair)
+    if subsample is not None:
+        if subsample < 1.:
+            ds = ds.batch(_SUBSAMPLE_CHUNK_SIZE).enumerate().map(
+                lambda i_chunk, k: _bernoulli_select(
+                    i_chunk, k, subsample, seed
+                )
+            ).unbatch()
+        n_pair = int(np.ceil(n_pair * subsample))
+
+    if batch_size is None:
+        batch_size = np.minimum(10000, n_pair)
+
+    ds_info = {
+        'n_pair': n_pair,
+        'batch_size': batch_size,
+        'n_batch': np.ceil(n_pair / batch_size),
+        'elements': elements
+    }
+
+    indices = tf.constant(indices, dtype=tf.int32)
+    if groups is not None:
+        group_row = tf.constant([groups], dtype=tf.int32)
+
+    def pair_fn(k):
+        idx_0, idx_1 = _pair_from_rank(k, n_idx, elements)
+        # Covert to user-provided indices.
+        idx_0 = tf.gather(indices, idx_0)
+        idx_1 = tf.gather(indices, idx_1)
+        if groups is not None:
+            group_matrix = tf.repeat(group_row, tf.shape(k)[0], axis=0)
+            return idx_0, idx_1, group_matrix
+        return idx_0, idx_1
+
+    ds = ds.batch(batch_size, drop_remainder=False).map(pair_fn)
+    return ds, ds_info
+
+
+def _n_pair(n_idx, elements):
+    """Return the number of pairs."""
+    if elements == 'all':
+        n_pair = n_idx**2
+    elif elements in ('upper', 'lower'):
+        n_pair = (n_idx * (n_idx - 1)) // 2
+    elif elements == 'off':
+        n_pair = n_idx * (n_idx - 1)
+    else:
+        raise NotImplementedError
+    return n_pair
+
+
+def _bernoulli_select(i_chunk, k, subsample, seed):
+    """Retain each pair rank with probability `subsample`."""
+    chunk_seed = tf.stack([tf.constant(seed, dtype=tf.int64), i_chunk])
+    u = tf.random.stateless_uniform(tf.shape(k), seed=chunk_seed)
+    return tf.boolean_mask(k, u < subsample)
+
+
+def _pair_from_rank(k, n_idx, elements):
+    """Map pair ranks to relative index pairs.
+
+    The mapping reproduces the ordering of the eager implementation,
+    i.e., `np.meshgrid` for 'all', `np.triu_indices` for 'upper',
+    `np.tril_indices` for 'lower' and upper followed by lower for
+    'off'.
+
+    Args:
+        k: A 1D int64 tf.Tensor of pair ranks.
+        n_idx: The number of indices.
+        elements: One of 'all', 'upper', 'lower', or 'off'.
+
+    Returns:
+        idx_0: A 1D int64 tf.Tensor of relative indices.
+        idx_1: A 1D int64 tf.Tensor of relative indices.
+
+    """
+    n = tf.constant(n_idx, dtype=tf.int64)
+    if elements == 'all':
+        idx_0 = k % n
+        idx_1 = k // n
+    elif elements == 'upper':
+        idx_0, idx_1 = _upper_from_rank(k, n)
+    elif elements == 'lower':
+        idx_0, idx_1 = _lower_from_rank(k, n)
+    elif elements == 'off':
+        n_upper = (n * (n - 1)) // 2
+        is_upper = k < n_upper
+        upper_0, upper_1 = _upper_from_rank(tf.minimum(k, n_upper - 1), n)
+        lower_0, lower_1 = _lower_from_rank(tf.maximum(k - n_upper, 0), n)
+        idx_0 = tf.where(is_upper, upper_0, lower_0)
+        idx_1 = tf.where(is_upper, upper_1, lower_1)
+    else:
+        raise NotImplementedError
+    return idx_0, idx_1
+
+
+def _upper_from_rank(k, n):
+    """Map ranks to row-major upper triangular pairs."""
+    def row_start(i):
+        return (i * (2 * n - i - 1)) // 2
+
+    # Invert `row_start` in floating point and correct rounding errors.
+    a = tf.cast(2 * n - 1, tf.float64)
+    i = tf.math.floor(
+        (a - tf.sqrt(a**2 - 8. * tf.cast(k, tf.float64))) / 2.
+    )
+    i = tf.cast(i, tf.int64)
+    i = tf.where(row_start(i) > k, i - 1, i)
+    i = tf.where(row_start(i + 1) <= k, i + 1, i)
+    j = k - row_start(i) + i + 1
+    return i, j
+
+
+def _lower_from_rank(k, n):
+    """Map ranks to row-major lower triangular pairs."""
+    def row_start(i):
+        return (i * (i - 1)) // 2
+
+    # Invert `row_start` in floating point and correct rounding errors.
+    i = tf.math.floor(
+        (1. + tf.sqrt(1. + 8. * tf.cast(k, tf.float64))) / 2.
+    )
+    i = tf.cast(i, tf.int64)
+    i = tf.where(row_start(i) > k, i - 1, i)
+    i = tf.where(row_start(i + 1) <= k, i + 1, i)
+    j = k - row_start(i)
+    return i, j
@@ -32,7 +32,7 @@ from psiz.utils.progress_bar_re import ProgressBarRe
 def pairwise_similarity(
         stimuli, kernel, ds_pairs, use_group_stimuli=False,
         use_group_kernel=False, n_sample=None, compute_average=False,
-        verbose=0):
+        cache=None, verbose=0):
     """Return the similarity between stimulus pairs.
 
     Args:
@@ -48,6 +48,10 @@ def pairwise_similarity(
         n_sample (optional): The size of an additional "sample" axis.
         compute_average (optional): Boolean indicating if an average
             across samples should be computed.
+        cache (optional): A `psiz.utils.SimilarityCache` object for
+            the provided `stimuli` and `kernel` layers. If provided,
+            similarities of previously seen pairs are retrieved from
+            the cache instead of being recomputed.
         verbose (optional): Verbosity of output.
 
     Returns:
@@ -57,6 +61,13 @@ def pairwise_similarity(
             shape=(n_pair, [n_sample])
 
     """
+    if cache is not None:
+        if cache.stimuli is not stimuli or cache.kernel is not kernel:
+            raise ValueError(
+                'Argument `cache` must use the provided `stimuli` and '
+                '`kernel` layers.'
+            )
+
     if verbose > 0:
         n_batch = 0
         for _ in ds_pairs:
@@ -72,28 +83,17 @@ def pairwise_similarity(
     for x_batch in ds_pairs:
         idx_0 = x_batch[0]
         idx_1 = x_batch[1]
+        group = None
         if use_group_stimuli or use_group_kernel:
             group = x_batch[2]
 
-        if n_sample is not None:
-            idx_0 = expand_dim_repeat(
-                idx_0, n_sample, axis=1
-            )
-            idx_1 = expand_dim_repeat(
-                idx_1, n_sample, axis=1
-            )
-
-        if use_group_stimuli:
-            z_0 = stimuli([idx_0, group])
-            z_1 = stimuli([idx_1, group])
+        if cache is not None:
+            s_batch = cache(idx_0, idx_1, groups=group, n_sample=n_sample)
         else:
-            z_0 = stimuli(idx_0)
-            z_1 = stimuli(idx_1)
-
-        if use_group_kernel:
-            s_batch = kernel([z_0, z_1, group])
-        else:
-            s_batch = kernel([z_0, z_1])
+            s_batch = _similarity(
+                stimuli, kernel, idx_0, idx_1, group, use_group_stimuli,
+                use_group_kernel, n_sample
+            )
 
         if compute_average:
             s_batch = tf.reduce_mean(s_batch, axis=1)
@@ -111,3 +111,29 @@ def pairwise_similarity(
     # Concatenate along pairs dimension (i.e., the first axis).
     s = tf.concat(s, 0)
     return s
+
+
+def _similarity(
+        stimuli, kernel, idx_0, idx_1, group, use_group_stimuli,
+        use_group_kernel, n_sample):
+    """Return the similarity between a batch of stimulus pairs."""
+    if n_sample is not None:
+        idx_0 = expand_dim_repeat(
+            idx_0, n_sample, axis=1
+        )
+        idx_1 = expand_dim_repeat(
+            idx_1, n_sample, axis=1
+        )
+
+    if use_group_stimuli:
+        z_0 = stimuli([idx_0, group])
+        z_1 = stimuli([idx_1, group])
+    else:
+        z_0 = stimuli(idx_0)
+        z_1 = stimuli(idx_1)
+
+    if use_group_kernel:
+        s_batch = kernel([z_0, z_1, group])
+    else:
+        s_batch = kernel([z_0, z_1])
+    return s_batch
@@ -21,10 +21,25 @@ import numpy as np
 
 from psiz.utils import choice_wo_replace
 
+# The maximum number of array elements used by intermediate results.
+_MAX_N_ELEMENT = 2**22
+
 
 def random_combinations(a, k, n_sample, p=None, replace=True, rng=None):
     """Sample from the possible k-combinations of `a`.
 
+    When sampling without replacement, unweighted k-combinations are
+    obtained by sampling unique ranks of the combinatorial number
+    system. Weighted k-combinations are sampled one after the other,
+    where each k-combination is drawn with the probability of drawing
+    its elements in any order one at a time without replacement
+    (renormalized over the k-combinations that have not been sampled
+    yet). Depending on the number of requested samples, this
+    distribution is either sampled from an enumeration of all
+    k-combinations or by drawing batches that are deduplicated using
+    a hash set. In all cases, the running time is roughly proportional
+    to `n_sample`.
+
     Args:
         a: The elements used to create combinations.
             shape=(n_element,)
@@ -35,7 +50,10 @@ def random_combinations(a, k, n_sample, p=None, replace=True, rng=None):
             number of unique samples; if `n_sample` is greater than
             number of unique k-combinations, an exhaustive list of all
             k-combinations is returned (which will be less than the
-            requested number of samples).
+            requested number of samples). Elements with zero
+            probability are never sampled without replacement, so
+            only the k-combinations of the remaining elements count
+            towards this limit.
         p (optional): The sampling probability associated with each
             element in `a`. If not given, all elements are given equal
             probability.
@@ -66,7 +84,13 @@ def random_combinations(a, k, n_sample, p=None, replace=True, rng=None):
         # Sample with replacement.
         samples = choice_wo_replace(a, [n_sample, k], p, rng=rng)
     else:
-        # Sample without replacement.
+        # Sample without replacement. Elements with zero probability
+        # are not eligible.
+        is_eligible = np.greater(p, 0)
+        if not np.all(is_eligible):
+            a = np.asarray(a)[is_eligible]
+            p = p[is_eligible]
+            n_element = len(a)
         n_unique = comb(n_element, k)
         if n_sample > n_unique:
             n_sample = n_unique
@@ -74,19 +98,225 @@ def random_combinations(a, k, n_sample, p=None, replace=True, rng=None):
         if n_sample == n_unique:
             # Sample exhaustively.
             samples_iter = itertools.combinations(a, k)
-            samples = np.stack(list(samples_iter), axis=0)
+            samples = np.reshape(
+                np.array(list(samples_iter), dtype=np.asarray(a).dtype),
+                [n_unique, k]
+            )
         else:
-            # Sample iteratively to assemble a sufficient number of unique
-            # samples.
-            is_sufficient = False
-            samples = np.empty([0, k], dtype=int)
-            while not is_sufficient:
-                new_samples = choice_wo_replace(a, [n_sample, k], p, rng=rng)
-                new_samples = np.sort(new_samples, axis=1)
-                samples = np.vstack([samples, new_samples])
-                samples = np.unique(samples, axis=0)
-                if samples.shape[0] >= n_sample:
-                    is_sufficient = True
-                    samples = samples[0:n_sample]
+            if rng is None:
+                rng = np.random.default_rng()
+            is_uniform = np.all(np.equal(p, p[0]))
+            if is_uniform and n_unique <= np.iinfo(np.int64).max:
+                # Sample unique ranks and map them to k-combinations.
+                rank = rng.choice(n_unique, size=n_sample, replace=False)
+                samples_idx = _unrank_combinations(rank, n_element, k)
+            elif (
+                n_unique <= 4 * n_sample and
+                n_unique * 2**k <= _MAX_N_ELEMENT
+            ):
+                # Most k-combinations are requested, so it is cheaper to
+                # enumerate them than to reject duplicates.
+                samples_idx = _sample_enumerated_combinations(
+                    n_element, k, n_sample, p, rng
+                )
+            else:
+                samples_idx = _sample_unique_combinations(
+                    n_element, k, n_sample, p, rng
+                )
+            samples = np.sort(a[samples_idx], axis=1)
+            # Sort samples for consistency with exhaustive sampling.
+            samples = samples[np.lexsort(samples.T[::-1])]
+
+    return samples
+
+
+def _unrank_combinations(rank, n, k):
+    """Map ranks to k-combinations using the combinatorial number system.
+
+    A k-combination `c_k > ... > c_1` of `range(n)` has the rank
+    `comb(c_k, k) + ... + comb(c_1, 1)`, which is a bijection onto
+    `range(comb(n, k))`. A combination is recovered greedily by finding
+    the largest `c_i` such that `comb(c_i, i)` does not exceed the
+    remaining rank.
+
+    Args:
+        rank: An integer array of ranks.
+            shape=(n_sample,)
+        n: The number of elements.
+        k: The number of elements in each combination.
+
+    Returns:
+        samples: An integer array of combinations (in descending
+            order).
+            shape=(n_sample, k)
+
+    """
+    n_unique = comb(n, k)
+    # Tabulate `comb(c, i)` for `c` in `range(n)` and `i` in
+    # `range(1, k + 1)`. Values are capped at `n_unique` since larger
+    # values can never be selected, which keeps the table in int64.
+    table = np.empty([n, k + 1], dtype=np.int64)
+    table[:, 0] = 1
+    for i in range(1, k + 1):
+        # Use the identity `comb(c, i) = sum_{j < c} comb(j, i - 1)`.
+        table[:, i] = list(itertools.accumulate(
+            itertools.chain([0], table[:-1, i - 1].tolist()),
+            lambda x, y: min(x + y, n_unique)
+        ))
+
+    remainder = np.array(rank, dtype=np.int64)
+    samples = np.empty([len(remainder), k], dtype=int)
+    for i in range(k, 0, -1):
+        c = np.searchsorted(table[:, i], remainder, side='right') - 1
+        samples[:, k - i] = c
+        remainder = remainder - table[c, i]
+    return samples
+
+
+def _sample_enumerated_combinations(n, k, n_sample, p, rng):
+    """Sample unique weighted k-combinations from an enumeration.
+
+    Each k-combination is weighted by the probability of drawing its
+    elements sequentially without replacement (see
+    `_sequential_probability`) and `n_sample` combinations are drawn
+    without replacement using an exponential race (i.e., the
+    `n_sample` smallest values of `E / weight` with
+    `E ~ Exponential(1)`).
+
+    Args:
+        n: The number of elements.
+        k: The number of elements in each combination.
+        n_sample: The number of unique combinations to sample.
+        p: The sampling probability associated with each element.
+        rng: A NumPy random number generator.
+
+    Returns:
+        samples: An integer array of combinations.
+            shape=(n_sample, k)
+
+    """
+    combinations = np.fromiter(
+        itertools.chain.from_iterable(itertools.combinations(range(n), k)),
+        dtype=int
+    ).reshape([-1, k])
+    # Use log-space to avoid underflow of small weights.
+    with np.errstate(divide='ignore'):
+        log_weight = np.log(_sequential_probability(p[combinations]))
+        keys = np.log(rng.standard_exponential(len(combinations)))
+    keys -= log_weight
+    idx = np.argpartition(keys, n_sample - 1)[0:n_sample]
+    return combinations[idx]
+
+
+def _sequential_probability(p_comb):
+    """Return the probability of drawing each set of elements.
 
+    The probability of drawing a set of k elements one at a time
+    without replacement is the sum over all orderings of the set.
+    Instead of enumerating the `k!` orderings, the probability of
+    every subset of a set is accumulated in order of the subsets'
+    bit masks, which requires `2**k` steps.
+
+    Args:
+        p_comb: The sampling probability of each element of each
+            set.
+            shape=(n_set, k)
+
+    Returns:
+        prob: The probability of drawing each set.
+            shape=(n_set,)
+
+    """
+    n_set, k = p_comb.shape
+    n_mask = 2**k
+    # The total probability and the sequential probability of each
+    # subset (indexed by bit mask).
+    mass = np.zeros([n_mask, n_set])
+    prob = np.zeros([n_mask, n_set])
+    prob[0] = 1.
+    for mask in range(1, n_mask):
+        lowest = mask & -mask
+        mass[mask] = mass[mask ^ lowest] + p_comb[:, lowest.bit_length() - 1]
+        for i in range(k):
+            if mask & (1 << i):
+                previous = mask ^ (1 << i)
+                remaining = 1. - mass[previous]
+                prob[mask] += prob[previous] * np.divide(
+                    p_comb[:, i], remaining,
+                    out=np.zeros([n_set]), where=remaining > 0
+                )
+    return prob[-1]
+
+
+def _sample_sequential(n_sample, k, p, rng):
+    """Draw elements sequentially without replacement.
+
+    Uses an exponential race, i.e., the `k` smallest values of
+    `E / p` with `E ~ Exponential(1)`, which is equivalent to drawing
+    `k` elements one at a time from `p` renormalized over the
+    remaining elements.
+
+    Args:
+        n_sample: The number of samples.
+        k: The number of elements in each sample.
+        p: The sampling probability associated with each element.
+        rng: A NumPy random number generator.
+
+    Returns:
+        samples: An integer array of element indices.
+            shape=(n_sample, k)
+
+    """
+    n = len(p)
+    samples = np.empty([n_sample, k], dtype=int)
+    n_chunk = max(_MAX_N_ELEMENT // n, 1)
+    with np.errstate(divide='ignore'):
+        for start in range(0, n_sample, n_chunk):
+            stop = min(start + n_chunk, n_sample)
+            keys = rng.standard_exponential([stop - start, n]) / p
+            samples[start:stop] = np.argpartition(
+                keys, k - 1, axis=1
+            )[:, 0:k]
+    return samples
+
+
+def _sample_unique_combinations(n, k, n_sample, p, rng):
+    """Sample unique weighted k-combinations using a hash set.
+
+    Batches of k-combinations are drawn using `_sample_sequential`
+    and only combinations that have not been drawn before are kept.
+    Previously drawn combinations are tracked with a hash set, so the
+    cost of each batch is proportional to its size.
+
+    Args:
+        n: The number of elements.
+        k: The number of elements in each combination.
+        n_sample: The number of unique combinations to sample.
+        p: The sampling probability associated with each element.
+        rng: A NumPy random number generator.
+
+    Returns:
+        samples: An integer array of combinations.
+            shape=(n_sample, k)
+
+    """
+    seen = set()
+    samples = np.empty([n_sample, k], dtype=int)
+    n_obtained = 0
+    while n_obtained < n_sample:
+        # Oversample to reduce the number of batches when duplicates
+        # are common.
+        n_draw = max(2 * (n_sample - n_obtained), 64)
+        new_samples = _sample_sequential(n_draw, k, p, rng)
+        new_samples = np.ascontiguousarray(np.sort(new_samples, axis=1))
+        keys = new_samples.view(
+            np.dtype((np.void, new_samples.dtype.itemsize * k))
+        ).ravel()
+        for i_new, key in enumerate(keys.tolist()):
+            if key not in seen:
+                seen.add(key)
+                samples[n_obtained] = new_samples[i_new]
+                n_obtained += 1
+                if n_obtained == n_sample:
+                    break
     return samples
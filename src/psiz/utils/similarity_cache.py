@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Module of utility classes.
+
+Classes:
+    SimilarityCache: A bounded cache of stimulus-level similarities.
+
+"""
+
+import numpy as np
+import tensorflow as tf
+
+
+class SimilarityCache(object):
+    """A least-recently-used cache of pairwise stimulus similarities.
+
+    Similarities are keyed on the stimulus pair `(i, j)` and (if
+    applicable) the group membership of the pair. Only pairs that are
+    not in the cache are passed through the `stimuli` and `kernel`
+    layers.
+
+    The cache only supports deterministic `stimuli` and `kernel`
+    layers, since caching a single draw of a stochastic layer would
+    freeze the posterior samples. When a "sample" axis is requested,
+    the cached similarity is repeated along that axis.
+
+    Before every lookup, the cache compares a checksum of the layer
+    weights against the checksum of the cached similarities and
+    invalidates itself if the weights changed. This covers all ways of
+    changing the weights (e.g., `fit`, `train_on_batch`, `set_weights`,
+    custom training loops, and `tf.Variable.assign`). The checksum is
+    a random projection of the weights computed on the device, so the
+    weights are never transferred to the host.
+
+    Attributes:
+        stimuli: A tf.keras.layers.Layer with stimuli semantics.
+        kernel: A tf.keras.layers.Layer with kernel semantics.
+        max_size: The maximum number of cached pairs.
+        version: The number of times the cache has been invalidated,
+            either explicitly or because the layer weights changed.
+        n_hit: The number of pairs retrieved from the cache.
+        n_miss: The number of pairs that were computed.
+
+    """
+
+    def __init__(
+            self, stimuli, kernel, use_group_stimuli=False,
+            use_group_kernel=False, max_size=1000000):
+        """Initialize.
+
+        Args:
+            stimuli: A tf.keras.layers.Layer with stimuli semantics.
+            kernel: A tf.keras.layers.Layer with kernel semantics.
+            use_group_stimuli (optional): Boolean indicating if
+                `stimuli` layer should receive group input.
+            use_group_kernel (optional): Boolean indicating if `kernel`
+                layer should receive group input.
+            max_size (optional): The maximum number of cached pairs.
+                When full, the least recently used pairs are evicted.
+
+        Raises:
+            ValueError: If `max_size` is less than one or if either
+                layer is stochastic.
+
+        """
+        if max_size < 1:
+            raise ValueError('Argument `max_size` must be at least 1.')
+        if _is_stochastic(stimuli) or _is_stochastic(kernel):
+            raise ValueError(
+                'The `stimuli` and `kernel` layers must be deterministic.'
+            )
+        self.stimuli = stimuli
+        self.kernel = kernel
+        self.use_group_stimuli = use_group_stimuli
+        self.use_group_kernel = use_group_kernel
+        self.max_size = int(max_size)
+        self.version = 0
+        self.n_hit = 0
+        self.n_miss = 0
+        self._keys = None
+        self._values = None
+        self._last_used = None
+        self._n_call = 0
+        self._checksum = None
+
+    @property
+    def size(self):
+        """The number of cached pairs."""
+        if self._keys is None:
+            return 0
+        return len(self._keys)
+
+    def clear(self):
+        """Remove all cached pairs."""
+        self._keys = None
+        self._values = None
+        self._last_used = None
+
+    def invalidate(self):
+        """Remove all cached pairs because the layer weights changed."""
+        self.clear()
+        self._checksum = None
+        self.version += 1
+
+    def _validate(self):
+        """Invalidate the cache if the layer weights have changed."""
+        checksum = _weight_checksum(self.stimuli, self.kernel)
+        if self._checksum is not None and checksum != self._checksum:
+            self.invalidate()
+        self._checksum = checksum
+
+    def __call__(self, idx_0, idx_1, groups=None, n_sample=None):
+        """Return the similarity between stimulus pairs.
+
+        Args:
+            idx_0: An array-like of stimulus indices.
+                shape=(n_pair,)
+            idx_1: An array-like of stimulus indices.
+                shape=(n_pair,)
+            groups (optional): An array-like of group membership
+                indices. Required if either layer uses groups.
+                shape=(n_pair, n_col)
+            n_sample (optional): The size of an additional "sample"
+                axis.
+
+        Returns:
+            s: A tf.Tensor of similarities between stimulus i and
+                stimulus j.
+                shape=(n_pair, [n_sample])
+
+        """
+        use_group = self.use_group_stimuli or self.use_group_kernel
+        if use_group and groups is None:
+            raise ValueError(
+                'Argument `groups` is required when the stimuli or kernel '
+                'layer uses groups.'
+            )
+
+        idx_0 = np.asarray(idx_0, dtype=np.int32)
+        idx_1 = np.asarray(idx_1, dtype=np.int32)
+        n_pair = len(idx_0)
+        if n_pair == 0:
+            shape = [0] if n_sample is None else [0, n_sample]
+            return tf.zeros(shape)
+
+        self._validate()
+
+        # Pack each pair into a single row key.
+        columns = [idx_0[:, np.newaxis], idx_1[:, np.newaxis]]
+        if use_group:
+            groups = np.asarray(groups, dtype=np.int32)
+            columns.append(groups)
+        rows = np.ascontiguousarray(np.concatenate(columns, axis=1))
+        keys = rows.view(
+            np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))
+        ).ravel()
+        unique_keys, unique_first, unique_inverse = np.unique(
+            keys, return_index=True, return_inverse=True
+        )
+        unique_inverse = unique_inverse.ravel()
+
+        # Look up unique pairs in the (sorted) cache.
+        self._n_call += 1
+        if self._keys is None:
+            is_hit = np.zeros([len(unique_keys)], dtype=bool)
+            loc = np.zeros([len(unique_keys)], dtype=int)
+        else:
+            loc = np.searchsorted(self._keys, unique_keys)
+            loc = np.minimum(loc, len(self._keys) - 1)
+            is_hit = self._keys[loc] == unique_keys
+        is_miss = np.logical_not(is_hit)
+
+        s_unique = None
+        if np.any(is_hit):
+            hit_loc = loc[is_hit]
+            self._last_used[hit_loc] = self._n_call
+            s_unique = np.empty(
+                [len(unique_keys)], dtype=self._values.dtype
+            )
+            s_unique[is_hit] = self._values[hit_loc]
+
+        if np.any(is_miss):
+            first = unique_first[is_miss]
+            s_missing = self._compute(
+                idx_0[first], idx_1[first],
+                groups[first] if use_group else None
+            )
+            if s_unique is None:
+                s_unique = np.empty([len(unique_keys)], dtype=s_missing.dtype)
+            s_unique[is_miss] = s_missing
+            self._insert(unique_keys[is_miss], s_missing)
+
+        self.n_hit += int(np.sum(is_hit[unique_inverse]))
+        self.n_miss += int(np.sum(is_miss))
+
+        s = s_unique[unique_inverse]
+        if n_sample is not None:
+            s = np.repeat(s[:, np.newaxis], n_sample, axis=1)
+        return tf.constant(s)
+
+    def _insert(self, keys, values):
+        """Insert new pairs and evict least recently used pairs."""
+        last_used = np.full([len(keys)], self._n_call, dtype=np.int64)
+        if self._keys is not None:
+            keys = np.concatenate([self._keys, keys])
+            values = np.concatenate([self._values, values])
+            last_used = np.concatenate([self._last_used, last_used])
+
+        if len(keys) > self.max_size:
+            keep = np.argpartition(
+                -last_used, self.max_size - 1
+            )[0:self.max_size]
+            keys = keys[keep]
+            values = values[keep]
+            last_used = last_used[keep]
+
+        idx_sort = np.argsort(keys)
+        self._keys = keys[idx_sort]
+        self._values = values[idx_sort]
+        self._last_used = last_used[idx_sort]
+
+    def _compute(self, idx_0, idx_1, groups):
+        """Compute similarities using the layers."""
+        idx_0 = tf.constant(idx_0, dtype=tf.int32)
+        idx_1 = tf.constant(idx_1, dtype=tf.int32)
+        if groups is not None:
+            groups = tf.constant(groups, dtype=tf.int32)
+
+        if self.use_group_stimuli:
+            z_0 = self.stimuli([idx_0, groups])
+            z_1 = self.stimuli([idx_1, groups])
+        else:
+            z_0 = self.stimuli(idx_0)
+            z_1 = self.stimuli(idx_1)
+
+        if self.use_group_kernel:
+            s = self.kernel([z_0, z_1, groups])
+        else:
+            s = self.kernel([z_0, z_1])
+        return s.numpy()
+
+
+def _weight_checksum(*layers):
+    """Return a checksum of the weights of `layers`.
+
+    Each weight is projected onto a fixed pseudo-random direction in
+    double precision, so that any change of a weight (including a
+    permutation of its elements) changes the checksum.
+
+    Args:
+        layers: A sequence of tf.keras.layers.Layer objects.
+
+    Returns:
+        A tuple of (shape, projection) pairs, one per weight.
+
+    """
+    checksum = []
+    for layer in layers:
+        for i_weight, weight in enumerate(layer.weights):
+            w = tf.reshape(tf.cast(weight, tf.float64), [-1])
+            probe = tf.random.stateless_normal(
+                tf.shape(w), seed=[i_weight, 0], dtype=tf.float64
+            )
+            checksum.append(
+                (tuple(weight.shape), float(tf.reduce_sum(w * probe)))
+            )
+    return tuple(checksum)
+
+
+def _is_stochastic(layer):
+    """Return True if `layer` or any of its sublayers is stochastic."""
+    # Imported here to avoid a circular import with `psiz.keras`.
+    from psiz.keras.layers import (
+        MinkowskiStochastic, StochasticEmbedding, Variational
+    )
+    stochastic_types = (MinkowskiStochastic, StochasticEmbedding, Variational)
+    for module in (layer,) + tuple(layer.submodules):
+        if isinstance(module, stochastic_types):
+            return True
+    return False
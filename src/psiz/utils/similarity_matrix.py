@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Module of utility functions.
+
+Functions:
+    similarity_matrix: Compute a dense pairwise similarity matrix.
+
+"""
+
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from psiz.utils.progress_bar_re import ProgressBarRe
+
+
+def similarity_matrix(
+        stimuli, kernel, indices, groups=None, use_group_stimuli=False,
+        use_group_kernel=False, tile_size=1024, symmetric=False,
+        filepath=None, verbose=0):
+    """Return the dense similarity matrix of a set of stimuli.
+
+    The embedding of every stimulus is retrieved once. The matrix is
+    then computed tile-by-tile, where each tile of
+    `tile_size x tile_size` similarities is evaluated by a single
+    (broadcasted) call of the `kernel` layer.
+
+    Args:
+        stimuli: A tf.keras.layers.Layer with stimuli semantics.
+        kernel: A tf.keras.layers.Layer with kernel semantics.
+        indices: An scalar integer or an array-like of integers
+            indicating stimulus indices. If a scalar, indices are
+            `np.arange(n)`.
+        groups (optional): Array-like integers indicating group
+            membership information. For example, `[4, 3]` indicates
+            that the first optional column has a value of 4 and the
+            second optional column has a value of 3.
+        use_group_stimuli (optional): Boolean indicating if `stimuli`
+            layer should receive group input.
+        use_group_kernel (optional): Boolean indicating if `kernel`
+            layer should receive group input.
+        tile_size (optional): The number of rows (and columns) of a
+            tile. Memory usage of a tile scales with
+            `tile_size**2 * n_dim`.
+        symmetric (optional): Boolean indicating if the kernel is
+            symmetric. If `True`, only tiles on or above the diagonal
+            are computed and mirrored below the diagonal.
+        filepath (optional): If provided, the matrix is written to a
+            memory-mapped `.npy` file at this location (see
+            `numpy.lib.format.open_memmap`) instead of being held in
+            memory.
+        verbose (optional): Verbosity of output.
+
+    Returns:
+        simmat: A 2D array of similarities where element `(i, j)`
+            is the similarity between `indices[i]` and `indices[j]`.
+            If `filepath` is provided, a `numpy.memmap` is returned.
+            shape=(n_idx, n_idx)
+
+    Notes:
+        If `stimuli` or `kernel` are stochastic, a single draw is
+        used for the entire matrix.
+
+    """
+    indices = np.array(indices, copy=False)
+    if indices.ndim == 0:
+        indices = np.arange(indices)
+    elif indices.ndim != 1:
+        raise ValueError('Argument `indices` must be scalar or 1D.')
+    n_idx = len(indices)
+
+    if tile_size < 1:
+        raise ValueError('Argument `tile_size` must be at least 1.')
+    tile_size = int(np.minimum(tile_size, np.maximum(n_idx, 1)))
+
+    use_group = use_group_stimuli or use_group_kernel
+    if use_group:
+        if groups is None:
+            raise ValueError(
+                'Argument `groups` is required when the stimuli or kernel '
+                'layer uses groups.'
+            )
+        groups = np.array(groups, dtype=np.int32)
+
+    # Embed all stimuli once.
+    idx = tf.constant(indices, dtype=tf.int32)
+    if use_group_stimuli:
+        z = stimuli([idx, _group_matrix(groups, n_idx)])
+    else:
+        z = stimuli(idx)
+
+    if filepath is not None:
+        simmat = np.lib.format.open_memmap(
+            os.fspath(filepath), mode='w+', dtype=np.float32,
+            shape=(n_idx, n_idx)
+        )
+    else:
+        simmat = np.empty([n_idx, n_idx], dtype=np.float32)
+
+    tile_start = np.arange(0, n_idx, tile_size)
+    tile_list = []
+    for i_tile, row_start in enumerate(tile_start):
+        for j_tile, col_start in enumerate(tile_start):
+            if symmetric and j_tile < i_tile:
+                continue
+            tile_list.append((row_start, col_start))
+
+    if verbose > 0:
+        progbar = ProgressBarRe(
+            len(tile_list), prefix='Similarity:', length=50
+        )
+        progbar.update(0)
+
+    for i_tile, (row_start, col_start) in enumerate(tile_list):
+        row_stop = np.minimum(row_start + tile_size, n_idx)
+        col_stop = np.minimum(col_start + tile_size, n_idx)
+        n_row = row_stop - row_start
+        n_col = col_stop - col_start
+
+        # Broadcast embeddings to TensorShape([n_row, n_col, n_dim]).
+        z_row = tf.expand_dims(z[row_start:row_stop], axis=1)
+        z_col = tf.expand_dims(z[col_start:col_stop], axis=0)
+        tile_shape = tf.stack([n_row, n_col, tf.shape(z)[-1]])
+        z_row = tf.broadcast_to(z_row, tile_shape)
+        z_col = tf.broadcast_to(z_col, tile_shape)
+
+        if use_group_kernel:
+            s_tile = kernel([z_row, z_col, _group_matrix(groups, n_row)])
+        else:
+            s_tile = kernel([z_row, z_col])
+        s_tile = s_tile.numpy()
+
+        simmat[row_start:row_stop, col_start:col_stop] = s_tile
+        if symmetric and row_start != col_start:
+            simmat[col_start:col_stop, row_start:row_stop] = s_tile.T
+
+        if verbose > 0:
+            progbar.update(i_tile + 1)
+
+    if filepath is not None:
+        simmat.flush()
+
+    return simmat
+
+
+def _group_matrix(groups, n_row):
+    """Repeat group membership for `n_row` rows."""
+    group_matrix = np.repeat(np.expand_dims(groups, axis=0), n_row, axis=0)
+    return tf.constant(group_matrix, dtype=tf.int32)
@@ -685,6 +685,188 @@ def test_fit_mle_2stimuli_2kernel(
     model.evaluate(ds_rank_obs_2g)
 
 
+def test_fit_mle_1g_jit_compile(rank_1g_mle_v2, ds_rank_obs_2g):
+    """Test fit with XLA compilation."""
+    tf.config.run_functions_eagerly(False)
+    model = rank_1g_mle_v2
+    compile_kwargs = {
+        'loss': tf.keras.losses.CategoricalCrossentropy(),
+        'optimizer': tf.keras.optimizers.Adam(learning_rate=.001),
+        'weighted_metrics': [
+            tf.keras.metrics.CategoricalCrossentropy(name='cce')
+        ],
+        'jit_compile': True
+    }
+    model.compile(**compile_kwargs)
+
+    # Fit one epoch.
+    model.fit(ds_rank_obs_2g, epochs=2)
+
+    # Evaluate.
+    model.evaluate(ds_rank_obs_2g)
+
+
+def test_prepare_gradients(rank_1g_mle_v2, ds_rank_obs_2g):
+    """Test that only constrained sparse gradients are densified."""
+    model = rank_1g_mle_v2
+    constrained = tf.Variable(
+        tf.zeros([21, 3]), constraint=tf.keras.constraints.NonNeg()
+    )
+    unconstrained = tf.Variable(tf.zeros([21, 3]))
+    grad_sparse = tf.IndexedSlices(
+        values=tf.ones([2, 3]), indices=tf.constant([1, 4]),
+        dense_shape=tf.constant([21, 3])
+    )
+
+    gradients = model._prepare_gradients(
+        [grad_sparse, grad_sparse], [unconstrained, constrained]
+    )
+
+    assert isinstance(gradients[0], tf.IndexedSlices)
+    assert not isinstance(gradients[1], tf.IndexedSlices)
+    desired = np.zeros([21, 3])
+    desired[[1, 4]] = 1.
+    np.testing.assert_array_equal(gradients[1].numpy(), desired)
+
+
+@pytest.mark.parametrize(
+    "is_eager", [True, False]
+)
+def test_fit_sparse_update(ds_rank_obs_2g, is_eager):
+    """Test sparse update of a constrained embedding."""
+    tf.config.run_functions_eagerly(is_eager)
+    n_stimuli = 30
+    n_dim = 3
+    # Initialize with values that violate the constraint.
+    rng = np.random.default_rng(seed=252)
+    z_init = rng.uniform(-1., -.5, size=[n_stimuli + 1, n_dim])
+    stimuli = tf.keras.layers.Embedding(
+        n_stimuli + 1, n_dim, mask_zero=True,
+        embeddings_initializer=tf.keras.initializers.Constant(z_init),
+        embeddings_constraint=tf.keras.constraints.NonNeg()
+    )
+    kernel = psiz.keras.layers.DistanceBased(
+        distance=psiz.keras.layers.Minkowski(
+            rho_initializer=tf.keras.initializers.Constant(2.),
+            w_initializer=tf.keras.initializers.Constant(1.),
+            trainable=False
+        ),
+        similarity=psiz.keras.layers.ExponentialSimilarity(
+            trainable=False,
+            beta_initializer=tf.keras.initializers.Constant(10.),
+            tau_initializer=tf.keras.initializers.Constant(1.),
+            gamma_initializer=tf.keras.initializers.Constant(0.001),
+        )
+    )
+    model = psiz.keras.models.Rank(
+        stimuli=stimuli, kernel=kernel, sparse_update=True
+    )
+    assert model.sparse_update
+    compile_kwargs = {
+        'loss': tf.keras.losses.CategoricalCrossentropy(),
+        'optimizer': tf.keras.optimizers.Adam(learning_rate=.001),
+    }
+    model.compile(**compile_kwargs)
+
+    model.fit(ds_rank_obs_2g, epochs=2)
+
+    # Only rows that appear in the data are updated and constrained.
+    embeddings = model.stimuli.embeddings.numpy()
+    touched = np.array([
+        0, 1, 2, 3, 4, 5, 6, 7, 8, 10, 13, 14, 15, 16, 17, 18
+    ])
+    untouched = np.setdiff1d(np.arange(n_stimuli + 1), touched)
+    np.testing.assert_array_equal(embeddings[touched], 0.)
+    np.testing.assert_allclose(embeddings[untouched], z_init[untouched])
+
+    # The constraint is restored after the update.
+    assert isinstance(
+        model.stimuli.embeddings.constraint, tf.keras.constraints.NonNeg
+    )
+    assert model.get_config()['sparse_update']
+
+
+def test_outcome_positions():
+    """Test mapping of outcome references onto the first outcome."""
+    stimulus_set = np.array((
+        (1, 2, 3, 0),
+        (4, 5, 6, 7),
+    ), dtype=np.int32)
+    docket = psiz.trials.RankDocket(
+        stimulus_set, n_select=np.array((1, 1)), mask_zero=True
+    )
+    stimulus_set = docket.all_outcomes()
+
+    outcome_idx = psiz.keras.models.Rank._outcome_positions(
+        tf.constant(stimulus_set)
+    ).numpy()
+
+    ref = stimulus_set[:, 1:]
+    for i_trial in range(stimulus_set.shape[0]):
+        ref_gathered = ref[i_trial, outcome_idx[i_trial], 0]
+        is_present = ref[i_trial] != 0
+        np.testing.assert_array_equal(
+            ref_gathered[is_present], ref[i_trial][is_present]
+        )
+
+
+def test_evaluate_observed_outcome(rank_1g_mle_v2):
+    """Test loss using only the observed outcome matches all outcomes."""
+    stimulus_set = np.array((
+        (1, 2, 3, 0, 0, 0, 0, 0, 0),
+        (10, 13, 8, 0, 0, 0, 0, 0, 0),
+        (4, 5, 6, 7, 8, 0, 0, 0, 0),
+        (4, 5, 6, 7, 14, 15, 16, 17, 18)
+    ), dtype=np.int32)
+    n_select = np.array((1, 1, 1, 2), dtype=np.int32)
+    obs = psiz.trials.RankObservations(
+        stimulus_set, n_select=n_select, mask_zero=True
+    )
+    ds_all = obs.as_dataset().batch(4, drop_remainder=False)
+    ds_observed = obs.as_dataset(all_outcomes=False).batch(
+        4, drop_remainder=False
+    )
+
+    model = rank_1g_mle_v2
+    model.compile(
+        loss=tf.keras.losses.CategoricalCrossentropy(),
+        optimizer=tf.keras.optimizers.Adam(learning_rate=.001),
+    )
+    loss_all = model.evaluate(ds_all)
+    loss_observed = model.evaluate(ds_observed)
+    np.testing.assert_allclose(loss_all, loss_observed, rtol=1e-5)
+
+    # Train using only the observed outcome.
+    model.fit(ds_observed, epochs=2)
+
+
+def test_is_rowwise_constrained():
+    """Test detection of row-wise constraints."""
+    from psiz.keras.models.psych_embedding import _is_rowwise_constrained
+
+    def make_var(constraint):
+        return tf.Variable(tf.zeros([4, 2]), constraint=constraint)
+
+    assert _is_rowwise_constrained(
+        make_var(tf.keras.constraints.NonNeg())
+    )
+    assert _is_rowwise_constrained(
+        make_var(psiz.keras.constraints.GreaterEqualThan(min_value=.1))
+    )
+    assert _is_rowwise_constrained(
+        make_var(psiz.keras.constraints.NonNegNorm(axis=1))
+    )
+    assert _is_rowwise_constrained(
+        make_var(tf.keras.constraints.MaxNorm(axis=-1))
+    )
+    assert not _is_rowwise_constrained(
+        make_var(psiz.keras.constraints.Center(axis=0))
+    )
+    assert not _is_rowwise_constrained(
+        make_var(psiz.keras.constraints.NonNegNorm(axis=0))
+    )
+
+
 def test_save_load_rank_wtrace(
         rank_1g_mle, tmpdir, ds_rank_docket, ds_rank_obs_2g):
     """Test loading and saving of embedding model."""
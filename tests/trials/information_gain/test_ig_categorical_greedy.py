@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Test ig_categorical_greedy."""
+
+import numpy as np
+
+from psiz.trials.information_gain import ig_categorical_greedy
+
+
+def test_avoids_duplicates():
+    """Test that a redundant candidate is not selected."""
+    # Four equally weighted posterior samples. Candidates 0 and 1 are
+    # identical and distinguish samples {0, 1} from {2, 3}. Candidate 2
+    # (noisily) distinguishes samples {0, 2} from {1, 3}.
+    y_pred = np.array(
+        [
+            [[.99, .01], [.99, .01], [.01, .99], [.01, .99]],
+            [[.99, .01], [.99, .01], [.01, .99], [.01, .99]],
+            [[.9, .1], [.1, .9], [.9, .1], [.1, .9]],
+        ]
+    )
+
+    indices, expected_ig = ig_categorical_greedy(y_pred, 2)
+
+    # Candidates 0 and 1 tie, the first is selected.
+    np.testing.assert_array_equal(indices, np.array([0, 2]))
+    # The first gain is the unconditional expected information gain.
+    y_mean = np.mean(y_pred[0], axis=0)
+    ig_0 = (
+        -np.sum(y_mean * np.log(y_mean))
+        + np.mean(np.sum(y_pred[0] * np.log(y_pred[0]), axis=1))
+    )
+    np.testing.assert_allclose(expected_ig[0], ig_0)
+    assert expected_ig[1] > 0
+
+
+def test_n_trial_exceeds_candidates():
+    """Test requesting more trials than candidates."""
+    rng = np.random.default_rng(seed=252)
+    y_pred = rng.random([3, 5, 4])
+    y_pred = y_pred / np.sum(y_pred, axis=2, keepdims=True)
+
+    indices, expected_ig = ig_categorical_greedy(y_pred, 10)
+
+    assert len(indices) == 3
+    assert len(expected_ig) == 3
+    np.testing.assert_array_equal(np.sort(indices), np.arange(3))
@@ -15,6 +15,8 @@
 # ============================================================================
 """Test trials module."""
 
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import pytest
 import tensorflow as tf
@@ -187,3 +189,48 @@ def test_2_models(model_0, model_1, ds_rank_docket):
 
     # Assert that IG of first and last in correct order.
     tf.debugging.assert_greater(ig[0], ig[-1])
+
+
+def test_2_models_parallel(model_0, model_1, ds_rank_docket):
+    """Test IG computation evaluating two models concurrently."""
+    ig = []
+    for x in ds_rank_docket:
+        ig.append(ig_model_categorical([model_0, model_1], x, n_worker=2))
+    ig = tf.concat(ig, 0)
+
+    # Assert IG values are in the right ballpark.
+    ig_desired = tf.constant(
+        [
+            0.01855242, 0.01478302, 0.01481092, 0.01253963, 0.0020327,
+            0.00101262
+        ], dtype=tf.float32
+    )
+    tf.debugging.assert_near(ig, ig_desired, rtol=.1)
+
+    # Assert that IG of first and last in correct order.
+    tf.debugging.assert_greater(ig[0], ig[-1])
+
+
+def test_2_models_executor(model_0, model_1, ds_rank_docket):
+    """Test IG computation sharing one executor across batches."""
+    ig = []
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        for x in ds_rank_docket:
+            ig.append(
+                ig_model_categorical(
+                    [model_0, model_1], x, executor=executor
+                )
+            )
+    ig = tf.concat(ig, 0)
+
+    # Assert IG values are in the right ballpark.
+    ig_desired = tf.constant(
+        [
+            0.01855242, 0.01478302, 0.01481092, 0.01253963, 0.0020327,
+            0.00101262
+        ], dtype=tf.float32
+    )
+    tf.debugging.assert_near(ig, ig_desired, rtol=.1)
+
+    # Assert that IG of first and last in correct order.
+    tf.debugging.assert_greater(ig[0], ig[-1])
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Test predict_ensemble."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from psiz.trials.information_gain import predict_ensemble
+
+
+class ScaleModel(object):
+    """A deterministic stand-in for a model."""
+
+    def __init__(self, scale):
+        """Initialize."""
+        self.scale = scale
+
+    def __call__(self, inputs, training=False):
+        """Call."""
+        assert not training
+        return self.scale * inputs
+
+
+@pytest.mark.parametrize("n_worker", [1, 2, 8])
+def test_order(n_worker):
+    """Test that predictions are returned in model order."""
+    model_list = [ScaleModel(scale) for scale in (1., 2., 3.)]
+    inputs = np.arange(4.)
+
+    y_pred = predict_ensemble(model_list, inputs, n_worker=n_worker)
+
+    assert len(y_pred) == 3
+    for scale, y_pred_model in zip((1., 2., 3.), y_pred):
+        np.testing.assert_array_equal(y_pred_model, scale * inputs)
+
+
+def test_executor():
+    """Test that a provided executor is reused across calls."""
+    model_list = [ScaleModel(scale) for scale in (1., 2., 3.)]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        for i_batch in range(3):
+            inputs = np.arange(4.) + i_batch
+            y_pred = predict_ensemble(model_list, inputs, executor=executor)
+            for scale, y_pred_model in zip((1., 2., 3.), y_pred):
+                np.testing.assert_array_equal(y_pred_model, scale * inputs)
+        # The executor is not shut down by `predict_ensemble`.
+        assert executor.submit(abs, -1).result() == 1
@@ -0,0 +1,432 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Test ActiveRank."""
+
+import numpy as np
+import pytest
+import tensorflow as tf
+import tensorflow_probability as tfp
+
+import psiz
+from psiz.trials import ActiveRank
+from psiz.trials.similarity.rank import active_rank
+
+
+@pytest.fixture
+def model_list():
+    """Return an ensemble of two stochastic Rank models."""
+    n_stimuli = 10
+    n_dim = 2
+    rng = np.random.default_rng(252)
+    model_list = []
+    for _ in range(2):
+        loc = rng.normal(scale=.2, size=[n_stimuli + 1, n_dim])
+        stimuli = psiz.keras.layers.EmbeddingNormalDiag(
+            n_stimuli + 1, n_dim, mask_zero=True,
+            loc_initializer=tf.keras.initializers.Constant(loc),
+            scale_initializer=tf.keras.initializers.Constant(
+                tfp.math.softplus_inverse(.05).numpy()
+            )
+        )
+        kernel = psiz.keras.layers.DistanceBased(
+            distance=psiz.keras.layers.Minkowski(
+                rho_initializer=tf.keras.initializers.Constant(2.),
+                w_initializer=tf.keras.initializers.Constant(1.),
+                trainable=False
+            ),
+            similarity=psiz.keras.layers.ExponentialSimilarity(
+                trainable=False,
+                beta_initializer=tf.keras.initializers.Constant(10.),
+                tau_initializer=tf.keras.initializers.Constant(1.),
+                gamma_initializer=tf.keras.initializers.Constant(0.),
+            )
+        )
+        model = psiz.keras.models.Rank(
+            stimuli=stimuli, kernel=kernel, n_sample=10
+        )
+        model_list.append(model)
+    return model_list
+
+
+def query_counts(docket, n_stimuli):
+    """Return the number of trials of each query stimulus."""
+    return np.bincount(docket.stimulus_set[:, 0], minlength=n_stimuli)
+
+
+def assert_sorted_within_query(docket, expected_ig):
+    """Assert that the trials of each query are in descending order."""
+    query_idx = docket.stimulus_set[:, 0]
+    for query in np.unique(query_idx):
+        expected_ig_q = expected_ig[query_idx == query]
+        np.testing.assert_array_equal(
+            expected_ig_q, np.sort(expected_ig_q)[::-1]
+        )
+
+
+def is_subset(stimulus_set, candidate_set):
+    """Return True if every trial is one of the candidates."""
+    candidate_list = set(map(tuple, candidate_set.tolist()))
+    return all(
+        trial in candidate_list for trial in map(tuple, stimulus_set.tolist())
+    )
+
+
+def r_priority_uniform(query_idx, n_stimuli):
+    """Return uniform reference priorities for a query."""
+    r_priority_q = np.ones([n_stimuli]) / (n_stimuli - 1)
+    r_priority_q[query_idx] = 0
+    return r_priority_q
+
+
+@pytest.mark.parametrize("pool_queries", [False, True])
+def test_generate(model_list, pool_queries):
+    """Test generating trials."""
+    n_trial = 13
+    gen = ActiveRank(
+        10, n_reference=2, n_select=1, max_unique_query=4, n_candidate=25,
+        batch_size=16, pool_queries=pool_queries
+    )
+    np.random.seed(252)
+    docket, data = gen.generate(n_trial, model_list)
+
+    assert docket.n_trial == n_trial
+    assert docket.stimulus_set.shape == (n_trial, 3)
+    assert data['docket']['expected_ig'].shape == (n_trial,)
+    assert 'pruning' not in data['meta']
+    assert_sorted_within_query(docket, data['docket']['expected_ig'])
+
+
+def test_pooled_matches_per_query(monkeypatch, model_list):
+    """Test that both modes score the same candidates identically."""
+    sample_qr_sets_batch = active_rank.sample_qr_sets_batch
+    candidate_list = []
+
+    def spy(*args, **kwargs):
+        stimulus_set = sample_qr_sets_batch(*args, **kwargs)
+        candidate_list[-1].append(stimulus_set)
+        return stimulus_set
+
+    def deterministic_ig(model_list, x, executor):
+        """Return a deterministic stand-in for expected IG."""
+        stimulus_set = tf.cast(x['stimulus_set'][:, :, 0], tf.float32)
+        return tf.reduce_sum(tf.sin(stimulus_set * [1.3, 2.1, 3.7]), axis=1)
+
+    monkeypatch.setattr(active_rank, 'sample_qr_sets_batch', spy)
+    monkeypatch.setattr(active_rank, '_ensemble_ig', deterministic_ig)
+    n_trial = 13
+    docket_list = []
+    expected_ig_list = []
+    for pool_queries in (False, True):
+        gen = ActiveRank(
+            10, n_reference=2, max_unique_query=4, n_candidate=25,
+            batch_size=16, pool_queries=pool_queries, seed=252
+        )
+        candidate_list.append([])
+        docket, data = gen.generate(n_trial, model_list)
+        docket_list.append(docket)
+        expected_ig_list.append(data['docket']['expected_ig'])
+
+    # Per-query mode samples the pool one query at a time.
+    assert len(candidate_list[0]) == 4
+    assert len(candidate_list[1]) == 1
+    np.testing.assert_array_equal(
+        np.concatenate(candidate_list[0], axis=0), candidate_list[1][0]
+    )
+    np.testing.assert_array_equal(
+        docket_list[0].stimulus_set, docket_list[1].stimulus_set
+    )
+    np.testing.assert_allclose(expected_ig_list[0], expected_ig_list[1])
+    counts = query_counts(docket_list[1], 10)
+    assert np.sum(counts > 0) == 4
+
+
+def test_pooled_padding(model_list):
+    """Test that padding candidates never reach the output."""
+    gen = ActiveRank(
+        10, n_reference=2, n_candidate=7, batch_size=16, pool_queries=True
+    )
+    # A pool of 3 queries with 7 candidates each requires 11 padding
+    # rows to fill two batches.
+    reference_idx = np.arange(7)
+    stimulus_set = np.stack([
+        np.repeat(np.array([7, 8, 9]), 7),
+        np.tile(reference_idx, 3),
+        np.tile(np.mod(reference_idx + 1, 7), 3)
+    ], axis=1).astype(np.int32)
+    expected_ig = gen._score_pool(model_list, stimulus_set, [0], None, 0)
+    assert expected_ig.shape == (21,)
+
+    # The padding repeats the first candidate of the first query, so a
+    # leak would inflate the number of trials of that query.
+    np.random.seed(252)
+    docket, data = gen.generate(9, model_list)
+    counts = query_counts(docket, 10)
+    assert np.sum(counts) == 9
+    assert np.max(counts) - np.min(counts[counts > 0]) <= 1
+    assert_sorted_within_query(docket, data['docket']['expected_ig'])
+
+
+def test_generate_greedy(model_list):
+    """Test generating trials with greedy selection."""
+    n_trial = 13
+    gen = ActiveRank(
+        10, n_reference=2, n_select=1, max_unique_query=4, n_candidate=25,
+        batch_size=16, selection='greedy'
+    )
+    np.random.seed(252)
+    docket, data = gen.generate(n_trial, model_list)
+
+    assert docket.n_trial == n_trial
+    assert docket.stimulus_set.shape == (n_trial, 3)
+    np.testing.assert_array_equal(
+        np.sort(query_counts(docket, 10))[-4:], [3, 3, 3, 4]
+    )
+    expected_ig = data['docket']['expected_ig']
+    assert expected_ig.shape == (n_trial,)
+    assert np.all(np.isfinite(expected_ig))
+    assert np.all(expected_ig > -1e-6)
+
+    # Queries never serve as references.
+    is_query = np.equal(
+        docket.stimulus_set[:, 1:], docket.stimulus_set[:, 0:1]
+    )
+    assert not np.any(is_query)
+
+
+def test_invalid_selection():
+    """Test invalid `selection` arguments."""
+    with pytest.raises(ValueError):
+        ActiveRank(10, selection='best')
+    with pytest.raises(ValueError):
+        ActiveRank(10, selection='greedy', pool_queries=True)
+
+
+def test_set_n_sample(model_list):
+    """Test setting and restoring the number of samples."""
+    n_sample_list = active_rank._set_n_sample(model_list, 3)
+    assert n_sample_list == [10, 10]
+    assert [model.n_sample for model in model_list] == [3, 3]
+
+    n_sample_list = active_rank._set_n_sample(model_list, [10, 5])
+    assert n_sample_list == [3, 3]
+    assert [model.n_sample for model in model_list] == [10, 5]
+
+
+@pytest.mark.parametrize("selection", ["top", "greedy"])
+def test_select_query_references_pruning(
+        monkeypatch, model_list, selection):
+    """Test that survivors are candidates scored by the proxy."""
+    score_candidates = active_rank._score_candidates
+    call_list = []
+
+    def spy(model_list, docket, groups, batch_size, executor):
+        call_list.append((
+            docket.stimulus_set.copy(),
+            [model.n_sample for model in model_list]
+        ))
+        return score_candidates(
+            model_list, docket, groups, batch_size, executor
+        )
+
+    monkeypatch.setattr(active_rank, '_score_candidates', spy)
+    n_candidate = 20
+    n_survivor = 5
+    n_trial_q = 2
+    docket, expected_ig, pruning_stats = (
+        active_rank._select_query_references(
+            0, model_list, [0], np.array([3]), np.array([n_trial_q]),
+            2, 1, n_candidate, r_priority_uniform(3, 10), 16, None,
+            selection, n_survivor, 4
+        )
+    )
+
+    # The proxy scores all candidates with `proxy_n_sample` samples.
+    (candidate_set, n_sample_list) = call_list[0]
+    assert candidate_set.shape == (n_candidate, 3)
+    assert n_sample_list == [4, 4]
+    if selection == 'top':
+        # The survivors are scored with all samples.
+        assert len(call_list) == 2
+        (survivor_set, n_sample_list) = call_list[1]
+        assert survivor_set.shape == (n_survivor, 3)
+        assert n_sample_list == [10, 10]
+        assert is_subset(survivor_set, candidate_set)
+    else:
+        assert len(call_list) == 1
+
+    # The number of samples is restored after the proxy stage.
+    assert [model.n_sample for model in model_list] == [10, 10]
+    assert docket.n_trial == n_trial_q
+    assert expected_ig.shape == (n_trial_q,)
+    assert is_subset(docket.stimulus_set, candidate_set)
+    assert pruning_stats[3] == n_trial_q
+    assert 0 <= pruning_stats[2] <= pruning_stats[3]
+
+
+def test_select_references_pooled_pruning(monkeypatch, model_list):
+    """Test that pooled survivors are candidates scored by the proxy."""
+    score_pool = ActiveRank._score_pool
+    call_list = []
+
+    def spy(self, model_list, stimulus_set, groups, executor, verbose):
+        call_list.append((
+            stimulus_set.copy(),
+            [model.n_sample for model in model_list]
+        ))
+        return score_pool(
+            self, model_list, stimulus_set, groups, executor, verbose
+        )
+
+    monkeypatch.setattr(ActiveRank, '_score_pool', spy)
+    n_candidate = 20
+    n_survivor = 5
+    gen = ActiveRank(
+        10, n_reference=2, max_unique_query=4, n_candidate=n_candidate,
+        batch_size=16, pool_queries=True, n_survivor=n_survivor,
+        proxy_n_sample=4
+    )
+    np.random.seed(252)
+    docket, _ = gen.generate(13, model_list)
+
+    assert len(call_list) == 2
+    (candidate_set, n_sample_list) = call_list[0]
+    assert candidate_set.shape == (4 * n_candidate, 3)
+    assert n_sample_list == [4, 4]
+    (survivor_set, n_sample_list) = call_list[1]
+    assert survivor_set.shape == (4 * n_survivor, 3)
+    assert n_sample_list == [10, 10]
+    assert is_subset(survivor_set, candidate_set)
+    # The survivors of each query are contiguous.
+    np.testing.assert_array_equal(
+        survivor_set[:, 0],
+        np.repeat(candidate_set[::n_candidate, 0], n_survivor)
+    )
+
+    assert [model.n_sample for model in model_list] == [10, 10]
+    assert is_subset(docket.stimulus_set, survivor_set)
+
+
+@pytest.mark.parametrize("pool_queries", [False, True])
+def test_pruning_restores_n_sample_on_error(
+        monkeypatch, model_list, pool_queries):
+    """Test that the number of samples is restored if scoring fails."""
+    def fail(*args):
+        raise RuntimeError("Scoring failed.")
+
+    monkeypatch.setattr(active_rank, '_score_candidates', fail)
+    monkeypatch.setattr(ActiveRank, '_score_pool', fail)
+    gen = ActiveRank(
+        10, n_reference=2, max_unique_query=4, n_candidate=20,
+        batch_size=16, pool_queries=pool_queries, n_survivor=5,
+        proxy_n_sample=4
+    )
+    with pytest.raises(RuntimeError):
+        gen.generate(13, model_list)
+    assert [model.n_sample for model in model_list] == [10, 10]
+
+
+@pytest.mark.parametrize("pool_queries", [False, True])
+def test_pruning_too_few_survivors(model_list, pool_queries):
+    """Test that survivors must cover the trials of each query."""
+    gen = ActiveRank(
+        10, n_reference=2, max_unique_query=1, n_candidate=20,
+        batch_size=16, pool_queries=pool_queries, n_survivor=2
+    )
+    with pytest.raises(ValueError):
+        gen.generate(4, model_list)
+
+
+@pytest.mark.parametrize("pool_queries", [False, True])
+def test_pruning_meta(model_list, pool_queries):
+    """Test the pruning statistics."""
+    gen = ActiveRank(
+        10, n_reference=2, max_unique_query=4, n_candidate=20,
+        batch_size=16, pool_queries=pool_queries, n_survivor=5,
+        proxy_n_sample=4
+    )
+    np.random.seed(252)
+    docket, data = gen.generate(13, model_list)
+
+    assert docket.n_trial == 13
+    pruning = data['meta']['pruning']
+    assert set(pruning.keys()) == {
+        'n_candidate', 'n_survivor', 'proxy_n_sample', 'proxy_duration_s',
+        'full_duration_s', 'top_agreement'
+    }
+    assert pruning['n_candidate'] == 20
+    assert pruning['n_survivor'] == 5
+    assert pruning['proxy_n_sample'] == 4
+    assert pruning['proxy_duration_s'] >= 0.
+    assert pruning['full_duration_s'] >= 0.
+    assert 0. <= pruning['top_agreement'] <= 1.
+
+
+def test_proxy_n_sample_per_model(monkeypatch, model_list):
+    """Test that the proxy never draws more samples than a model."""
+    score_pool = ActiveRank._score_pool
+    n_sample_call_list = []
+
+    def spy(self, model_list, stimulus_set, groups, executor, verbose):
+        n_sample_call_list.append([model.n_sample for model in model_list])
+        return score_pool(
+            self, model_list, stimulus_set, groups, executor, verbose
+        )
+
+    monkeypatch.setattr(ActiveRank, '_score_pool', spy)
+    model_list[1].n_sample = 3
+    gen = ActiveRank(
+        10, n_reference=2, max_unique_query=4, n_candidate=20,
+        batch_size=16, pool_queries=True, n_survivor=5, proxy_n_sample=4
+    )
+    _, data = gen.generate(13, model_list)
+
+    assert n_sample_call_list == [[4, 3], [10, 3]]
+    assert [model.n_sample for model in model_list] == [10, 3]
+    assert 'pruning' in data['meta']
+
+
+@pytest.mark.parametrize("pool_queries", [False, True])
+def test_pruning_skipped_if_proxy_not_cheaper(
+        monkeypatch, model_list, pool_queries):
+    """Test that candidates are not pruned by an equally costly proxy."""
+    def fail(*args):
+        raise RuntimeError("Candidates should not be pruned.")
+
+    monkeypatch.setattr(active_rank, '_set_n_sample', fail)
+    gen = ActiveRank(
+        10, n_reference=2, max_unique_query=4, n_candidate=20,
+        batch_size=16, pool_queries=pool_queries, n_survivor=5,
+        proxy_n_sample=10
+    )
+    docket, data = gen.generate(13, model_list)
+
+    assert docket.n_trial == 13
+    assert 'pruning' not in data['meta']
+
+
+def test_pruning_meta_no_trials(monkeypatch, model_list):
+    """Test that `top_agreement` is NaN if no trials were selected."""
+    def select_references(self, *args):
+        return None, np.zeros([0]), np.zeros([4])
+
+    monkeypatch.setattr(ActiveRank, '_select_references', select_references)
+    gen = ActiveRank(
+        10, n_reference=2, max_unique_query=4, n_candidate=20,
+        batch_size=16, n_survivor=5, proxy_n_sample=4
+    )
+    _, data = gen.generate(13, model_list)
+
+    assert np.isnan(data['meta']['pruning']['top_agreement'])
@@ -323,3 +323,43 @@ def test_raise_exception():
     with pytest.raises(Exception) as e_info:
         gen.generate(n_trial_per_query, per_query=True)
     assert e_info.type == ValueError
+
+
+@pytest.mark.parametrize("replace", [True, False])
+def test_seed_multiprocess(replace):
+    """Test that generation is deterministic regardless of `n_worker`."""
+    eligible_indices = np.arange(1, 31)
+    gen = RandomRank(
+        eligible_indices, n_reference=3, replace=replace, seed=252
+    )
+    docket_0 = gen.generate(200)
+    docket_1 = gen.generate(200)
+    np.testing.assert_array_equal(
+        docket_0.stimulus_set, docket_1.stimulus_set
+    )
+
+    gen = RandomRank(
+        eligible_indices, n_reference=3, replace=replace, seed=252,
+        n_worker=3
+    )
+    docket_2 = gen.generate(200)
+    np.testing.assert_array_equal(
+        docket_0.stimulus_set, docket_2.stimulus_set
+    )
+
+
+def test_multiprocess_unique_limit():
+    """Test multiprocessing when fewer unique trials are possible."""
+    n_stimuli = 6
+    gen = RandomRank(
+        np.arange(n_stimuli), n_reference=4, replace=False, seed=3,
+        n_worker=2
+    )
+    # Only 5 unique trials are possible for each query.
+    docket = gen.generate(20, per_query=True)
+
+    assert docket.n_trial == 5 * n_stimuli
+    _, query_count = np.unique(docket.stimulus_set[:, 0], return_counts=True)
+    np.testing.assert_array_equal(query_count, np.full([n_stimuli], 5))
+    n_unique = len(np.unique(docket.stimulus_set, axis=0))
+    assert n_unique == 5 * n_stimuli
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Test RankObservationStore."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from psiz import trials
+
+
+@pytest.fixture(scope="module")
+def obs_list():
+    """A list of observations with varying configurations."""
+    obs_0 = trials.RankObservations(
+        np.array(
+            ((1, 2, 3), (4, 5, 6), (7, 8, 9)), dtype=np.int32
+        ),
+        mask_zero=True,
+        groups=np.array(([0], [1], [0]), dtype=np.int32),
+        weight=np.array((1., .5, 1.))
+    )
+    obs_1 = trials.RankObservations(
+        np.array(
+            ((1, 2, 3, 4, 5), (4, 5, 6, 0, 0)), dtype=np.int32
+        ),
+        n_select=np.array((2, 1), dtype=np.int32),
+        mask_zero=True,
+        groups=np.array(([0], [1]), dtype=np.int32),
+        agent_id=np.array((3, 4), dtype=np.int32)
+    )
+    obs_2 = trials.RankObservations(
+        np.array(((7, 8, 9),), dtype=np.int32),
+        mask_zero=True,
+        groups=np.array(([2],), dtype=np.int32)
+    )
+    return [obs_0, obs_1, obs_2]
+
+
+def test_append(obs_list):
+    """Test that appending matches stacking."""
+    store = trials.RankObservationStore(mask_zero=True, capacity=2)
+    for obs in obs_list:
+        store.append(obs)
+    obs_store = store.snapshot()
+    obs_desired = trials.stack(obs_list)
+
+    assert store.n_trial == 6
+    assert store.n_config == 4
+    for name in (
+        'stimulus_set', 'n_select', 'is_ranked', 'groups', 'agent_id',
+        'session_id', 'weight', 'rt_ms', 'config_idx'
+    ):
+        np.testing.assert_array_equal(
+            getattr(obs_store, name), getattr(obs_desired, name)
+        )
+    pd.testing.assert_frame_equal(
+        obs_store.config_list, obs_desired.config_list
+    )
+    np.testing.assert_array_equal(
+        obs_store.all_outcomes(), obs_desired.all_outcomes()
+    )
+
+
+def test_snapshot(obs_list):
+    """Test that snapshots are not changed by later appends."""
+    store = trials.RankObservationStore(mask_zero=True, capacity=4)
+    store.append(obs_list[0])
+    obs_0 = store.snapshot()
+    store.append(obs_list[1])
+    store.append(obs_list[2])
+    obs_1 = store.snapshot()
+
+    assert obs_0.n_trial == 3
+    assert obs_0.stimulus_set.shape == (3, 3)
+    assert len(obs_0.config_list) == 2
+    assert obs_1.n_trial == 6
+    assert len(obs_1.config_list) == 4
+    np.testing.assert_array_equal(
+        obs_0.stimulus_set, obs_list[0].stimulus_set
+    )
+
+    # Snapshots are read-only.
+    with pytest.raises(ValueError):
+        obs_0.weight[0] = 2.
+
+
+def test_snapshot_not_revalidated(obs_list, monkeypatch):
+    """Test that a snapshot does not call the constructor."""
+    store = trials.RankObservationStore(mask_zero=True)
+    for obs in obs_list:
+        store.append(obs)
+    obs_desired = trials.stack(obs_list)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('The constructor should not be called.')
+
+    monkeypatch.setattr(trials.RankObservations, '__init__', fail)
+    obs_store = store.snapshot()
+
+    assert obs_store.n_trial == obs_desired.n_trial
+    assert obs_store.max_n_reference == obs_desired.max_n_reference
+    for name in ('n_present', 'n_reference'):
+        np.testing.assert_array_equal(
+            getattr(obs_store, name), getattr(obs_desired, name)
+        )
+
+
+def test_append_invalid(obs_list):
+    """Test appending incompatible observations."""
+    store = trials.RankObservationStore(mask_zero=False)
+    with pytest.raises(Exception) as e_info:
+        store.append(obs_list[0])
+    assert e_info.type == ValueError
+
+    store = trials.RankObservationStore(mask_zero=True)
+    with pytest.raises(Exception) as e_info:
+        store.snapshot()
+    assert e_info.type == ValueError
+
+    store.append(obs_list[0])
+    obs = trials.RankObservations(
+        np.array(((1, 2, 3),), dtype=np.int32), mask_zero=True,
+        groups=np.array(([0, 1],), dtype=np.int32)
+    )
+    with pytest.raises(Exception) as e_info:
+        store.append(obs)
+    assert e_info.type == ValueError
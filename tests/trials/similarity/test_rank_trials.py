@@ -633,6 +633,32 @@ class TestRankDocket:
             loaded_docket.config_idx)
         assert loaded_docket.mask_zero
 
+    def test_parquet(self, setup_docket_0, tmpdir):
+        """Test Parquet round trip of RankDocket."""
+        pytest.importorskip("pyarrow")
+        docket = setup_docket_0['docket']
+        fn = tmpdir.join('docket_test.parquet')
+        docket.to_parquet(fn)
+        loaded_docket = trials.RankDocket.from_parquet(fn)
+
+        np.testing.assert_array_equal(
+            docket.stimulus_set, loaded_docket.stimulus_set
+        )
+        np.testing.assert_array_equal(
+            docket.n_select, loaded_docket.n_select
+        )
+        np.testing.assert_array_equal(
+            docket.is_ranked, loaded_docket.is_ranked
+        )
+        pd.testing.assert_frame_equal(
+            docket.config_list, loaded_docket.config_list
+        )
+        assert loaded_docket.mask_zero
+
+        with pytest.raises(Exception) as e_info:
+            trials.RankObservations.from_arrow(docket.to_arrow())
+        assert e_info.type == ValueError
+
     def test_as_dataset(self, setup_docket_3):
         docket = setup_docket_3['docket']
         groups = np.array([[0], [0], [0], [0]])
@@ -683,6 +709,18 @@ class TestRankDocket:
             stimulus_set_3, stimulus_set_3_desired
         )
 
+    def test_as_dataset_lazy(self, setup_docket_1):
+        """Test that lazy outcome expansion matches eager expansion."""
+        docket = setup_docket_1['docket']
+        groups = np.array([[0], [1], [0], [1]])
+
+        ds_eager = docket.as_dataset(groups).batch(4)
+        ds_lazy = docket.as_dataset(groups, lazy=True).batch(4)
+        x_eager = next(iter(ds_eager))
+        x_lazy = next(iter(ds_lazy))
+        for key in x_eager:
+            tf.debugging.assert_equal(x_lazy[key], x_eager[key])
+
 
 class TestRankObservations:
     """Test class RankObservations."""
@@ -953,6 +991,41 @@ class TestRankObservations:
         )
         assert trials_stack.mask_zero
 
+    def test_carried_configurations(self, setup_obs_1):
+        """Test that carried over configurations match re-derived ones."""
+        obs = setup_obs_1['obs']
+
+        def rederive(trials_in):
+            return trials.RankObservations(
+                trials_in.stimulus_set, n_select=trials_in.n_select,
+                is_ranked=trials_in.is_ranked, mask_zero=True,
+                groups=trials_in.groups
+            )
+
+        obs_subset = obs.subset(np.array((3, 1, 2)))
+        obs_desired = rederive(obs_subset)
+        pd.testing.assert_frame_equal(
+            obs_subset.config_list, obs_desired.config_list
+        )
+        np.testing.assert_array_equal(
+            obs_subset.config_idx, obs_desired.config_idx
+        )
+        np.testing.assert_array_equal(
+            obs_subset.all_outcomes(), obs_desired.all_outcomes()
+        )
+
+        obs_stack = trials.stack((obs_subset, obs, obs_subset))
+        obs_desired = rederive(obs_stack)
+        pd.testing.assert_frame_equal(
+            obs_stack.config_list, obs_desired.config_list
+        )
+        np.testing.assert_array_equal(
+            obs_stack.config_idx, obs_desired.config_idx
+        )
+        np.testing.assert_array_equal(
+            obs_stack.all_outcomes(), obs_desired.all_outcomes()
+        )
+
     def test_n_trial_0(self, setup_obs_0):
         assert setup_obs_0['n_trial'] == setup_obs_0['obs'].n_trial
 
@@ -1081,6 +1154,77 @@ class TestRankObservations:
             groups_0, groups_0_desired
         )
 
+    def test_as_dataset_observed_outcome(self, setup_obs_2):
+        """Test dataset that only contains the observed outcome."""
+        obs = setup_obs_2['obs']
+
+        ds_obs = obs.as_dataset(all_outcomes=False)
+        x, y, _ = list(ds_obs)[0]
+
+        stimulus_set_desired = np.expand_dims(obs.stimulus_set[0], axis=1)
+        np.testing.assert_array_equal(
+            x['stimulus_set'].numpy(), stimulus_set_desired
+        )
+        assert x['is_select'].shape == stimulus_set_desired.shape
+        np.testing.assert_array_equal(y.numpy(), np.array([1., 0.]))
+
+    def test_as_dataset_lazy(self, setup_obs_1):
+        """Test that lazy outcome expansion matches eager expansion."""
+        obs = setup_obs_1['obs']
+
+        ds_eager = obs.as_dataset().batch(4)
+        ds_lazy = obs.as_dataset(lazy=True).batch(4)
+        x_eager, y_eager, w_eager = next(iter(ds_eager))
+        x_lazy, y_lazy, w_lazy = next(iter(ds_lazy))
+        for key in x_eager:
+            tf.debugging.assert_equal(x_lazy[key], x_eager[key])
+        tf.debugging.assert_equal(y_lazy, y_eager)
+        tf.debugging.assert_equal(w_lazy, w_eager)
+
+    def test_all_outcomes(self):
+        """Test outcome expansion for trials of mixed configuration."""
+        stimulus_set = np.array((
+            (3, 1, 2, 0),
+            (4, 5, 6, 7),
+            (7, 6, 5, 0),
+        ))
+        n_select = np.array((1, 2, 1))
+        obs = trials.RankObservations(
+            stimulus_set, n_select=n_select, mask_zero=True
+        )
+        stimulus_set_expand = obs.all_outcomes()
+        assert stimulus_set_expand.shape == (3, 4, 6)
+        assert stimulus_set_expand.dtype == np.int32
+
+        desired_0 = np.array((
+            (3, 3, 0, 0, 0, 0),
+            (1, 2, 0, 0, 0, 0),
+            (2, 1, 0, 0, 0, 0),
+            (0, 0, 0, 0, 0, 0),
+        ))
+        desired_1 = np.array((
+            (4, 4, 4, 4, 4, 4),
+            (5, 5, 6, 6, 7, 7),
+            (6, 7, 5, 7, 5, 6),
+            (7, 6, 7, 5, 6, 5),
+        ))
+        desired_2 = np.array((
+            (7, 7, 0, 0, 0, 0),
+            (6, 5, 0, 0, 0, 0),
+            (5, 6, 0, 0, 0, 0),
+            (0, 0, 0, 0, 0, 0),
+        ))
+        np.testing.assert_array_equal(stimulus_set_expand[0], desired_0)
+        np.testing.assert_array_equal(stimulus_set_expand[1], desired_1)
+        np.testing.assert_array_equal(stimulus_set_expand[2], desired_2)
+
+        # The gather table is cached until the configurations change.
+        table = obs._outcome_gather_table()
+        assert obs._outcome_gather_table() is table
+        obs.set_groups(np.array(((0,), (1,), (0,))))
+        assert obs._outcome_gather_table() is not table
+        np.testing.assert_array_equal(obs.all_outcomes(), stimulus_set_expand)
+
     def test_save_load_file(self, setup_obs_0, tmpdir):
         """Test saving and loading of RankObservations."""
         # Save observations.
@@ -1115,6 +1259,203 @@ class TestRankObservations:
         )
         assert loaded_obs.mask_zero
 
+    @pytest.mark.parametrize(
+        "chunk_size,compression", [(None, None), (2, None), (None, 'gzip')]
+    )
+    def test_save_load_partial(
+            self, setup_obs_1, tmpdir, chunk_size, compression):
+        """Test partial loading of RankObservations."""
+        obs = setup_obs_1['obs']
+        fn = tmpdir.join('obs_test.hdf5')
+        obs.save(fn, chunk_size=chunk_size, compression=compression)
+
+        index = np.array((3, 0, 3, 2))
+        loaded_obs = trials.load_trials(fn, index=index)
+        obs_desired = obs.subset(index)
+        assert loaded_obs.n_trial == 4
+        np.testing.assert_array_equal(
+            loaded_obs.stimulus_set, obs_desired.stimulus_set
+        )
+        np.testing.assert_array_equal(
+            loaded_obs.n_select, obs_desired.n_select
+        )
+        np.testing.assert_array_equal(
+            loaded_obs.groups, obs_desired.groups
+        )
+        np.testing.assert_array_equal(
+            loaded_obs.config_idx, obs_desired.config_idx
+        )
+
+    def test_load_mmap(self, setup_obs_1, tmpdir):
+        """Test memory-mapped loading of RankObservations."""
+        obs = setup_obs_1['obs']
+        fn = tmpdir.join('obs_test.hdf5')
+        obs.save(fn)
+
+        loaded_obs = trials.RankObservations.load(fn, mmap_mode='r')
+        assert isinstance(loaded_obs.stimulus_set, np.memmap)
+        np.testing.assert_array_equal(
+            loaded_obs.stimulus_set, obs.stimulus_set
+        )
+        np.testing.assert_array_equal(
+            loaded_obs.subset(np.array((1, 2))).stimulus_set,
+            obs.stimulus_set[1:3]
+        )
+
+        # Compressed datasets cannot be memory-mapped and are read
+        # instead.
+        obs.save(fn, compression='gzip')
+        loaded_obs = trials.RankObservations.load(fn, mmap_mode='r')
+        assert not isinstance(loaded_obs.stimulus_set, np.memmap)
+        np.testing.assert_array_equal(
+            loaded_obs.stimulus_set, obs.stimulus_set
+        )
+
+        # Writable modes are not supported.
+        with pytest.raises(Exception) as e_info:
+            trials.RankObservations.load(fn, mmap_mode='r+')
+        assert e_info.type == ValueError
+
+    @pytest.mark.parametrize("lazy", [True, False])
+    def test_compact(self, setup_obs_1, tmpdir, lazy):
+        """Test compact dtypes of RankObservations."""
+        obs = setup_obs_1['obs']
+        obs_compact = obs.subset(np.arange(obs.n_trial)).compact()
+        assert obs_compact.stimulus_set.dtype == np.uint8
+        assert obs_compact.n_select.dtype == np.uint8
+        assert obs_compact.groups.dtype == np.uint8
+        assert obs_compact.weight.dtype == np.float32
+        assert obs_compact.rt_ms.dtype == np.float32
+        np.testing.assert_array_equal(
+            obs_compact.stimulus_set, obs.stimulus_set
+        )
+
+        # Arrays are widened when exported.
+        x_desired, y_desired, w_desired = next(
+            iter(obs.as_dataset(lazy=lazy).batch(4))
+        )
+        x, y, w = next(iter(obs_compact.as_dataset(lazy=lazy).batch(4)))
+        for key in x_desired:
+            assert x[key].dtype == x_desired[key].dtype
+            tf.debugging.assert_equal(x[key], x_desired[key])
+        tf.debugging.assert_equal(y, y_desired)
+        tf.debugging.assert_equal(w, w_desired)
+
+        # Compact dtypes are saved.
+        fn = tmpdir.join('obs_test.hdf5')
+        obs_compact.save(fn)
+        loaded_obs = trials.RankObservations.load(fn)
+        assert loaded_obs.stimulus_set.dtype == np.int32
+        loaded_obs = trials.RankObservations.load(fn, compact=True)
+        assert loaded_obs.stimulus_set.dtype == np.uint8
+        np.testing.assert_array_equal(
+            loaded_obs.stimulus_set, obs.stimulus_set
+        )
+
+    def test_parquet(self, setup_obs_1, tmpdir):
+        """Test Parquet round trip of RankObservations."""
+        pytest.importorskip("pyarrow")
+        obs = setup_obs_1['obs']
+        obs = trials.RankObservations(
+            obs.stimulus_set, n_select=obs.n_select, mask_zero=True,
+            groups=obs.groups, agent_id=np.array((0, 1, 2, 1)),
+            session_id=np.array((3, 3, 4, 4)),
+            weight=np.array((1., .9, .8, .7)),
+            rt_ms=np.array((100., 200., 300., 400.))
+        )
+        fn = tmpdir.join('obs_test.parquet')
+        obs.to_parquet(fn, row_group_size=2)
+
+        def assert_obs_equal(obs_0, obs_1):
+            for name in (
+                'stimulus_set', 'n_select', 'is_ranked', 'groups',
+                'agent_id', 'session_id', 'weight', 'rt_ms', 'config_idx'
+            ):
+                np.testing.assert_array_equal(
+                    getattr(obs_0, name), getattr(obs_1, name)
+                )
+            assert obs_0.mask_zero == obs_1.mask_zero
+
+        assert_obs_equal(trials.RankObservations.from_parquet(fn), obs)
+        assert_obs_equal(
+            trials.RankObservations.from_arrow(obs.to_arrow()), obs
+        )
+
+        # Filter by agent, session and group.
+        loaded_obs = trials.RankObservations.from_parquet(fn, agent_id=[1])
+        assert_obs_equal(loaded_obs, obs.subset(np.array((1, 3))))
+        loaded_obs = trials.RankObservations.from_parquet(
+            fn, session_id=[4], groups={0: [1]}
+        )
+        assert_obs_equal(loaded_obs, obs.subset(np.array((2, 3))))
+        loaded_obs = trials.RankObservations.from_parquet(
+            fn, agent_id=[1, 2], groups={0: [0]}
+        )
+        assert_obs_equal(loaded_obs, obs.subset(np.array((1,))))
+
+        with pytest.raises(Exception) as e_info:
+            trials.RankObservations.from_parquet(fn, agent_id=[5])
+        assert e_info.type == ValueError
+
+    def test_stream_dataset(self, setup_obs_1, tmpdir):
+        """Test streaming RankObservations from file."""
+        obs = setup_obs_1['obs']
+        fn = tmpdir.join('obs_test.hdf5')
+        obs.save(fn, chunk_size=2)
+
+        # The blocks have a different number of outcomes.
+        x_desired, y_desired, w_desired = next(
+            iter(obs.as_dataset().batch(4))
+        )
+        ds_stream = trials.RankObservations.stream_dataset(fn, block_size=2)
+        x_stream, y_stream, w_stream = next(iter(ds_stream.batch(4)))
+        for key in x_desired:
+            tf.debugging.assert_equal(x_desired[key], x_stream[key])
+        tf.debugging.assert_equal(y_desired, y_stream)
+        tf.debugging.assert_equal(w_desired, w_stream)
+
+        # Shuffled stream contains every trial exactly once.
+        ds_stream = trials.RankObservations.stream_dataset(
+            fn, block_size=2, shuffle_buffer_size=4, seed=252
+        )
+        x_stream, _, _ = next(iter(ds_stream.batch(4)))
+        np.testing.assert_array_equal(
+            np.sort(x_stream['stimulus_set'][:, :, 0].numpy(), axis=0),
+            np.sort(obs.stimulus_set, axis=0)
+        )
+
+    def test_init_copies_arrays(self):
+        """Test that the caller's arrays are not aliased."""
+        stimulus_set = np.array((
+            (1, 2, 3),
+            (10, 13, 8),
+            (4, 5, 6),
+        ), dtype=np.int32)
+        n_select = np.ones([3], dtype=np.int32)
+        groups = np.zeros([3, 1], dtype=np.int32)
+        agent_id = np.arange(3, dtype=np.int32)
+        session_id = np.arange(3, dtype=np.int32)
+        weight = np.ones([3])
+        rt_ms = np.full([3], 1000.)
+        obs = trials.RankObservations(
+            stimulus_set, n_select=n_select, groups=groups,
+            agent_id=agent_id, session_id=session_id, weight=weight,
+            rt_ms=rt_ms
+        )
+
+        for array in (
+            stimulus_set, n_select, groups, agent_id, session_id, weight,
+            rt_ms
+        ):
+            array[0] = 7
+        np.testing.assert_array_equal(obs.stimulus_set[0], [1, 2, 3])
+        np.testing.assert_array_equal(obs.n_select, [1, 1, 1])
+        np.testing.assert_array_equal(obs.groups, np.zeros([3, 1]))
+        np.testing.assert_array_equal(obs.agent_id, [0, 1, 2])
+        np.testing.assert_array_equal(obs.session_id, [0, 1, 2])
+        np.testing.assert_array_equal(obs.weight, [1., 1., 1.])
+        np.testing.assert_array_equal(obs.rt_ms, [1000., 1000., 1000.])
+
 
 class TestStack:
     """Test stack static method."""
@@ -1420,6 +1761,38 @@ class TestStack:
         ) == 0
         assert trials_subset.mask_zero
 
+    def test_stack_builder(self):
+        """Test that StackBuilder matches stack."""
+        n_stimuli = 20
+        trials_list = []
+        for n_reference, n_select in ((2, 1), (4, 2), (8, 2), (2, 1)):
+            gen = RandomRank(
+                np.arange(1, n_stimuli + 1), n_reference=n_reference,
+                n_select=n_select, mask_zero=True
+            )
+            trials_list.append(gen.generate(3))
+
+        builder = trials.StackBuilder()
+        for i_trials in trials_list:
+            builder.append(i_trials)
+        trials_built = builder.build()
+        trials_desired = trials.stack(trials_list)
+
+        assert trials_built.n_trial == 12
+        np.testing.assert_array_equal(
+            trials_built.stimulus_set, trials_desired.stimulus_set
+        )
+        np.testing.assert_array_equal(
+            trials_built.n_select, trials_desired.n_select
+        )
+        np.testing.assert_array_equal(
+            trials_built.config_idx, trials_desired.config_idx
+        )
+
+        with pytest.raises(Exception) as e_info:
+            trials.StackBuilder().build()
+        assert e_info.type == ValueError
+
 
 class TestPossibleOutcomes:
     """Test possible outcomes."""
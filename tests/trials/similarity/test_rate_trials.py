@@ -682,6 +682,22 @@ class TestRateObservations:
             setup_obs_0['configuration_id'], loaded_obs.config_idx
         )
 
+    def test_stream_dataset(self, setup_obs_1, tmpdir):
+        """Test streaming RateObservations from file."""
+        obs = setup_obs_1['obs']
+        fn = tmpdir.join('obs_test.hdf5')
+        obs.save(fn, chunk_size=2)
+
+        x_desired, y_desired, w_desired = next(
+            iter(obs.as_dataset().batch(4))
+        )
+        ds_stream = RateObservations.stream_dataset(fn, block_size=3)
+        x_stream, y_stream, w_stream = next(iter(ds_stream.batch(4)))
+        for key in x_desired:
+            tf.debugging.assert_equal(x_desired[key], x_stream[key])
+        tf.debugging.assert_equal(y_desired, y_stream)
+        tf.debugging.assert_equal(w_desired, w_stream)
+
 
 class TestStack:
     """Test stack static method."""
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Test trials module."""
+
+import numpy as np
+import pytest
+
+from psiz.trials.compact_dtype import compact_int
+
+
+@pytest.mark.parametrize(
+    "values,dtype_desired", [
+        ((0, 255), np.uint8),
+        ((0, 256), np.uint16),
+        ((1, 70000), np.uint32),
+        ((-1, 127), np.int8),
+        ((-1, 128), np.int16),
+        ((-40000, 5), np.int32),
+    ]
+)
+def test_compact_int(values, dtype_desired):
+    """Test narrowest integer dtype."""
+    array = np.array(values, dtype=np.int64)
+    array_compact = compact_int(array)
+    assert array_compact.dtype == dtype_desired
+    np.testing.assert_array_equal(array_compact, array)
+
+
+def test_compact_int_no_copy():
+    """Test that arrays with the narrowest dtype are not copied."""
+    array = np.array((1, 2), dtype=np.uint8)
+    assert compact_int(array) is array
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Test trials module."""
+
+import numpy as np
+import pytest
+
+from psiz.trials.concatenate_padded import concatenate_padded
+
+
+def test_concatenate_padded():
+    """Test concatenation of arrays with different shapes."""
+    array_list = [
+        np.array(((1, 2, 3), (4, 5, 6)), dtype=np.int32),
+        np.array(((7, 8, 9, 10, 11),), dtype=np.int32),
+        np.array(((12, 13),), dtype=np.int32),
+    ]
+    desired = np.array((
+        (1, 2, 3, -1, -1),
+        (4, 5, 6, -1, -1),
+        (7, 8, 9, 10, 11),
+        (12, 13, -1, -1, -1),
+    ), dtype=np.int32)
+
+    concatenated = concatenate_padded(array_list, fill_value=-1)
+    assert concatenated.dtype == np.int32
+    np.testing.assert_array_equal(concatenated, desired)
+
+
+def test_concatenate_padded_1d():
+    """Test concatenation of 1D arrays."""
+    concatenated = concatenate_padded(
+        [np.array((True, False)), np.array((True,))]
+    )
+    assert concatenated.dtype == bool
+    np.testing.assert_array_equal(
+        concatenated, np.array((True, False, True))
+    )
+
+
+def test_concatenate_padded_ndim_error():
+    """Test that arrays must have the same number of dimensions."""
+    with pytest.raises(Exception) as e_info:
+        concatenate_padded([np.zeros([2, 3]), np.zeros([2])])
+    assert e_info.type == ValueError
@@ -111,9 +111,9 @@ def test_wo_replace_subset_seed():
 
     qr_sets_desired = np.array(
         [
-            [13, 0, 3, 9, 10, 12, 14, 15, 18],
-            [13, 1, 2, 4, 5, 6, 9, 10, 18],
-            [13, 1, 4, 5, 6, 10, 11, 12, 16]
+            [13, 0, 1, 2, 6, 8, 14, 17, 18],
+            [13, 0, 1, 8, 12, 15, 17, 18, 19],
+            [13, 1, 2, 3, 10, 12, 16, 17, 19]
         ], dtype=int
     )
     np.testing.assert_array_equal(qr_sets, qr_sets_desired)
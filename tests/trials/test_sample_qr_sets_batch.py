@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Test sample_qr_sets_batch."""
+
+import numpy as np
+import pytest
+
+from psiz.trials import sample_qr_sets_batch
+
+
+def test_shape_and_eligibility():
+    """Test output layout and that only eligible references are used."""
+    n_stimuli = 10
+    n_reference = 3
+    query_idx = np.array([2, 5, 7])
+    n_sample = np.array([4, 0, 6])
+    priority = np.ones([3, n_stimuli])
+    # Make stimulus 9 ineligible for the last query.
+    priority[2, 9] = 0.
+
+    rng = np.random.default_rng(seed=252)
+    qr_sets = sample_qr_sets_batch(
+        query_idx, n_reference, n_sample, priority, rng=rng
+    )
+
+    assert qr_sets.shape == (10, n_reference + 1)
+    np.testing.assert_array_equal(
+        qr_sets[:, 0], np.array([2, 2, 2, 2, 7, 7, 7, 7, 7, 7])
+    )
+    for qr_set in qr_sets:
+        # Query and references are unique within a trial.
+        assert len(np.unique(qr_set)) == n_reference + 1
+    assert not np.any(qr_sets[4:, 1:] == 9)
+
+
+def test_seed():
+    """Test that a seeded generator gives reproducible samples."""
+    priority = np.random.default_rng(seed=3).random([4, 20])
+    qr_sets_0 = sample_qr_sets_batch(
+        np.arange(4), 5, np.full([4], 8), priority,
+        rng=np.random.default_rng(seed=989)
+    )
+    qr_sets_1 = sample_qr_sets_batch(
+        np.arange(4), 5, np.full([4], 8), priority,
+        rng=np.random.default_rng(seed=989), max_n_element=40
+    )
+    np.testing.assert_array_equal(qr_sets_0, qr_sets_1)
+
+
+def test_probability():
+    """Test that references are sampled in proportion to priority."""
+    n_sample = 100000
+    priority = np.array([[0., 1., 2., 3., 4.]])
+    rng = np.random.default_rng(seed=34)
+    qr_sets = sample_qr_sets_batch(
+        np.array([0]), 1, np.array([n_sample]), priority, rng=rng
+    )
+    freq = np.bincount(qr_sets[:, 1], minlength=5) / n_sample
+    np.testing.assert_allclose(freq, priority[0] / 10., atol=.01)
+
+
+def test_insufficient_references():
+    """Test that too few eligible references raises an error."""
+    priority = np.array([[1., 1., 0., 0.]])
+    with pytest.raises(ValueError):
+        sample_qr_sets_batch(np.array([0]), 2, np.array([3]), priority)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Test SubsetView."""
+
+import numpy as np
+import pandas as pd
+
+from psiz.trials import RankObservations
+from psiz.trials import SubsetView
+from psiz.trials import TrialDataset
+
+
+def test_rank_observations_view():
+    """Test views of RankObservations."""
+    stimulus_set = np.array(
+        (
+            (1, 2, 3, 0, 0),
+            (4, 5, 6, 7, 8),
+            (9, 10, 11, 0, 0),
+            (12, 13, 14, 15, 0),
+        ), dtype=np.int32
+    )
+    obs = RankObservations(
+        stimulus_set, n_select=np.array((1, 2, 1, 1)), mask_zero=True,
+        groups=np.array(([0], [1], [0], [1])),
+        weight=np.array((.1, .2, .3, .4))
+    )
+
+    obs_view = obs.view(np.array((3, 0, 2)))
+    assert isinstance(obs_view, SubsetView)
+    assert obs_view.n_trial == 3
+    assert not obs_view.is_materialized
+
+    # Subsets of a view compose indices without materialising.
+    obs_view_2 = obs_view.subset(np.array((True, False, True)))
+    assert obs_view_2.n_trial == 2
+    np.testing.assert_array_equal(obs_view_2.index, np.array((3, 2)))
+    assert not obs_view.is_materialized
+
+    # Trial-level arrays are indexed without materialising.
+    np.testing.assert_array_equal(obs_view_2.groups, np.array(([1], [0])))
+    np.testing.assert_array_equal(obs_view_2.weight, np.array((.4, .3)))
+    assert not obs_view_2.weight.flags.writeable
+    assert not obs_view_2.is_materialized
+
+    obs_desired = obs.subset(np.array((3, 2)))
+    np.testing.assert_array_equal(
+        obs_view_2.stimulus_set, obs_desired.stimulus_set
+    )
+    assert obs_view_2.is_materialized
+    np.testing.assert_array_equal(
+        obs_view_2.all_outcomes(), obs_desired.all_outcomes()
+    )
+    pd.testing.assert_frame_equal(
+        obs_view_2.config_list, obs_desired.config_list
+    )
+
+    # Mutation only affects the materialised view.
+    obs_view_2.set_weight(1.)
+    np.testing.assert_array_equal(obs_view_2.weight, np.ones([2]))
+    np.testing.assert_array_equal(obs.weight, np.array((.1, .2, .3, .4)))
+
+
+def test_subset_carried_configuration():
+    """Test that a subset matches re-constructed observations."""
+    stimulus_set = np.array(
+        (
+            (1, 2, 3, 0, 0),
+            (4, 5, 6, 7, 8),
+            (9, 10, 11, 0, 0),
+        ), dtype=np.int32
+    )
+    obs = RankObservations(
+        stimulus_set, n_select=np.array((1, 2, 1)), mask_zero=True
+    )
+    obs_sub = obs.subset(np.array((2, 0)))
+    obs_desired = RankObservations(
+        stimulus_set[[2, 0], 0:3], n_select=np.array((1, 1)),
+        mask_zero=True
+    )
+    assert obs_sub.n_trial == 2
+    assert obs_sub.max_n_reference == 2
+    np.testing.assert_array_equal(
+        obs_sub.stimulus_set, obs_desired.stimulus_set
+    )
+    np.testing.assert_array_equal(obs_sub.n_present, obs_desired.n_present)
+    pd.testing.assert_frame_equal(
+        obs_sub.config_list, obs_desired.config_list
+    )
+
+
+def test_trial_dataset_view(rank_sim_4):
+    """Test views of TrialDataset."""
+    trials = TrialDataset(rank_sim_4)
+    trials_view = trials.view(np.array((2, 0)))
+    assert trials_view.n_sequence == 2
+    assert not trials_view.is_materialized
+
+    trials_desired = trials.subset(np.array((2, 0)))
+    np.testing.assert_array_equal(
+        trials_view.content.stimulus_set,
+        trials_desired.content.stimulus_set
+    )
+    np.testing.assert_array_equal(trials_view.weight, trials_desired.weight)
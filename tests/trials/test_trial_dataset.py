@@ -22,6 +22,7 @@ import pytest
 import tensorflow as tf
 
 from psiz.trials import load_trials
+from psiz.trials.experimental.contents.rank_similarity import RankSimilarity
 from psiz.trials.experimental.outcomes.sparse_categorical import SparseCategorical
 from psiz.trials.experimental.trial_dataset import TrialDataset
 from psiz.trials import stack
@@ -955,3 +956,62 @@ def test_invalid_stack_0(rank_sim_4, rank_sim_5):
         'The shape of `groups` for the different TrialDatasets '
         'must be identical on axis=2.'
     )
+
+
+@pytest.mark.parametrize("block_size", [1, 2])
+@pytest.mark.parametrize("timestep", [True, False])
+def test_stream_dataset(rank_sim_4, tmpdir, timestep, block_size):
+    """Test streaming a dataset from file."""
+    fn = tmpdir.join('stream_test.hdf5')
+
+    content = rank_sim_4
+    outcome_idx = np.zeros(
+        [content.n_sequence, content.max_timestep], dtype=np.int32
+    )
+    outcome = SparseCategorical(outcome_idx, depth=content.max_outcome)
+    trials = TrialDataset(content, outcome=outcome)
+    trials.save(fn)
+
+    # Blocks have a different number of references, outcomes and
+    # (if `block_size=1`) timesteps.
+    ds_desired = trials.export(timestep=timestep)
+    ds_stream = TrialDataset.stream_dataset(
+        fn, timestep=timestep, block_size=block_size
+    )
+    elements_desired = list(ds_desired)
+    elements_stream = list(ds_stream)
+    assert len(elements_stream) == len(elements_desired)
+    for (x_0, y_0, w_0), (x_1, y_1, w_1) in zip(
+        elements_desired, elements_stream
+    ):
+        for key in x_0:
+            tf.debugging.assert_equal(x_0[key], x_1[key])
+        tf.debugging.assert_equal(y_0, y_1)
+        tf.debugging.assert_equal(w_0, w_1)
+
+
+def test_load_index(rank_sim_4, tmpdir):
+    """Test that a subset loaded from file keeps the file's shape."""
+    fn = tmpdir.join('load_index_test.hdf5')
+    outcome_idx = np.zeros(
+        [rank_sim_4.n_sequence, rank_sim_4.max_timestep], dtype=np.int32
+    )
+    outcome = SparseCategorical(outcome_idx, depth=rank_sim_4.max_outcome)
+    trials = TrialDataset(rank_sim_4, outcome=outcome)
+    trials.save(fn)
+
+    # The second sequence has one timestep and two references.
+    trials_sub = TrialDataset.load(fn, index=np.array([1]))
+    assert trials_sub.max_timestep == 2
+    assert trials_sub.content.max_n_reference == 3
+    np.testing.assert_array_equal(
+        trials_sub.content.stimulus_set,
+        rank_sim_4.stimulus_set[[1]]
+    )
+    np.testing.assert_array_equal(
+        trials_sub.content.n_select, rank_sim_4.n_select[[1]]
+    )
+    with h5py.File(fn, 'r') as f:
+        element_shape = RankSimilarity.load_element_shape(f['content'])
+    assert element_shape['stimulus_set'] == tf.TensorShape([2, 4, 3])
+    assert element_shape['is_select'] == tf.TensorShape([2, 4, 1])
@@ -16,6 +16,7 @@
 """Module for testing utils.py."""
 
 import numpy as np
+import pytest
 
 from psiz.utils import choice_wo_replace
 
@@ -71,8 +72,89 @@ def test_seed():
     )
     drawn_idx_desired = np.array(
         [
-            [2, 14, 3],
-            [12, 13, 15]
+            [13, 3, 1],
+            [18, 12, 2]
         ], dtype=int
     )
     np.testing.assert_array_equal(drawn_idx, drawn_idx_desired)
+
+
+def test_rejection():
+    """Test rejection strategy."""
+    n_trial = 10000
+    n_option = 4
+    candidate_idx = np.arange(n_option) + 10
+    candidate_prob = np.array([.1, .2, .3, .4])
+
+    rng = np.random.default_rng(seed=560897)
+    drawn_idx = choice_wo_replace(
+        candidate_idx, (n_trial, 1), candidate_prob, rng=rng,
+        method='rejection'
+    )
+    bin_counts = np.bincount(drawn_idx[:, 0] - 10, minlength=n_option)
+    np.testing.assert_array_almost_equal(
+        candidate_prob, bin_counts / n_trial, decimal=2
+    )
+
+    drawn_idx = choice_wo_replace(
+        candidate_idx, (n_trial, 3), candidate_prob, rng=rng,
+        method='rejection'
+    )
+    for i_trial in range(n_trial):
+        assert len(np.unique(drawn_idx[i_trial])) == 3
+
+
+@pytest.mark.parametrize("method", ["dense", "rejection"])
+def test_sequential_distribution(method):
+    """Test that both strategies draw elements sequentially."""
+    n_trial = 50000
+    candidate_idx = np.arange(6)
+    candidate_prob = np.array([.5, .2, .1, .1, .05, .05])
+
+    rng = np.random.default_rng(seed=252)
+    drawn_idx = choice_wo_replace(
+        candidate_idx, (n_trial, 2), candidate_prob, rng=rng, method=method
+    )
+    # P(0, 1) = .5 * .2 / .5 and P(1, 0) = .2 * .5 / .8.
+    is_01 = np.logical_and(drawn_idx[:, 0] == 0, drawn_idx[:, 1] == 1)
+    is_10 = np.logical_and(drawn_idx[:, 0] == 1, drawn_idx[:, 1] == 0)
+    np.testing.assert_allclose(np.mean(is_01), .2, atol=.01)
+    np.testing.assert_allclose(np.mean(is_10), .125, atol=.01)
+    np.testing.assert_allclose(np.mean(drawn_idx[:, 0] == 0), .5, atol=.01)
+
+
+def test_auto_large():
+    """Test automatic strategy when dense arrays exceed the limit."""
+    n_trial = 500
+    n_reference = 4
+    n_option = 1000
+    candidate_idx = np.arange(n_option)
+    candidate_prob = np.ones([n_option]) / n_option
+
+    rng = np.random.default_rng(seed=252)
+    drawn_idx = choice_wo_replace(
+        candidate_idx, (n_trial, n_reference), candidate_prob, rng=rng,
+        max_n_element=10000
+    )
+    assert drawn_idx.shape == (n_trial, n_reference)
+    for i_trial in range(n_trial):
+        assert len(np.unique(drawn_idx[i_trial])) == n_reference
+
+    # Concentrated probabilities fall back to chunked dense sampling.
+    candidate_prob = np.full([n_option], .1 / (n_option - 2))
+    candidate_prob[0:2] = .45
+    drawn_idx = choice_wo_replace(
+        candidate_idx, (n_trial, n_reference), candidate_prob, rng=rng,
+        max_n_element=10000
+    )
+    assert drawn_idx.shape == (n_trial, n_reference)
+    for i_trial in range(n_trial):
+        assert len(np.unique(drawn_idx[i_trial])) == n_reference
+
+
+def test_bad_method():
+    """Test that an unknown method raises an error."""
+    with pytest.raises(ValueError):
+        choice_wo_replace(
+            np.arange(5), (2, 2), np.ones([5]) / 5, method='alias'
+        )
@@ -328,3 +328,58 @@ def test_groups():
     assert ds_info['batch_size'] == 10
     assert ds_info['n_batch'] == 1.0
     assert ds_info['elements'] == 'upper'
+
+
+@pytest.mark.parametrize(
+    "elements", ['all', 'upper', 'lower', 'off']
+)
+@pytest.mark.parametrize(
+    "groups", [None, [1]]
+)
+def test_lazy(elements, groups):
+    """Test that lazy pairs match eager pairs."""
+    indices = np.arange(7) + 3
+    ds_eager, info_eager = pairwise_index_dataset(
+        indices, elements=elements, groups=groups
+    )
+    ds_lazy, info_lazy = pairwise_index_dataset(
+        indices, elements=elements, groups=groups, batch_size=4, lazy=True
+    )
+    eager = next(iter(ds_eager.as_numpy_iterator()))
+    lazy = list(ds_lazy.as_numpy_iterator())
+    assert len(lazy) == info_lazy['n_batch']
+    for i_part in range(len(eager)):
+        part = np.concatenate([batch[i_part] for batch in lazy], axis=0)
+        assert part.dtype == np.int32
+        np.testing.assert_array_equal(part, eager[i_part])
+
+    assert info_lazy['n_pair'] == info_eager['n_pair']
+    assert info_lazy['batch_size'] == 4
+    assert info_lazy['elements'] == elements
+
+
+def test_lazy_subsample():
+    """Test lazy subsample."""
+    n_stimuli = 100
+    ds_pairs, ds_info = pairwise_index_dataset(
+        n_stimuli, elements='upper', subsample=.2, lazy=True
+    )
+    pairs = list(ds_pairs.as_numpy_iterator())
+    pairs_0 = np.concatenate([batch[0] for batch in pairs])
+    pairs_1 = np.concatenate([batch[1] for batch in pairs])
+    assert ds_info['n_pair'] == 990
+
+    # Retained pairs are unique, valid and approximately the requested
+    # proportion.
+    assert np.all(pairs_0 < pairs_1)
+    assert len(np.unique(pairs_0 * n_stimuli + pairs_1)) == len(pairs_0)
+    assert np.abs(len(pairs_0) - 990) < 150
+
+    # Subsample is deterministic given a seed.
+    ds_pairs_2, _ = pairwise_index_dataset(
+        n_stimuli, elements='upper', subsample=.2, lazy=True, batch_size=7
+    )
+    pairs_0_2 = np.concatenate(
+        [batch[0] for batch in ds_pairs_2.as_numpy_iterator()]
+    )
+    np.testing.assert_array_equal(pairs_0, pairs_0_2)
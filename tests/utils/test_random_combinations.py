@@ -16,8 +16,10 @@
 """Test utils module."""
 
 import numpy as np
+import pytest
 
 from psiz.utils import random_combinations
+from psiz.utils.random_combinations import _sequential_probability
 
 
 def test_w_replace_probs():
@@ -65,8 +67,8 @@ def test_w_replace_seeded():
     samples = random_combinations(arr, k, n_sample, p=probs, rng=rng)
     samples_desired = np.array(
         [
-            [2, 14, 3],
-            [12, 13, 15]
+            [13, 3, 1],
+            [18, 12, 2]
         ], dtype=int
     )
     np.testing.assert_array_equal(samples, samples_desired)
@@ -147,9 +149,82 @@ def test_wo_replace_subsample():
         [
             [0, 1],
             [0, 2],
-            [0, 3],
-            [1, 2],
-            [1, 3]
+            [0, 4],
+            [1, 3],
+            [2, 4]
         ]
     )
     np.testing.assert_equal(samples, samples_desired)
+
+
+def test_wo_replace_large():
+    """Test without replacement when enumeration is infeasible."""
+    arr = np.arange(1000) + 1
+    k = 4
+    n_sample = 5000
+
+    rng = np.random.default_rng(seed=252)
+    samples = random_combinations(arr, k, n_sample, replace=False, rng=rng)
+    assert samples.shape == (n_sample, k)
+    assert len(np.unique(samples, axis=0)) == n_sample
+    np.testing.assert_array_equal(samples, np.sort(samples, axis=1))
+    assert np.min(samples) >= 1
+    assert np.max(samples) <= 1000
+
+    # Weighted.
+    probs = rng.random([1000])
+    samples = random_combinations(
+        arr, k, n_sample, p=probs, replace=False, rng=rng
+    )
+    assert samples.shape == (n_sample, k)
+    assert len(np.unique(samples, axis=0)) == n_sample
+
+
+def test_wo_replace_weighted_dense():
+    """Test without replacement when most combinations are requested."""
+    arr = np.arange(8)
+    probs = np.array([.3, .2, .1, .1, .1, .1, .05, .05])
+    k = 3
+    n_sample = 50
+
+    rng = np.random.default_rng(seed=252)
+    samples = random_combinations(
+        arr, k, n_sample, p=probs, replace=False, rng=rng
+    )
+    assert samples.shape == (n_sample, k)
+    assert len(np.unique(samples, axis=0)) == n_sample
+    # Samples are sorted across samples.
+    np.testing.assert_array_equal(samples, np.unique(samples, axis=0))
+
+
+@pytest.mark.parametrize("n_sample", [8, 10, 20])
+def test_wo_replace_zero_probability(n_sample):
+    """Test that elements with zero probability are never sampled."""
+    arr = np.arange(6) + 10
+    probs = np.array([.3, .2, 0., .2, .2, .1])
+    k = 2
+
+    rng = np.random.default_rng(seed=252)
+    samples = random_combinations(
+        arr, k, n_sample, p=probs, replace=False, rng=rng
+    )
+    # Only the 10 combinations of the five eligible elements exist.
+    assert samples.shape == (min(n_sample, 10), k)
+    assert len(np.unique(samples, axis=0)) == min(n_sample, 10)
+    assert not np.any(np.equal(samples, 12))
+
+
+def test_sequential_probability():
+    """Test the weights of the weighted enumeration."""
+    p = np.array([.5, .3, .2])
+    combinations = np.array([[0, 1], [0, 2], [1, 2]])
+    prob = _sequential_probability(p[combinations])
+
+    # Sum over both orderings of each pair.
+    prob_desired = np.array([
+        .5 * .3 / .5 + .3 * .5 / .7,
+        .5 * .2 / .5 + .2 * .5 / .8,
+        .3 * .2 / .7 + .2 * .3 / .8,
+    ])
+    np.testing.assert_array_almost_equal(prob, prob_desired)
+    np.testing.assert_almost_equal(np.sum(prob), 1.)
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Module for testing utils.py."""
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
+import psiz
+from psiz.utils import pairwise_index_dataset
+from psiz.utils import pairwise_similarity
+from psiz.utils import SimilarityCache
+
+
+def test_cache_hits(rank_1g_mle_determ):
+    """Test that cached similarities match computed similarities."""
+    model = rank_1g_mle_determ
+    cache = SimilarityCache(model.stimuli, model.kernel)
+    ds_pairs, _ = pairwise_index_dataset(
+        np.arange(3) + 1, elements='all', batch_size=4
+    )
+
+    desired = pairwise_similarity(
+        model.stimuli, model.kernel, ds_pairs
+    ).numpy()
+    computed_0 = pairwise_similarity(
+        model.stimuli, model.kernel, ds_pairs, cache=cache
+    ).numpy()
+    assert cache.n_miss == 9
+    assert cache.n_hit == 0
+    assert cache.size == 9
+
+    computed_1 = pairwise_similarity(
+        model.stimuli, model.kernel, ds_pairs, cache=cache
+    ).numpy()
+    assert cache.n_miss == 9
+    assert cache.n_hit == 9
+
+    np.testing.assert_array_almost_equal(desired, computed_0)
+    np.testing.assert_array_almost_equal(desired, computed_1)
+
+
+def test_cache_duplicate_pairs(rank_1g_mle_determ):
+    """Test that duplicate pairs in a batch are computed once."""
+    model = rank_1g_mle_determ
+    cache = SimilarityCache(model.stimuli, model.kernel)
+
+    s = cache([1, 1, 2, 1], [2, 2, 3, 2]).numpy()
+    assert cache.n_miss == 2
+    assert cache.size == 2
+    assert s[0] == s[1]
+    assert s[0] == s[3]
+
+
+def test_cache_eviction(rank_1g_mle_determ):
+    """Test least-recently-used eviction."""
+    model = rank_1g_mle_determ
+    cache = SimilarityCache(model.stimuli, model.kernel, max_size=2)
+
+    cache([1, 1], [2, 3])
+    # Touch pair (1, 2) so that (1, 3) is least recently used.
+    cache([1], [2])
+    cache([2], [3])
+    assert cache.size == 2
+    assert cache.n_miss == 3
+
+    cache([1], [2])
+    assert cache.n_miss == 3
+    cache([1], [3])
+    assert cache.n_miss == 4
+
+
+def test_cache_invalidation(rank_1g_mle_determ):
+    """Test that the cache is invalidated when weights change."""
+    model = rank_1g_mle_determ
+    cache = SimilarityCache(model.stimuli, model.kernel)
+
+    s_0 = cache([1, 2], [2, 3]).numpy()
+    assert cache.size == 2
+
+    # Explicit invalidation.
+    cache.invalidate()
+    assert cache.size == 0
+    assert cache.version == 1
+    np.testing.assert_array_equal(cache([1, 2], [2, 3]).numpy(), s_0)
+    assert cache.n_miss == 4
+
+    # Direct assignment is detected on the next lookup.
+    z_original = model.stimuli.embeddings.numpy()
+    model.stimuli.embeddings.assign(2 * z_original)
+    s_1 = cache([1, 2], [2, 3]).numpy()
+    assert cache.version == 2
+    assert cache.n_miss == 6
+    assert not np.allclose(s_0, s_1)
+
+    # So is `set_weights`.
+    model.stimuli.set_weights([z_original])
+    s_2 = cache([1, 2], [2, 3]).numpy()
+    assert cache.version == 3
+    assert cache.n_miss == 8
+    np.testing.assert_array_almost_equal(s_0, s_2)
+
+    # Unchanged weights keep the cache.
+    cache([1, 2], [2, 3])
+    assert cache.version == 3
+    assert cache.n_hit == 2
+
+
+def test_cache_permuted_weights(rank_1g_mle_determ):
+    """Test that permuting embedding rows invalidates the cache."""
+    model = rank_1g_mle_determ
+    cache = SimilarityCache(model.stimuli, model.kernel)
+
+    cache([1, 2], [2, 3])
+    z_original = model.stimuli.embeddings.numpy()
+    model.stimuli.embeddings.assign(z_original[[0, 2, 1, 3]])
+    cache([1, 2], [2, 3])
+    model.stimuli.embeddings.assign(z_original)
+    assert cache.version == 1
+    assert cache.n_hit == 0
+
+
+def test_cache_n_sample(rank_1g_mle_determ):
+    """Test that a cached similarity is repeated along the sample axis."""
+    model = rank_1g_mle_determ
+    cache = SimilarityCache(model.stimuli, model.kernel)
+
+    s_0 = cache([1, 2], [2, 3]).numpy()
+    s_1 = cache([1, 2], [2, 3], n_sample=3).numpy()
+    assert s_1.shape == (2, 3)
+    assert cache.n_miss == 2
+    np.testing.assert_array_equal(s_1, np.stack([s_0, s_0, s_0], axis=1))
+
+
+def test_cache_stochastic():
+    """Test that a cache rejects stochastic layers."""
+    stimuli = psiz.keras.layers.EmbeddingNormalDiag(4, 2, mask_zero=True)
+    kernel = psiz.keras.layers.DistanceBased(
+        distance=psiz.keras.layers.Minkowski(),
+        similarity=psiz.keras.layers.ExponentialSimilarity()
+    )
+
+    with pytest.raises(Exception) as e_info:
+        SimilarityCache(stimuli, kernel)
+    assert e_info.type == ValueError
+
+
+def test_cache_groups(rank_2g_mle_determ):
+    """Test cache with group-specific kernels."""
+    model = rank_2g_mle_determ
+    cache = SimilarityCache(
+        model.stimuli, model.kernel, use_group_kernel=True
+    )
+    ds_pairs, _ = pairwise_index_dataset(
+        np.arange(3) + 1, elements='all', groups=[1]
+    )
+
+    desired = pairwise_similarity(
+        model.stimuli, model.kernel, ds_pairs, use_group_kernel=True
+    ).numpy()
+    computed = pairwise_similarity(
+        model.stimuli, model.kernel, ds_pairs, use_group_kernel=True,
+        cache=cache
+    ).numpy()
+    np.testing.assert_array_almost_equal(desired, computed)
+
+    with pytest.raises(Exception) as e_info:
+        cache([1], [2])
+    assert e_info.type == ValueError
+
+
+def test_cache_wrong_layers(rank_1g_mle_determ, rank_2g_mle_determ):
+    """Test that a cache must belong to the provided layers."""
+    cache = SimilarityCache(
+        rank_1g_mle_determ.stimuli, rank_1g_mle_determ.kernel
+    )
+    ds_pairs, _ = pairwise_index_dataset(np.arange(3) + 1)
+
+    with pytest.raises(Exception) as e_info:
+        pairwise_similarity(
+            rank_2g_mle_determ.stimuli, rank_2g_mle_determ.kernel, ds_pairs,
+            cache=cache
+        )
+    assert e_info.type == ValueError
+
+    with pytest.raises(Exception) as e_info:
+        rank_2g_mle_determ.similarity_cache = cache
+    assert e_info.type == ValueError
+
+
+def test_rank_model_cache(rank_1g_mle_determ):
+    """Test that a Rank model produces the same output with a cache."""
+    model = rank_1g_mle_determ
+    stimulus_set = np.array((
+        (1, 2, 3),
+        (2, 1, 3),
+        (3, 1, 2),
+    ), dtype=np.int32)
+    docket = psiz.trials.RankDocket(stimulus_set, mask_zero=True)
+    x = next(iter(docket.as_dataset().batch(3)))
+
+    desired = model(x, training=False).numpy()
+    model.similarity_cache = SimilarityCache(model.stimuli, model.kernel)
+    computed_0 = model(x, training=False).numpy()
+    computed_1 = model(x, training=False).numpy()
+    assert model.similarity_cache.n_hit == 6
+    model.similarity_cache = None
+
+    np.testing.assert_array_almost_equal(desired, computed_0)
+    np.testing.assert_array_almost_equal(desired, computed_1)
+    tf.debugging.assert_equal(computed_0, computed_1)
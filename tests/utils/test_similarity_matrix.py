@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 The PsiZ Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ============================================================================
+"""Module for testing utils.py."""
+
+import numpy as np
+import pytest
+
+from psiz.utils import pairwise_index_dataset
+from psiz.utils import pairwise_similarity
+from psiz.utils import similarity_matrix
+
+
+@pytest.mark.parametrize("tile_size", [1, 3, 4, 1024])
+@pytest.mark.parametrize("symmetric", [True, False])
+def test_1g(rank_1g_mle_random, tile_size, symmetric):
+    """Test similarity matrix against pairwise similarity."""
+    model = rank_1g_mle_random
+    indices = np.arange(10) + 1
+    ds_pairs, _ = pairwise_index_dataset(indices, elements='all')
+    desired = pairwise_similarity(
+        model.stimuli, model.kernel, ds_pairs
+    ).numpy()
+    # NOTE: `pairwise_index_dataset` uses `np.meshgrid`, which varies the
+    # first index fastest.
+    desired = np.reshape(desired, [10, 10]).T
+
+    simmat = similarity_matrix(
+        model.stimuli, model.kernel, indices, tile_size=tile_size,
+        symmetric=symmetric
+    )
+
+    assert simmat.shape == (10, 10)
+    np.testing.assert_array_almost_equal(desired, simmat)
+
+
+def test_2g(rank_2g_mle_determ):
+    """Test similarity matrix with group-specific kernels."""
+    model = rank_2g_mle_determ
+    desired_simmat1 = np.array([
+        [1., 0.29685964, 0.00548485],
+        [0.29685964, 1., 0.01814493],
+        [0.00548485, 0.01814493, 1.]
+    ])
+
+    simmat1 = similarity_matrix(
+        model.stimuli, model.kernel, np.arange(3) + 1, groups=[1],
+        use_group_kernel=True, tile_size=2
+    )
+    np.testing.assert_array_almost_equal(desired_simmat1, simmat1)
+
+    with pytest.raises(Exception) as e_info:
+        similarity_matrix(
+            model.stimuli, model.kernel, np.arange(3) + 1,
+            use_group_kernel=True
+        )
+    assert e_info.type == ValueError
+
+
+def test_memmap(rank_1g_mle_determ, tmpdir):
+    """Test memory-mapped output."""
+    model = rank_1g_mle_determ
+    fp = tmpdir.join('simmat.npy')
+    desired = similarity_matrix(model.stimuli, model.kernel, np.arange(4))
+
+    simmat = similarity_matrix(
+        model.stimuli, model.kernel, np.arange(4), tile_size=2, filepath=fp
+    )
+    assert isinstance(simmat, np.memmap)
+    del simmat
+
+    loaded = np.load(fp, mmap_mode='r')
+    np.testing.assert_array_almost_equal(desired, loaded)